@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config_store import ConfigStore
+
+# 读取次数
+READS = 10000
+
+default_config = {
+    "node_path": "",
+    "java_path": ""
+}
+
+
+def load_config_uncached(config_file):
+    """旧实现: 每次都打开并解析配置文件"""
+    with open(config_file, "r") as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, "config.json")
+        config = dict(default_config)
+        config["gradle_installed_versions"] = [f"C:\\gradle\\gradle-8.{i}" for i in range(20)]
+        with open(config_file, "w") as f:
+            json.dump(config, f, indent=4)
+
+        start = time.perf_counter()
+        for _ in range(READS):
+            load_config_uncached(config_file)
+        before = time.perf_counter() - start
+
+        store = ConfigStore(config_file, default_config)
+        start = time.perf_counter()
+        for _ in range(READS):
+            store.load()
+        after = time.perf_counter() - start
+
+        print(f"{READS} 次读取 (无缓存): {before * 1000:.1f} ms")
+        print(f"{READS} 次读取 (缓存):   {after * 1000:.1f} ms")
+        print(f"加速比: {before / after:.1f}x")
+        print(f"缓存统计: {store.stats()}")
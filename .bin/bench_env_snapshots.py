@@ -0,0 +1,72 @@
+"""
+环境变量快照库基准: 模拟数千次备份 (每次只有少量变量变化)，
+测量创建、冷启动列出、比较和读取历史快照的耗时，以及与每次完整写入 JSON 的空间对比。
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from env_snapshots import EnvSnapshotStore, DEFAULT_RETENTION
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(backups=3000, user_vars=60, system_vars=80, seed=1):
+    rng = random.Random(seed)
+    variables = {
+        "user": {f"USER_VAR_{i}": f"C:\\Users\\dev\\tool{i}\\bin;" * rng.randint(1, 4) for i in range(user_vars)},
+        "system": {f"SYS_VAR_{i}": f"C:\\Program Files\\pkg{i}\\bin;" * rng.randint(1, 8) for i in range(system_vars)},
+    }
+    variables["system"]["Path"] = ";".join(f"C:\\Program Files\\app{i}\\bin" for i in range(60))
+
+    with tempfile.TemporaryDirectory() as root:
+        store = EnvSnapshotStore(root)
+        full_dump_bytes = 0
+        start_time = time.time() - backups * 3600  # 每小时一次备份
+        start = time.perf_counter()
+        for n in range(backups):
+            for _ in range(rng.randint(0, 3)):
+                scope = rng.choice(["user", "system"])
+                name = rng.choice(list(variables[scope]))
+                if rng.random() < 0.1:
+                    del variables[scope][name]
+                variables[scope][f"{name}_{n}" if rng.random() < 0.1 else name] = f"value {n} {rng.random()}"
+            store.create({scope: dict(values) for scope, values in variables.items()}, timestamp=start_time + n * 3600)
+            full_dump_bytes += len(json.dumps(variables["user"], indent=4)) + len(json.dumps(variables["system"], indent=4))
+        create_ms = (time.perf_counter() - start) / backups * 1000
+        print(f"{backups} 次备份，平均每次 {create_ms:.2f}ms，快照数 {len(store)}")
+        print(f"快照库 {directory_size(root) / 1024:.0f} KiB，每次完整写入 JSON 共 {full_dump_bytes / 1024:.0f} KiB")
+
+        ids = [item["id"] for item in store.list()]
+        print(f"冷启动列出全部快照 {timed(lambda: EnvSnapshotStore(root).list(), 5):.2f}ms")
+        fresh = EnvSnapshotStore(root)
+        print(f"比较两个随机快照 {timed(lambda: fresh.diff(rng.choice(ids), rng.choice(ids)), 200):.3f}ms")
+        print(f"读取随机历史快照 (含值) {timed(lambda: EnvSnapshotStore(root).load(rng.choice(ids)), 50):.2f}ms")
+
+        start = time.perf_counter()
+        result = store.prune(**DEFAULT_RETENTION)
+        print(f"按默认保留策略清理 {(time.perf_counter() - start) * 1000:.0f}ms: {result}，"
+              f"剩余 {len(store)} 个快照，{directory_size(root) / 1024:.0f} KiB")
+        latest = store.head()["id"]
+        assert store.load(latest) == variables, "清理后最新快照内容不一致"
+        print("清理后最新快照内容一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动路径上不允许出现的模块 (应通过 lazy_import.lazy_module 或在函数中延迟导入)
+HEAVY_MODULES = {"PIL", "requests", "rich", "win32api", "win32con", "win32gui", "asyncio", "ssl",
+                 "importlib.metadata"}
+
+# 目标模块 -> (默认预算毫秒, 额外禁止的模块)
+TARGETS = {
+    "MainApplication": (150, set()),
+    "cli": (40, {"tkinter", "multiprocessing", "plugin_api"}),
+}
+
+
+def measure(module):
+    """执行一次 python -X importtime -c "import module"，返回 (累计耗时微秒, 子模块耗时, 导入的模块集合)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+    total = None
+    children = {}
+    pending = {}  # importtime 先输出子模块，再输出父模块
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name_indent = len(name) - len(name.lstrip())
+        name = name.strip()
+        imported.add(name)
+        if name_indent == 3:
+            pending[name] = int(cumulative)
+        elif name_indent == 1:
+            if name == module:
+                total = int(cumulative)
+                children = pending
+            pending = {}
+    return total, children, imported
+
+
+def check(module, budget_ms, forbidden, runs):
+    totals = []
+    children = {}
+    imported = set()
+    for _ in range(runs):
+        total, run_children, run_imported = measure(module)
+        totals.append(total)
+        children = run_children
+        imported |= run_imported
+    median = statistics.median(totals) / 1000
+    heavy = sorted(name for name in imported if name in forbidden or name.split(".")[0] in forbidden)
+
+    print(f"{module}: 中位数 {median:.1f} ms (预算 {budget_ms} ms，{runs} 次: "
+          f"{', '.join(f'{t / 1000:.0f}' for t in totals)})")
+    for name, cumulative in sorted(children.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {cumulative / 1000:7.1f} ms  {name}")
+    ok = True
+    if median > budget_ms:
+        print(f"  失败: 导入耗时超出预算 {median - budget_ms:.1f} ms")
+        ok = False
+    if heavy:
+        print(f"  失败: 启动时导入了应延迟导入的模块: {', '.join(heavy)}")
+        ok = False
+    return ok
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="基于 -X importtime 的启动导入耗时回归检查")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", action="append", default=[], metavar="模块=毫秒",
+                        help="覆盖默认预算，例如 --budget MainApplication=120")
+    args = parser.parse_args()
+
+    budgets = {name: budget for name, (budget, _) in TARGETS.items()}
+    for item in args.budget:
+        name, _, value = item.partition("=")
+        budgets[name] = float(value)
+
+    results = [check(name, budgets[name], HEAVY_MODULES | extra, args.runs) for name, (_, extra) in TARGETS.items()]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,81 @@
+"""
+测量第二个实例把请求转交给正在运行的实例的延迟 (Linux 本地替身，不需要显示器).
+
+用一个只持有锁并监听套接字的进程代替主实例，然后:
+  1. 在本进程中重复调用 SingleInstance.forward()，测量连接 + 发送 + 确认的耗时；
+  2. 重复启动 `python MainApplication.py --validate`，测量第二个实例从启动到退出的总耗时，
+     并与空的 Python 进程启动时间对比。
+"""
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from single_instance import SingleInstance
+
+PRIMARY = """
+import os, sys
+sys.path.insert(0, {root!r})
+from single_instance import SingleInstance
+instance = SingleInstance({config_dir!r})
+assert instance.acquire()
+count = [0]
+def handler(request):
+    count[0] += 1
+instance.serve(handler)
+print("ready", flush=True)
+sys.stdin.read()
+instance.close()
+print(count[0], flush=True)
+"""
+
+
+def summary(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<28} 中位数 {statistics.median(samples) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms  (n={len(samples)})")
+
+
+def main(forward_runs=200, launch_runs=15):
+    with tempfile.TemporaryDirectory() as home:
+        config_dir = os.path.join(home, ".systools")
+        primary = subprocess.Popen([sys.executable, "-c", PRIMARY.format(root=ROOT, config_dir=config_dir)],
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        assert primary.stdout.readline().strip() == "ready"
+
+        client = SingleInstance(config_dir)
+        assert not client.acquire(), "替身主实例没有持有锁"
+        samples = []
+        for _ in range(forward_runs):
+            start = time.perf_counter()
+            assert client.forward({"action": "validate"})
+            samples.append(time.perf_counter() - start)
+        summary("forward() 转交请求", samples)
+
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        launches, baseline = [], []
+        for _ in range(launch_runs):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.join(ROOT, "MainApplication.py"), "--validate"],
+                                    env=env, capture_output=True, text=True)
+            launches.append(time.perf_counter() - start)
+            assert result.returncode == 0, result.stdout + result.stderr
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"])
+            baseline.append(time.perf_counter() - start)
+        summary("第二个实例启动到退出", launches)
+        summary("空 Python 进程 (对照)", baseline)
+
+        primary.stdin.close()
+        received = int(primary.stdout.readline())
+        primary.wait()
+        print(f"主实例收到 {received} 个请求 (预期 {forward_runs + launch_runs})")
+        return 0 if received == forward_runs + launch_runs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from path_list import PathList
+
+# PATH 条目数和操作次数
+ENTRIES = 2000
+OPERATIONS = 500
+
+variables = {"TOOLS_HOME": "C:\\Tools"}
+
+
+def make_path():
+    """生成 2000 个条目的 PATH，其中约 10% 是大小写、斜杠或 %VAR% 写法不同的重复目录"""
+    entries = []
+    for i in range(ENTRIES):
+        if i % 10 == 9:
+            j = i - 9
+            variant = i // 10 % 3
+            if variant == 0:
+                entries.append(f"c:/tools/app{j}/bin/")
+            elif variant == 1:
+                entries.append(f"%TOOLS_HOME%\\app{j}\\bin")
+            else:
+                entries.append(f"C:\\TOOLS\\APP{j}\\BIN")
+        else:
+            entries.append(f"C:\\Tools\\app{i}\\bin")
+    return ";".join(entries)
+
+
+def append_naive(current, entry):
+    """旧实现: 每次重新分割字符串并线性查找"""
+    paths = [p for p in current.split(';') if p]
+    if entry not in paths:
+        paths.append(entry)
+    return ';'.join(paths)
+
+
+def remove_naive(current, entry):
+    return ';'.join(p for p in current.split(';') if p and p != entry)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    value = make_path()
+    new_entries = [f"C:\\New\\tool{i}\\bin" for i in range(OPERATIONS)]
+    old_entries = [f"C:\\Tools\\app{i}\\bin" for i in range(0, ENTRIES, 4)][:OPERATIONS]
+
+    def naive_append():
+        current = value
+        for entry in new_entries:
+            current = append_naive(current, entry)
+        return current
+
+    def naive_remove():
+        current = value
+        for entry in old_entries:
+            current = remove_naive(current, entry)
+        return current
+
+    def indexed_append():
+        paths = PathList(value, ';', variables.get)
+        for entry in new_entries:
+            paths.append(entry)
+        return paths.serialize()
+
+    def indexed_bulk_append():
+        paths = PathList(value, ';', variables.get)
+        paths.extend(new_entries)
+        return paths.serialize()
+
+    def indexed_remove():
+        paths = PathList(value, ';', variables.get)
+        paths.remove(old_entries)
+        return paths.serialize()
+
+    def indexed_membership():
+        paths = PathList(value, ';', variables.get)
+        return sum(entry in paths for entry in old_entries + new_entries)
+
+    parsed, parse_time = timed(lambda: PathList(value, ';', variables.get))
+    _, naive_append_time = timed(naive_append)
+    _, append_time = timed(indexed_append)
+    _, bulk_append_time = timed(indexed_bulk_append)
+    _, naive_remove_time = timed(naive_remove)
+    _, remove_time = timed(indexed_remove)
+    hits, membership_time = timed(indexed_membership)
+    duplicates, dedupe_time = timed(parsed.dedupe)
+
+    print(f"PATH 条目数: {ENTRIES}，每项操作 {OPERATIONS} 次")
+    print(f"解析并建立索引:          {parse_time * 1000:.2f} ms")
+    print(f"逐个追加 (旧实现):       {naive_append_time * 1000:.2f} ms")
+    print(f"逐个追加 (PathList):     {append_time * 1000:.2f} ms")
+    print(f"批量追加 (PathList):     {bulk_append_time * 1000:.2f} ms")
+    print(f"逐个删除 (旧实现):       {naive_remove_time * 1000:.2f} ms")
+    print(f"批量删除 (PathList):     {remove_time * 1000:.2f} ms")
+    print(f"成员判断 {len(old_entries) + len(new_entries)} 次 (含索引构建): {membership_time * 1000:.2f} ms，命中 {hits}")
+    print(f"去重: {dedupe_time * 1000:.2f} ms，删除了 {len(duplicates)} 个规范化后重复的条目 (旧实现无法识别)")
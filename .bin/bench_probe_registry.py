@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import heapq
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from task_scheduler import TaskScheduler
+from probe_registry import ProbeRegistry
+
+# 模拟的工具链: (名称, 版本命令耗时, 开销等级)
+TOOLCHAINS = [
+    ("node", 0.15, "spawn"), ("python", 0.1, "spawn"), ("go", 0.1, "spawn"), ("rustc", 0.2, "spawn"),
+    ("java", 0.6, "jvm"), ("gradle", 1.2, "jvm"), ("maven", 0.9, "jvm"), ("kotlin", 0.8, "jvm"),
+    ("dotnet", 0.4, "spawn"), ("ruby", 0.1, "spawn"), ("php", 0.1, "spawn"), ("git", 0.05, "spawn"),
+]
+
+
+class FakeTk:
+    """只实现 after/mainloop 的 Tk 替身，用于在无显示环境中驱动 TaskScheduler"""
+
+    def __init__(self):
+        self._timers = []
+        self._seq = 0
+        self._running = True
+
+    def after(self, ms, fn, *args):
+        self._seq += 1
+        heapq.heappush(self._timers, (time.perf_counter() + ms / 1000, self._seq, fn, args))
+
+    def quit(self):
+        self._running = False
+
+    def mainloop(self):
+        while self._running and self._timers:
+            due, _, fn, args = heapq.heappop(self._timers)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            fn(*args)
+
+
+def make_tool(directory, name, delay):
+    """生成一个耗时 delay 秒后输出版本号的脚本"""
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(f"#!/bin/sh\nsleep {delay}\necho {name} 1.0\n")
+    os.chmod(path, 0o755)
+    return path
+
+
+def validate(registry, master, config):
+    results = {}
+
+    def on_complete(probe_run):
+        results.update(probe_run.results)
+        results["elapsed"] = probe_run.elapsed
+        master.quit()
+
+    registry.run(config, on_complete=on_complete)
+    master._running = True
+    master.mainloop()
+    return results
+
+
+if __name__ == '__main__':
+    if os.name == 'nt':
+        sys.exit("此基准使用 shell 脚本模拟工具链，请在 Linux/macOS 上运行")
+    with tempfile.TemporaryDirectory() as directory:
+        master = FakeTk()
+        scheduler = TaskScheduler(master)
+        registry = ProbeRegistry(scheduler, max_workers=len(TOOLCHAINS))
+        config = {}
+        for name, delay, cost in TOOLCHAINS:
+            path = make_tool(directory, name, delay)
+            registry.register(name, lambda context, path=path: context.run([path]).stdout.strip(),
+                              timeout=5, cost=cost, executable=lambda config, path=path: path)
+        # 与 java 使用同一可执行文件的验证项只执行一次
+        registry.register("java-alias", lambda context: "unused", cost="jvm",
+                          executable=lambda config: os.path.join(directory, "java"))
+
+        serial = sum(delay for _, delay, _ in TOOLCHAINS)
+        first = validate(registry, master, config)
+        second = validate(registry, master, config)
+        config["java_path"] = "changed"
+        registry.get("java").config_keys = ("java_path",)
+        third = validate(registry, master, config)
+        scheduler.shutdown()
+        registry.shutdown()
+
+        slowest = max(delay for _, delay, _ in TOOLCHAINS)
+        print(f"{len(TOOLCHAINS)} 个工具链，逐个验证的总耗时: {serial:.2f}s，最慢的一个: {slowest:.2f}s")
+        print(f"并行验证:               {first['elapsed']:.2f}s")
+        print(f"再次验证 (缓存):        {second['elapsed'] * 1000:.1f} ms")
+        print(f"修改 java_path 后验证:  {third['elapsed']:.2f}s，重新执行: "
+              f"{[name for name, value in third.items() if name != 'elapsed' and not value[3]]}")
+        print(f"java-alias 的结果: {first['java-alias'][0]}")
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from which_index import WhichIndex
+
+# PATH 目录数、每个目录的可执行文件数和查询次数
+DIRECTORIES = 200
+FILES = 20
+LOOKUPS = 10000
+
+
+def make_tree(root):
+    """生成 DIRECTORIES 个目录，最后一个目录中有 java，另有两个目录中的 tool0 互相遮蔽"""
+    dirs = []
+    suffix = ".exe" if os.name == 'nt' else ""
+    for i in range(DIRECTORIES):
+        directory = os.path.join(root, f"dir{i}")
+        os.makedirs(directory)
+        names = [f"tool{i * FILES + j}" for j in range(FILES)]
+        if i in (3, 7):
+            names.append("tool0")
+        if i == DIRECTORIES - 1:
+            names.append("java")
+        for name in names:
+            path = os.path.join(directory, name + suffix)
+            with open(path, "w") as f:
+                f.write("#!/bin/sh\necho java\n")
+            os.chmod(path, 0o755)
+        dirs.append(directory)
+    return os.pathsep.join(dirs)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as root:
+        path = make_tree(root)
+
+        start = time.perf_counter()
+        index = WhichIndex(path)
+        index.refresh()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(LOOKUPS):
+            index.which("java")
+        lookup = (time.perf_counter() - start) / LOOKUPS
+
+        start = time.perf_counter()
+        for _ in range(100):
+            shutil.which("java", path=path)
+        shutil_lookup = (time.perf_counter() - start) / 100
+
+        env = dict(os.environ, PATH=path)
+        start = time.perf_counter()
+        for _ in range(10):
+            subprocess.run(["java"], env=env, capture_output=True, shell=os.name == 'nt')
+        spawn = (time.perf_counter() - start) / 10
+
+        # 在一个目录中新增文件，只应重新扫描该目录
+        scans = index.scans
+        time.sleep(0.01)
+        with open(os.path.join(root, "dir5", "newtool"), "w") as f:
+            f.write("")
+        os.chmod(os.path.join(root, "dir5", "newtool"), 0o755)
+        index.refresh()
+
+        print(f"{DIRECTORIES} 个目录，{DIRECTORIES * FILES} 个可执行文件")
+        print(f"建立索引:        {build * 1000:.2f} ms")
+        print(f"索引查找:        {lookup * 1e6:.2f} us")
+        print(f"shutil.which:    {shutil_lookup * 1e6:.2f} us")
+        print(f"启动进程:        {spawn * 1000:.2f} ms")
+        print(f"目录变化后重新扫描的目录数: {index.scans - scans}，newtool -> {index.which('newtool')}")
+        print(f"遮蔽报告: {index.shadowed(['tool0'])}")
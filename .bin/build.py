@@ -40,6 +40,10 @@ if __name__ == '__main__':
         '--icon', icon_file,
     ]
 
+    # 通过 lazy_module 延迟导入的模块 PyInstaller 无法自动发现，需要显式打包
+    for module in ('win32con', 'win32gui'):
+        args += ['--hidden-import', module]
+
     # Create version file
     version_file_content = f"""# UTF-8 encoding
 #
@@ -1,3 +1,18 @@
+import sys
+
+if __name__ == "__main__":
+    # 插件宿主工作进程以 spawn 方式启动，打包后子进程也会执行这里，需要避免重复创建窗口
+    # (未打包时 freeze_support 不做任何事，不必导入 multiprocessing)
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    # 已有实例在运行时，在导入 Tk 和各模块之前把命令行请求转交给它并退出
+    from single_instance import SingleInstance, parse_request
+    instance_request = parse_request(sys.argv[1:])
+    instance = SingleInstance()
+    if not instance.acquire():
+        sys.exit(0 if instance.forward(instance_request) else 1)
+
 import tkinter as tk
 from tkinter import ttk
 import os
@@ -5,11 +20,9 @@ import shutil
 import subprocess
 import json
 import time
-from threading import Thread
-import sys  # 导入 sys 模块
+import threading
 import importlib
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk  # 导入 PIL 库
 
 # 导入各个模块
 from setup_module import SetupSection
@@ -17,109 +30,252 @@ from env_config_module import EnvConfigSection
 from env_vars_module import EnvVarsSection
 from validation_module import ValidationSection
 from plugin_api import PluginAPI  # 导入 PluginAPI
+from config_store import ConfigStore, CONFIG_DIR, DEFAULT_CONFIG, write_json_atomic
+from plugin_index import PluginIndex, PluginHandle, file_hash
+from plugin_bytecode import BytecodeCache
+from plugin_loader import ParallelPluginLoader, format_slowest
+from plugin_registry import PluginRegistry
+from plugin_deps import DependencyResolver, read_plugin_metadata
+from task_scheduler import TaskScheduler
+from probe_registry import ProbeRegistry
+from file_watcher import FileWatcher
+from tracer import tracer, span, traced
+
+# 完全重启时传给新进程的开始时间 (time.time())
+RESTART_ENV = "SYSTOOLS_RESTART_STARTED"
 
 
 class EnvConfigurator:
-    def __init__(self, master):
+    @traced("EnvConfigurator.__init__")
+    def __init__(self, master, instance=None):
         self.master = master
+        self.instance = instance  # 单实例保护，接收其他实例转交的请求
         master.title("环境配置工具")
 
         # 配置文件路径
-        self.config_dir = os.path.join(os.path.expanduser("~"), ".systools")
+        self.config_dir = CONFIG_DIR
         self.config_file = os.path.join(self.config_dir, "config.json")
         self.plugins_dir = os.path.join(self.config_dir, "plugins")  # 插件目录
         self.plugins_json = os.path.join(self.config_dir, "plugins.json")  # 插件列表文件
+        self.plugins_index_json = os.path.join(self.config_dir, "plugins_index.json")  # 插件清单索引
+        self.restart_cache_file = os.path.join(self.config_dir, "cache", "restart.json")  # 上次完全重启的耗时
+
+        self.default_config = dict(DEFAULT_CONFIG)
+
+        # 配置缓存，仅在文件变化时重新读取
+        self.config_store = ConfigStore(self.config_file, self.default_config)
 
-        self.default_config = {
-            "node_path": "",
-            "java_path": ""
-        }
-        
         # 初始化配置
         self.config = self.load_config()
 
-        # 插件列表
-        self.plugins = []
+        # 共享后台任务线程池，回调在 Tk 线程中执行
+        self.task_scheduler = TaskScheduler(master, max_workers=self.config.get("background_workers", 4))
+        # 环境验证项注册表，内置模块和插件注册的验证项在独立的有界线程池中并行执行
+        self.probe_registry = ProbeRegistry(self.task_scheduler, max_workers=self.config.get("probe_workers", 8))
+
+        # 插件注册表 (按名称和文件名索引的 PluginHandle)
+        self.plugin_index = PluginIndex(self.plugins_index_json)
+        self.plugin_registry = PluginRegistry(self.plugins_json, self.plugin_index)
+        # 插件字节码缓存
+        self.bytecode_cache = BytecodeCache(os.path.join(self.config_dir, "cache", "bytecode"))
+        # 并行导入插件，记录每个插件的导入耗时
+        self.plugin_loader = ParallelPluginLoader(master, self.import_plugin_module)
+        self.plugin_import_times = {}
+        self.plugin_errors = None  # 启动期间收集的插件错误，启动完成后统一显示
+        # 插件依赖在后台从本地 wheel 目录安装
+        self.dependency_resolver = DependencyResolver(
+            master,
+            os.path.join(self.config_dir, "wheels"),
+            os.path.join(self.config_dir, "cache", "deps.json")
+        )
         self.plugin_buttons = {}  # 添加插件按钮字典
+        self.plugin_launch_buttons = {}  # 插件名称 -> 打开插件的按钮
 
         # 创建 PluginAPI 实例
         self.plugin_api = PluginAPI(self)
 
-        # 软件设置
-        self.setup_frame = ttk.LabelFrame(master, text="软件设置")
-        self.setup_frame.pack(padx=10, pady=10, fill=tk.X)
-
-        # 环境配置
-        self.env_frame = ttk.LabelFrame(master, text="环境配置")
-        self.env_frame.pack(padx=10, pady=10, fill=tk.X)
+        # 监视 config.json 和插件目录，变化时只重新加载受影响的配置项或插件
+        self.file_watcher = FileWatcher(self.task_scheduler, self.config.get("watch_debounce", 0.2),
+                                        self.config.get("file_watcher", "auto"))
+        self.pending_plugin_changes = set()  # 插件加载期间收到的文件变化
 
-        # 系统环境变量
-        self.env_vars_frame = ttk.LabelFrame(master, text="系统环境变量")
-        self.env_vars_frame.pack(padx=10, pady=10, fill=tk.X)
+        self.restart_started = None  # 软重启开始时间
+        self.build_ui()
 
-        # 环境功能验证
-        self.validation_frame = ttk.LabelFrame(master, text="环境功能验证")
-        self.validation_frame.pack(padx=10, pady=10, fill=tk.X)
+        # 加载插件
+        self.load_plugins()
+        self.start_file_watcher()
+        if self.instance is not None:
+            try:
+                self.instance.serve(lambda request: self.task_scheduler.call_soon(self.handle_instance_request, request))
+            except OSError as e:
+                print(f"无法接收其他实例的请求: {e}")
+
+    @traced("build_ui")
+    def build_ui(self):
+        """创建各区域的框架和模块实例 (软重启时重新创建)."""
+        with span("create widgets"):
+            # 软件设置
+            self.setup_frame = ttk.LabelFrame(self.master, text="软件设置")
+            self.setup_frame.pack(padx=10, pady=10, fill=tk.X)
+
+            # 环境配置
+            self.env_frame = ttk.LabelFrame(self.master, text="环境配置")
+            self.env_frame.pack(padx=10, pady=10, fill=tk.X)
+
+            # 系统环境变量
+            self.env_vars_frame = ttk.LabelFrame(self.master, text="系统环境变量")
+            self.env_vars_frame.pack(padx=10, pady=10, fill=tk.X)
+
+            # 环境功能验证
+            self.validation_frame = ttk.LabelFrame(self.master, text="环境功能验证")
+            self.validation_frame.pack(padx=10, pady=10, fill=tk.X)
+
+            # 扩展区
+            self.extension_frame = ttk.LabelFrame(self.master, text="扩展区")
+            self.extension_frame.pack(padx=10, pady=10, fill=tk.X)
+
+            # 插件按钮容器
+            self.plugin_button_frame = ttk.Frame(self.extension_frame)
+            self.plugin_button_frame.pack(padx=5, pady=5, fill=tk.X)
+
+            # 暂无插件标签
+            self.no_plugins_label = ttk.Label(self.plugin_button_frame, text="暂无插件")
+            self.no_plugins_label.pack(padx=5, pady=5)
 
-        # 扩展区
-        self.extension_frame = ttk.LabelFrame(master, text="扩展区")
-        self.extension_frame.pack(padx=10, pady=10, fill=tk.X)
+            # 插件导入耗时
+            self.plugin_timing_var = tk.StringVar()
+            self.plugin_timing_label = ttk.Label(self.extension_frame, textvariable=self.plugin_timing_var)
+            self.plugin_timing_label.pack(padx=5, pady=(0, 5), anchor=tk.W)
 
-        # 插件按钮容器
-        self.plugin_button_frame = ttk.Frame(self.extension_frame)
-        self.plugin_button_frame.pack(padx=5, pady=5, fill=tk.X)
+            # 按钮容器
+            self.button_frame = ttk.Frame(self.master)
+            self.button_frame.pack(pady=10)
 
-        # 暂无插件标签
-        self.no_plugins_label = ttk.Label(self.plugin_button_frame, text="暂无插件")
-        self.no_plugins_label.pack(padx=5, pady=5)
+            # 刷新环境变量
+            self.refresh_button = ttk.Button(self.button_frame, text="刷新环境变量", command=self.refresh_env)
+            self.refresh_button.grid(row=0, column=0, padx=5)
 
-        # 按钮容器
-        button_frame = ttk.Frame(master)
-        button_frame.pack(pady=10)
+            # 重启应用按钮 (进程内软重启)
+            self.restart_button = ttk.Button(self.button_frame, text="重启应用", command=self.soft_restart)
+            self.restart_button.grid(row=0, column=1, padx=5)
 
-        # 刷新环境变量
-        self.refresh_button = ttk.Button(button_frame, text="刷新环境变量", command=self.refresh_env)
-        self.refresh_button.grid(row=0, column=0, padx=5)
+            # 退出应用按钮
+            self.exit_button = ttk.Button(self.button_frame, text="退出", command=self.exit_application)
+            self.exit_button.grid(row=0, column=2, padx=5)
 
-        # 重启应用按钮
-        self.restart_button = ttk.Button(button_frame, text="重启应用", command=self.restart_application)
-        self.restart_button.grid(row=0, column=1, padx=5)
+            # 选择插件按钮
+            self.select_plugin_button = ttk.Button(self.button_frame, text="选择插件", command=self.select_plugin)
+            self.select_plugin_button.grid(row=0, column=3, padx=5)
 
-        # 退出应用按钮
-        self.exit_button = ttk.Button(button_frame, text="退出", command=self.exit_application)
-        self.exit_button.grid(row=0, column=2, padx=5)
+            # 完全重启按钮 (启动新进程)
+            self.full_restart_button = ttk.Button(self.button_frame, text="完全重启", command=self.restart_application)
+            self.full_restart_button.grid(row=0, column=4, padx=5)
 
-        # 选择插件按钮
-        self.select_plugin_button = ttk.Button(button_frame, text="选择插件", command=self.select_plugin)
-        self.select_plugin_button.grid(row=0, column=3, padx=5)
+            # 重启耗时
+            self.restart_info_var = tk.StringVar()
+            ttk.Label(self.button_frame, textvariable=self.restart_info_var).grid(row=1, column=0, columnspan=5, pady=(5, 0))
 
         # 创建各个模块的实例
-        self.setup_section = SetupSection(self.setup_frame)
-        self.env_config_section = EnvConfigSection(self.env_frame, self.config, self.save_config)
-        # 将 config_dir 传递给 EnvVarsSection
-        self.env_vars_section = EnvVarsSection(self.env_vars_frame, self.config_dir)
-        self.validation_section = ValidationSection(self.validation_frame)
-
-        # 加载插件
-        self.load_plugins()
-
-    def load_config(self):
-        """每次都从文件中读取最新配置"""
-        if not os.path.exists(self.config_dir):
-            os.makedirs(self.config_dir)
-        if not os.path.exists(self.config_file):
-            with open(self.config_file, "w") as f:
-                json.dump(self.default_config, f, indent=4)
-            return self.default_config.copy()
+        with span("SetupSection"):
+            self.setup_section = SetupSection(self.setup_frame)
+        with span("EnvConfigSection"):
+            self.env_config_section = EnvConfigSection(self.env_frame, self.config, self.save_config)
+        # 将 config_dir 和 plugin_api (环境变量后端、后台线程池) 传递给 EnvVarsSection
+        with span("EnvVarsSection"):
+            self.env_vars_section = EnvVarsSection(self.env_vars_frame, self.config_dir, self.plugin_api)
+        with span("ValidationSection"):
+            self.validation_section = ValidationSection(self.validation_frame, self.probe_registry, self.config,
+                                                        self.plugin_api.probe_cache,
+                                                        self.config.get("validation_timeout", 10))
+
+    @traced("start_file_watcher")
+    def start_file_watcher(self):
+        """启动文件监视，配置文件所在目录确实在监视中时读取配置不再检查文件状态."""
         try:
-            with open(self.config_file, "r") as f:
-                return json.load(f)
+            self.file_watcher.start()
         except Exception as e:
-            print(f"加载配置文件失败: {e}, 使用默认配置")
-            return self.default_config.copy()
+            print(f"启动文件监视失败: {e}")
+            return
+        subscription = self.file_watcher.subscribe(self.config_file, self.on_config_file_changed)
+        self.file_watcher.subscribe(self.plugins_dir, self.on_plugin_files_changed)
+        # 添加目录失败时不会收到变化通知，继续在读取时检查 mtime
+        self.config_store.watched = subscription.active
+
+    def on_config_file_changed(self, paths):
+        """config.json 被外部修改 (Tk 线程)，只更新变化的配置项并通知各模块和插件."""
+        config = self.config_store.reload()  # 有尚未落盘的修改时与外部修改合并
+        if config is None:
+            return  # 文件可能正在被写入，等下一次变化
+        changed = {key: config.get(key) for key in set(config) | set(self.config)
+                   if config.get(key) != self.config.get(key)}
+        if not changed:
+            return  # 本进程自己写入的配置
+        for key, value in changed.items():
+            if key in config:
+                self.config[key] = value
+            else:
+                self.config.pop(key, None)
+        print(f"配置文件已变化: {', '.join(sorted(changed))}")
+        self.env_config_section.on_config_changed(changed)
+        self.plugin_api.notify_config_changed(changed)
+
+    def on_plugin_files_changed(self, paths):
+        """插件目录中的文件变化 (Tk 线程)，只重新加载内容变化的插件."""
+        if self.plugin_errors is not None:
+            # 插件仍在加载，完成后再处理
+            self.pending_plugin_changes.update(paths)
+            return
+        if any(os.path.normcase(path) == os.path.normcase(self.plugins_dir) for path in paths):
+            # 事件队列溢出，重新检查整个目录
+            paths = {os.path.join(self.plugins_dir, name) for name in os.listdir(self.plugins_dir)}
+            paths.update(handle.path for handle in self.plugin_registry)
+        with self.plugin_registry.batch():
+            for path in sorted(paths):
+                filename = os.path.basename(path)
+                if not filename.endswith(".py") or filename.startswith("."):
+                    continue
+                handle = self.plugin_registry.find_by_filename(filename)
+                if not os.path.exists(path):
+                    if handle is not None:
+                        print(f"插件文件 {filename} 已删除")
+                        self.remove_plugin(handle, delete_file=False)
+                    continue
+                try:
+                    if handle is not None and handle.file_hash == file_hash(path):
+                        continue  # 内容未变化，例如安装插件时复制的文件
+                except OSError:
+                    continue
+                print(f"发现新插件 {filename}" if handle is None else f"插件文件 {filename} 已变化，重新加载")
+                self.load_plugin(path)
+
+    def handle_instance_request(self, request):
+        """处理命令行请求 (本实例启动参数或其他实例转交的请求，Tk 线程)."""
+        action = request.get("action")
+        print(f"收到请求: {action}")
+        # 把窗口带到前台
+        self.master.deiconify()
+        self.master.lift()
+        self.master.focus_force()
+        if action == "open_plugin":
+            handle = self.find_plugin_by_name(request.get("name"))
+            if handle is None:
+                messagebox.showerror("错误", f"未找到插件 {request.get('name')}")
+            else:
+                self.show_plugin_gui(handle)
+        elif action == "validate":
+            self.validation_section.validate_all()
+        elif action == "install_plugin":
+            with self.plugin_registry.batch():
+                self.load_plugin(request["path"])
+
+    @traced("load_config")
+    def load_config(self):
+        """读取最新配置 (可修改的副本)，文件未变化时使用内存缓存"""
+        return self.config_store.load(copy=True)
 
     def get_config(self, key=None):
-        """获取最新配置"""
+        """获取最新配置 (副本，调用方可以修改)"""
         config = self.load_config()
         if key is None:
             return config
@@ -128,11 +284,9 @@ class EnvConfigurator:
     def save_config(self):
         """保存配置文件"""
         try:
-            config = self.get_config()  # 获取当前配置
+            config = dict(self.config_store.load())  # 获取当前配置 (save 时会复制，这里不需要深拷贝)
             config.update(self.config)  # 更新配置
-            with open(self.config_file, "w") as f:
-                json.dump(config, f, indent=4)
-            print("配置文件保存成功")
+            self.config_store.save(config)  # 延迟合并写入
         except Exception as e:
             print(f"保存配置文件失败: {e}")
 
@@ -142,16 +296,96 @@ class EnvConfigurator:
         else:  # 其他系统（如 Linux 或 macOS）
             print("请手动刷新环境变量或重启终端。")
 
+    @traced("soft_restart")
+    def soft_restart(self):
+        """
+        进程内软重启: 重新读取配置，销毁并重新创建各区域和插件注册表.
+        已导入的模块直接复用，只重新执行文件发生变化的插件。
+        """
+        if self.plugin_errors is not None:
+            messagebox.showinfo("提示", "插件仍在加载，请稍后再重启")
+            return
+        print("软重启...")
+        self.restart_started = time.perf_counter()
+        try:
+            self.config_store.flush()
+            self.config = self.load_config()
+
+            # 已导入的插件模块，文件未变化时复用
+            loaded = {handle.filename: handle for handle in self.plugin_registry if handle.module is not None}
+
+            with span("destroy widgets"):
+                self.validation_section.close()
+                self.plugin_buttons.clear()
+                self.plugin_launch_buttons.clear()
+                for frame in (self.setup_frame, self.env_frame, self.env_vars_frame, self.validation_frame,
+                              self.extension_frame, self.button_frame):
+                    frame.destroy()
+
+            self.build_ui()
+            self.load_plugins(loaded)
+        except Exception as e:
+            self.restart_started = None
+            print(f"软重启失败: {e}")
+            messagebox.showerror("错误", f"软重启失败: {e}")
+            return
+        # 与启动一样，以重建后第一次空闲作为完成时间
+        self.master.after_idle(self.on_soft_restart_idle)
+
+    def on_soft_restart_idle(self):
+        elapsed = (time.perf_counter() - self.restart_started) * 1000
+        self.restart_started = None
+        tracer.instant("soft restart idle")
+        print(f"软重启完成 ({elapsed:.0f}ms)")
+        self.show_restart_latency(elapsed)
+
+    def show_restart_latency(self, soft_ms=None):
+        """显示软重启耗时和上次完全重启耗时."""
+        parts = []
+        if soft_ms is not None:
+            parts.append(f"软重启耗时 {soft_ms:.0f}ms")
+        try:
+            with open(self.restart_cache_file, "r") as f:
+                respawn_ms = json.load(f).get("respawn_ms")
+        except (OSError, ValueError, AttributeError):
+            respawn_ms = None
+        if respawn_ms is not None:
+            parts.append(f"上次完全重启 {respawn_ms:.0f}ms")
+        self.restart_info_var.set("，".join(parts))
+
+    def record_respawn_latency(self, started):
+        """完全重启后的新进程中调用，记录从旧进程开始重启到第一次空闲的耗时."""
+        elapsed = (time.time() - started) * 1000
+        print(f"完全重启完成 ({elapsed:.0f}ms)")
+        # 保存在缓存目录而不是 config.json 中，避免每次重启都改写用户配置并触发配置文件监视
+        try:
+            os.makedirs(os.path.dirname(self.restart_cache_file), exist_ok=True)
+            write_json_atomic(self.restart_cache_file, {"respawn_ms": round(elapsed)})
+        except OSError as e:
+            print(f"保存重启耗时失败: {e}")
+        self.show_restart_latency()
+
     def restart_application(self):
-        # 重启应用
+        # 完全重启: 启动新进程
         print("重启应用...")
         try:
+            started = time.time()
+            # 确保配置已落盘，新进程才能读到
+            self.config_store.flush()
+            # 释放单实例锁，新进程才能成为主实例
+            if self.instance is not None:
+                self.instance.close()
+            self.file_watcher.stop()
+            self.plugin_api.shutdown()
+            self.probe_registry.shutdown()
+            self.task_scheduler.shutdown()
             # 获取当前 Python 解释器路径
             python_exe = sys.executable
             # 获取当前脚本路径
             script_path = os.path.abspath(__file__)
-            # 使用 subprocess 启动一个新的进程
-            subprocess.Popen([python_exe, script_path])
+            # 使用 subprocess 启动一个新的进程，新进程据此计算重启耗时
+            env = dict(os.environ, **{RESTART_ENV: repr(started)})
+            subprocess.Popen([python_exe, script_path], env=env)
             # 关闭当前应用
             self.master.destroy()
         except Exception as e:
@@ -161,6 +395,13 @@ class EnvConfigurator:
     def exit_application(self):
         # 退出应用
         print("退出应用...")
+        self.config_store.flush()
+        self.file_watcher.stop()
+        if self.instance is not None:
+            self.instance.close()
+        self.plugin_api.shutdown()
+        self.probe_registry.shutdown()
+        self.task_scheduler.shutdown()
         self.master.destroy()
 
     def select_plugin(self):
@@ -170,58 +411,272 @@ class EnvConfigurator:
             filetypes=[("Python Files", "*.py")]
         )
         if file_path:
-            self.load_plugin(file_path)
-
-    def load_plugins(self):
-        """加载插件."""
+            with self.plugin_registry.batch():
+                self.load_plugin(file_path)
+
+    @traced("load_plugins")
+    def load_plugins(self, loaded=None):
+        """
+        加载插件，索引未变化的插件只创建按钮，首次使用时再导入.
+        loaded: 软重启时传入 {文件名: 已导入的 PluginHandle}，文件未变化的插件复用已导入的模块
+        """
         if not os.path.exists(self.plugins_dir):
             os.makedirs(self.plugins_dir)
 
-        try:
-            with open(self.plugins_json, "r") as f:
-                plugin_files = json.load(f)
-        except Exception:
-            plugin_files = []
+        # 读取一次 plugins.json，之后只在内存中修改，批处理结束时统一写入
+        self.plugin_registry.begin_batch()
+        self.plugin_registry.load()
+        self.plugin_index.load()
 
-        # 清空现有插件和按钮
-        self.plugins = []
+        # 清空现有按钮
         self.clear_plugin_buttons()
 
         # 加载插件
-        for filename in plugin_files:
+        stale_paths = []
+        for filename in list(self.plugin_registry.filenames):
             plugin_path = os.path.join(self.plugins_dir, filename)
-            if os.path.exists(plugin_path):
-                self.load_plugin(plugin_path)
+            if not os.path.exists(plugin_path):
+                continue
+            handle = self.plugin_index.lookup(plugin_path)
+            if self.defer_until_dependencies(plugin_path, handle):
+                continue
+            previous = (loaded or {}).get(filename)
+            if handle is not None and previous is not None and previous.file_hash == handle.file_hash:
+                # 软重启时复用已导入的模块，验证项仍在注册表中
+                handle.module = previous.module
+                self.add_plugin_handle(handle)
+            elif handle is None:
+                # 新插件或文件已变化，需要导入以更新索引
+                stale_paths.append(plugin_path)
+            else:
+                self.add_plugin_handle(handle)
+                self.register_probe_stubs(handle)
+
+        # 在线程池中并行导入，注册和按钮创建回到 Tk 线程
+        self.plugin_errors = []
+        self.plugin_loader.load(stale_paths, self.on_plugin_imported, self.on_plugins_loaded)
+
+    def on_plugin_imported(self, plugin_path, plugin_module, error, duration):
+        """插件模块导入完成 (Tk 线程)."""
+        plugin_name = os.path.basename(plugin_path)[:-3]
+        self.plugin_import_times[os.path.basename(plugin_path)] = duration
+        if error is not None:
+            if isinstance(error, ModuleNotFoundError):
+                # 缓存的"依赖已满足"已失效，下次启动重新检查
+                self.dependency_resolver.forget(read_plugin_metadata(plugin_path)["requires"])
+            print(f"加载插件 {plugin_name} 失败: {error}")
+            self.show_plugin_error("加载插件失败", f"无法加载插件 {plugin_name}: {error}")
+            return
+        self.register_plugin(plugin_module, plugin_path)
+        print(f"插件 {plugin_name} 加载成功 ({duration * 1000:.0f}ms)")
+
+    def on_plugins_loaded(self):
+        """所有插件处理完毕，保存注册表并汇总显示错误."""
+        self.plugin_registry.end_batch()
 
         # 更新插件区域显示
-        if not self.plugins:
+        if not len(self.plugin_registry):
             self.no_plugins_label = ttk.Label(self.plugin_button_frame, text="暂无插件")
             self.no_plugins_label.pack(padx=5, pady=5)
+        self.update_plugin_timing()
+
+        errors, self.plugin_errors = self.plugin_errors, None
+        if self.pending_plugin_changes:
+            paths, self.pending_plugin_changes = self.pending_plugin_changes, set()
+            self.on_plugin_files_changed(paths)
+        if errors:
+            # 等窗口显示后再弹出汇总对话框
+            self.master.after_idle(lambda: messagebox.showerror(
+                "插件加载失败", "\n\n".join(f"{title}: {message}" for title, message in errors)))
+
+    def show_plugin_error(self, title, message):
+        """显示插件错误，启动期间先收集起来."""
+        if self.plugin_errors is not None:
+            self.plugin_errors.append((title, message))
+        else:
+            messagebox.showerror(title, message)
 
-    def load_plugin(self, plugin_path):
+    def update_plugin_timing(self):
+        """在扩展区显示导入最慢的插件."""
+        if self.plugin_import_times:
+            self.plugin_timing_var.set(f"最慢插件导入: {format_slowest(self.plugin_import_times)}")
+        else:
+            self.plugin_timing_var.set("")
+
+    def defer_until_dependencies(self, plugin_path, handle=None):
+        """插件依赖未满足时显示为"等待依赖"并在后台安装，返回是否已推迟."""
+        try:
+            metadata = None
+            if handle is not None:
+                requires = handle.requires
+            else:
+                metadata = read_plugin_metadata(plugin_path)
+                requires = metadata["requires"]
+            if not requires or self.dependency_resolver.is_satisfied(requires):
+                return False
+            if handle is None:
+                plugin_name = metadata["name"] or os.path.basename(plugin_path)[:-3]
+                handle = PluginHandle(plugin_name, plugin_path, file_hash(plugin_path), metadata["has_gui"], requires=requires)
+        except Exception as e:
+            print(f"读取插件依赖失败: {e}")
+            return False
+
+        handle.pending = True
+        self.add_plugin_handle(handle)
+        print(f"插件 {handle.name} 等待依赖: {', '.join(requires)}")
+        self.dependency_resolver.resolve(requires, lambda ok, error: self.on_plugin_dependencies(handle, ok, error))
+        return True
+
+    def on_plugin_dependencies(self, handle, ok, error):
+        """插件依赖安装完成 (Tk 线程)."""
+        button = self.plugin_launch_buttons.get(handle.name)
+        if ok:
+            handle.pending = False
+            if button is not None:
+                button.config(text=handle.name, state=tk.NORMAL)
+            print(f"插件 {handle.name} 依赖已就绪")
+        else:
+            if button is not None:
+                button.config(text=f"{handle.name} (依赖缺失)")
+            print(f"插件 {handle.name} 依赖安装失败: {error}")
+            self.show_plugin_error("插件依赖安装失败", f"{handle.name}: {error}")
+
+    @traced("import_plugin_module")
+    def import_plugin_module(self, plugin_path):
+        """导入插件模块."""
+        plugin_name = os.path.basename(plugin_path)[:-3]
+        # 尝试使用 importlib.util，代码对象从字节码缓存加载
+        if hasattr(importlib, 'util'):
+            spec = self.bytecode_cache.spec_from_file_location(plugin_name, plugin_path)
+            plugin_module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(plugin_module)
+        else:
+            # 如果 importlib.util 不可用，则使用 importlib.import_module 模块
+            # 需要将文件所在目录添加到 sys.path
+            plugin_dir = os.path.dirname(plugin_path)
+            sys.path.insert(0, plugin_dir)  # 临时添加到搜索路径
+            plugin_module = importlib.import_module(plugin_name)
+            sys.path.pop(0)  # 移除临时添加的搜索路径
+        return plugin_module
+
+    @traced("load_plugin")
+    def load_plugin(self, plugin_path, check_dependencies=True):
         """加载单个插件."""
         plugin_name = os.path.basename(plugin_path)[:-3]
+        if check_dependencies:
+            try:
+                requires = read_plugin_metadata(plugin_path)["requires"]
+            except Exception:
+                requires = []
+            if requires and not self.dependency_resolver.is_satisfied(requires):
+                # 依赖就绪后再导入，不阻塞界面
+                print(f"插件 {plugin_name} 等待依赖: {', '.join(requires)}")
+
+                def on_done(ok, error):
+                    if ok:
+                        with self.plugin_registry.batch():
+                            self.load_plugin(plugin_path, check_dependencies=False)
+                    else:
+                        self.show_plugin_error("插件依赖安装失败", f"{plugin_name}: {error}")
+
+                self.dependency_resolver.resolve(requires, on_done)
+                return
         try:
-            # 尝试使用 importlib.util
-            if hasattr(importlib, 'util'):
-                spec = importlib.util.spec_from_file_location(plugin_name, plugin_path)
-                plugin_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(plugin_module)
-            else:
-                # 如果 importlib.util 不可用，则使用 importlib.import_module 模块
-                # 需要将文件所在目录添加到 sys.path
-                plugin_dir = os.path.dirname(plugin_path)
-                sys.path.insert(0, plugin_dir)  # 临时添加到搜索路径
-                plugin_module = importlib.import_module(plugin_name)
-                sys.path.pop(0)  # 移除临时添加的搜索路径
+            start = time.perf_counter()
+            plugin_module = self.import_plugin_module(plugin_path)
+            self.plugin_import_times[os.path.basename(plugin_path)] = time.perf_counter() - start
+            self.update_plugin_timing()
 
             # 注册插件
             self.register_plugin(plugin_module, plugin_path)
             print(f"插件 {plugin_name} 加载成功")
         except Exception as e:
             print(f"加载插件 {plugin_name} 失败: {e}")
-            messagebox.showerror("加载插件失败", f"无法加载插件 {plugin_name}: {e}")
-
+            self.show_plugin_error("加载插件失败", f"无法加载插件 {plugin_name}: {e}")
+
+    def add_plugin_handle(self, handle):
+        """根据索引添加尚未导入的插件."""
+        self.plugin_registry.add(handle)
+        self.create_plugin_button(handle)
+        self.no_plugins_label.destroy()
+
+    def ensure_plugin_loaded(self, handle):
+        """首次使用时导入并注册插件."""
+        if handle.module is None:
+            current_hash = file_hash(handle.path)
+            start = time.perf_counter()
+            plugin_module = self.import_plugin_module(handle.path)
+            self.plugin_import_times[handle.filename] = time.perf_counter() - start
+            self.update_plugin_timing()
+            declared = [probe["name"] for probe in handle.probes]
+            handle.probes = self.call_plugin_register(plugin_module, handle.filename)
+            registered = [probe["name"] for probe in handle.probes]
+            for name in declared:
+                if name not in registered:
+                    self.probe_registry.unregister(name)  # 插件已不再注册的验证项占位
+            handle.module = plugin_module
+            handle.file_hash = current_hash
+            handle.has_gui = hasattr(plugin_module, 'gui')
+            handle.requires = list(getattr(plugin_module, 'requires', []))
+            if plugin_module.name != handle.name:
+                old_name, handle.name = handle.name, plugin_module.name
+                self.plugin_registry.rename(handle, old_name)
+                if old_name in self.plugin_buttons:
+                    self.plugin_buttons[handle.name] = self.plugin_buttons.pop(old_name)
+                    self.plugin_launch_buttons[handle.name] = self.plugin_launch_buttons.pop(old_name)
+            self.plugin_index.update(handle)
+            self.plugin_index.save()
+            print(f"插件 {handle.name} 注册成功")
+        return handle.module
+
+    def register_probe_stubs(self, handle):
+        """
+        按索引中的声明为尚未导入的插件注册验证项占位.
+        占位第一次执行时才导入插件，插件的 register() 用真正的验证项替换占位。
+        """
+        for declaration in handle.probes:
+            name = declaration["name"]
+            self.probe_registry.register(
+                name, lambda context, name=name: self.run_probe_stub(handle, name, context),
+                declaration.get("label"), declaration.get("config_keys", ()),
+                declaration.get("timeout", 10), declaration.get("cost", "spawn"))
+
+    def run_probe_stub(self, handle, name, context):
+        """在验证线程中执行占位: 等 Tk 线程导入插件后执行插件注册的验证函数."""
+        stub = self.probe_registry.get(name)
+        loaded = threading.Event()
+        errors = []
+
+        def load():
+            try:
+                if self.plugin_registry.find_by_filename(handle.filename) is not handle:
+                    raise RuntimeError(f"插件 {handle.name} 已被移除")
+                self.ensure_plugin_loaded(handle)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                loaded.set()
+
+        self.task_scheduler.call_soon(load)
+        while not loaded.wait(0.05):
+            context.raise_if_cancelled()
+        if errors:
+            raise errors[0]
+        probe = self.probe_registry.get(name)
+        if probe is None or probe is stub:
+            self.probe_registry.unregister(name)
+            raise RuntimeError(f"插件 {handle.name} 没有注册验证项 {name}")
+        return probe.fn(context)
+
+    def call_plugin_register(self, plugin_module, plugin_filename):
+        """调用插件的 register()，返回插件注册的验证项声明 (记录到索引中)."""
+        # 先取消同一模块旧版本的订阅
+        self.plugin_api.drop_subscriptions(plugin_module.__name__)
+        with span(f"register {plugin_filename}", "plugin"), self.plugin_api.recording_probes() as probes:
+            plugin_module.register(self.plugin_api)  # 传递 plugin_api 实例
+        return probes
+
+    @traced("register_plugin")
     def register_plugin(self, plugin, plugin_path):
         """注册插件."""
         try:
@@ -235,36 +690,41 @@ class EnvConfigurator:
             # 获取插件文件名
             plugin_filename = os.path.basename(plugin_path)
 
+            dest_path = os.path.join(self.plugins_dir, plugin_filename)
+            is_installed_file = os.path.normcase(os.path.abspath(plugin_path)) == os.path.normcase(os.path.abspath(dest_path))
+
             # 检测同名插件
-            existing_plugin = self.find_plugin_by_name(plugin_name)
+            existing_plugin = self.plugin_registry.find_by_name(plugin_name)
             print(f"existing_plugin: {existing_plugin}")
             if (existing_plugin):
                 print(f"发现同名插件 {plugin_name}，将替换旧插件")
-                # 删除旧插件
-                self.remove_plugin(existing_plugin)
+                # 删除旧插件 (新插件就是插件目录中的同一文件时保留文件)
+                self.remove_plugin(existing_plugin, delete_file=not (is_installed_file and existing_plugin.filename == plugin_filename))
 
             # 插件必须有一个 register 函数
-            plugin.register(self.plugin_api)  # 传递 plugin_api 实例
-            self.plugins.append(plugin)
-            print(f"插件 {plugin_name} 注册成功")
+            probes = self.call_plugin_register(plugin, plugin_filename)
 
-            # 复制插件到插件目录
-            dest_path = os.path.join(self.plugins_dir, plugin_filename)
-            if not os.path.exists(dest_path):
+            # 复制插件到插件目录，内容相同时跳过
+            source_hash = file_hash(plugin_path)
+            if not is_installed_file and (not os.path.exists(dest_path) or file_hash(dest_path) != source_hash):
                 shutil.copy(plugin_path, dest_path)
 
-            # 更新 plugins.json 文件
-            self.update_plugins_json(plugin_filename)
+            # 登记到注册表，plugins.json 在批处理结束时写入
+            handle = PluginHandle(plugin_name, dest_path, source_hash, hasattr(plugin, 'gui'), plugin,
+                                  requires=getattr(plugin, 'requires', []), probes=probes)
+            self.plugin_registry.add(handle)
+            self.plugin_index.update(handle)
+            print(f"插件 {plugin_name} 注册成功")
 
             # 创建插件按钮
-            self.create_plugin_button(plugin)
+            self.create_plugin_button(handle)
 
             # 移除“暂无插件”标签
             self.no_plugins_label.destroy()
 
         except Exception as e:
             print(f"注册插件 {plugin.__name__} 失败: {e}")
-            messagebox.showerror("注册插件失败", f"无法注册插件: {e}")
+            self.show_plugin_error("注册插件失败", f"无法注册插件: {e}")
 
     def create_plugin_button(self, plugin):
         """创建插件按钮。"""
@@ -273,10 +733,12 @@ class EnvConfigurator:
 
         plugin_button = ttk.Button(
             button_frame,
-            text=plugin.name,
+            text=f"{plugin.name} (等待依赖)" if plugin.pending else plugin.name,
             command=lambda: self.show_plugin_gui(plugin)
         )
         plugin_button.pack(side=tk.LEFT, padx=2)
+        if plugin.pending:
+            plugin_button.config(state=tk.DISABLED)
 
         remove_button = ttk.Button(
             button_frame,
@@ -287,10 +749,15 @@ class EnvConfigurator:
 
         # 保存按钮引用
         self.plugin_buttons[plugin.name] = button_frame
+        self.plugin_launch_buttons[plugin.name] = plugin_button
 
-    def show_plugin_gui(self, plugin):
+    def show_plugin_gui(self, handle):
         """显示插件 GUI 界面。"""
+        if handle.pending:
+            messagebox.showinfo("提示", f"插件 {handle.name} 的依赖尚未就绪")
+            return
         try:
+            plugin = self.ensure_plugin_loaded(handle)
             # 插件必须有一个 gui 函数
             if hasattr(plugin, 'gui'):
                 plugin_window = tk.Toplevel(self.master)
@@ -308,74 +775,55 @@ class EnvConfigurator:
             else:
                 messagebox.showinfo("提示", "该插件没有 GUI 界面")
         except Exception as e:
-            print(f"显示插件 {plugin.name} GUI 失败: {e}")
-            messagebox.showerror("错误", f"无法显示插件 {plugin.name} GUI: {e}")
-
-    def update_plugins_json(self, plugin_name):
-        """更新 plugins.json 文件。"""
-        if os.path.exists(self.plugins_json):
-            try:
-                with open(self.plugins_json, "r") as f:
-                    plugin_files = json.load(f)
-            except Exception as e:
-                print(f"加载 plugins.json 失败: {e}")
-                plugin_files = []
-        else:
-            plugin_files = []
-
-        if plugin_name not in plugin_files:
-            plugin_files.append(plugin_name)
-
-        try:
-            with open(self.plugins_json, "w") as f:
-                json.dump(plugin_files, f, indent=4)
-            print("plugins.json 更新成功")
-        except Exception as e:
-            print(f"更新 plugins.json 失败: {e}")
+            print(f"显示插件 {handle.name} GUI 失败: {e}")
+            messagebox.showerror("错误", f"无法显示插件 {handle.name} GUI: {e}")
 
     def clear_plugin_buttons(self):
         """清空插件按钮区域。"""
         for button_frame in self.plugin_buttons.values():
             button_frame.destroy()
         self.plugin_buttons.clear()
+        self.plugin_launch_buttons.clear()
         
         if hasattr(self, 'no_plugins_label'):
             self.no_plugins_label.destroy()
 
     def find_plugin_by_name(self, plugin_name):
         """根据插件名称查找插件。"""
-        for plugin in self.plugins:
-            if plugin.name == plugin_name:
-                return plugin
-        return None
+        return self.plugin_registry.find_by_name(plugin_name)
 
-    def remove_plugin(self, plugin):
+    def remove_plugin(self, plugin, delete_file=True):
         """移除插件。"""
         try:
             plugin_name = plugin.name
-            plugin_filename = os.path.basename(plugin.__file__)
+            plugin_filename = plugin.filename
             plugin_path = os.path.join(self.plugins_dir, plugin_filename)
 
-            # 从列表中移除插件
-            self.plugins.remove(plugin)
+            # 从注册表中移除插件 (同时移除 plugins.json 和索引条目)
+            with self.plugin_registry.batch():
+                self.plugin_registry.remove(plugin)
 
             # 从文件系统中删除插件文件
-            if os.path.exists(plugin_path):
+            if delete_file and os.path.exists(plugin_path):
                 try:
                     os.remove(plugin_path)
                 except PermissionError:
                     print(f"无法删除插件文件 {plugin_path}，将在应用重启后删除")
 
-            # 更新 plugins.json
-            self.remove_plugin_from_json(plugin_filename)
+            self.plugin_import_times.pop(plugin_filename, None)
+            self.update_plugin_timing()
+            self.plugin_api.drop_subscriptions(plugin_filename[:-3])
+            for probe in plugin.probes:
+                self.probe_registry.unregister(probe["name"])
 
             # 删除插件按钮
             if plugin_name in self.plugin_buttons:
                 self.plugin_buttons[plugin_name].destroy()
                 del self.plugin_buttons[plugin_name]
+                self.plugin_launch_buttons.pop(plugin_name, None)
 
             # 如果没有插件了，显示"暂无插件"标签
-            if not self.plugins:
+            if not len(self.plugin_registry):
                 self.no_plugins_label = ttk.Label(self.plugin_button_frame, text="暂无插件")
                 self.no_plugins_label.pack(padx=5, pady=5)
 
@@ -385,29 +833,22 @@ class EnvConfigurator:
             print(f"移除插件 {plugin.name} 失败: {e}")
             messagebox.showerror("移除插件失败", f"无法移除插件 {plugin.name}: {e}")
 
-    def remove_plugin_from_json(self, plugin_name):
-        """从 plugins.json 文件中移除插件。"""
-        try:
-            # 读取 plugins.json 文件
-            with open(self.plugins_json, "r") as f:
-                plugin_files = json.load(f)
-
-            # 移除插件
-            plugin_files = [f for f in plugin_files if f != plugin_name]
-
-            # 写入 plugins.json 文件
-            with open(self.plugins_json, "w") as f:
-                json.dump(plugin_files, f, indent=4)
-
-            print("plugins.json 更新成功")
-        except Exception as e:
-            print(f"更新 plugins.json 失败: {e}")
-
     def confirm_remove_plugin(self, plugin):
         """确认是否移除插件。"""
         if messagebox.askokcancel("确认", f"确定要移除插件 {plugin.name} 吗？"):
             self.remove_plugin(plugin)
 
-root = tk.Tk()
-app = EnvConfigurator(root)
-root.mainloop()
+if __name__ == "__main__":
+    # --trace 文件: 记录启动过程，退出时写入 Chrome trace JSON (也可设置环境变量 SYSTOOLS_TRACE)
+    if "--trace" in sys.argv[1:-1]:
+        tracer.enable(sys.argv[sys.argv.index("--trace") + 1])
+    with span("tk.Tk"):
+        root = tk.Tk()
+    app = EnvConfigurator(root, instance)
+    root.after_idle(tracer.instant, "first idle")
+    if instance_request["action"] != "show":
+        root.after_idle(app.handle_instance_request, instance_request)
+    restart_started = os.environ.pop(RESTART_ENV, None)
+    if restart_started:
+        root.after_idle(app.record_respawn_latency, float(restart_started))
+    root.mainloop()
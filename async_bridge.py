@@ -0,0 +1,185 @@
+import os
+import json
+import asyncio
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncBridge:
+    """与 Tk 主循环并行运行的 asyncio 事件循环.
+
+    事件循环运行在独立的守护线程中，协程通过 submit 提交，
+    完成回调经 TaskScheduler 的队列回到 Tk 线程；协程内部可以
+    await ui(fn, ...) 在 Tk 线程中执行函数并取得返回值。
+    http_get/download 等阻塞 I/O 在事件循环专用的线程池 (io_workers 个线程) 中执行，
+    不受默认线程池 min(32, CPU 数 + 4) 的限制。
+    """
+
+    def __init__(self, scheduler, io_workers=32):
+        self.scheduler = scheduler
+        self.loop = asyncio.new_event_loop()
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="asyncio-io")
+        self.loop.set_default_executor(self.io_executor)  # run_in_executor(None, ...) 使用此线程池
+        self._thread = threading.Thread(target=self._run, name="asyncio-loop", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_done=None, on_error=None):
+        """
+        在事件循环中执行协程.
+        on_done/on_error 在 Tk 线程中调用；返回 concurrent.futures.Future，可调用 cancel()。
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def done(f):
+            if f.cancelled():
+                if on_error is not None:
+                    self.scheduler.call_soon(on_error, asyncio.CancelledError())
+                return
+            error = f.exception()
+            if error is not None:
+                if on_error is not None:
+                    self.scheduler.call_soon(on_error, error)
+                else:
+                    print(f"异步任务失败: {error}")
+            elif on_done is not None:
+                self.scheduler.call_soon(on_done, f.result())
+
+        future.add_done_callback(done)
+        return future
+
+    async def ui(self, fn, *args):
+        """在 Tk 线程中执行 fn(*args)，返回其结果 (在协程中 await)."""
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
+
+        def run():
+            try:
+                value = fn(*args)
+            except BaseException as e:
+                loop.call_soon_threadsafe(_set_future, result, None, e)
+            else:
+                loop.call_soon_threadsafe(_set_future, result, value, None)
+
+        self.scheduler.call_soon(run)
+        return await result
+
+    def shutdown(self):
+        """停止事件循环."""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1)
+        self.io_executor.shutdown(wait=False)
+
+
+def _set_future(future, value, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+
+
+class HttpResponse:
+    """http_get 的响应."""
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self, encoding="utf-8"):
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise IOError(f"HTTP {self.status}: {self.url}")
+
+
+def _urlopen(url, timeout):
+    """用 urllib 打开 URL (阻塞)，每次新建 opener 以使用当前的 HTTP(S)_PROXY 或系统代理设置."""
+    request = urllib.request.Request(url, headers={"User-Agent": "systools"})
+    return urllib.request.build_opener().open(request, timeout=timeout)
+
+
+async def http_get(url, timeout=30):
+    """异步 GET 请求 (urllib 在线程池中执行，支持重定向和代理)，返回 HttpResponse."""
+    def get():
+        try:
+            with _urlopen(url, timeout) as response:
+                return HttpResponse(response.geturl(), response.status,
+                                    {k.lower(): v for k, v in response.headers.items()}, response.read())
+        except urllib.error.HTTPError as e:
+            with e:
+                return HttpResponse(e.geturl() or url, e.code, {k.lower(): v for k, v in e.headers.items()}, e.read())
+    return await asyncio.get_running_loop().run_in_executor(None, get)
+
+
+async def download(url, dest_path, progress=None, timeout=30, chunk_size=65536):
+    """
+    异步下载文件到 dest_path，返回写入的字节数.
+    下载和写文件在线程池中执行；progress(downloaded, total) 在事件循环线程中调用，total 未知时为 0。
+    HTTP 错误抛出 urllib.error.HTTPError (IOError 的子类)。
+    """
+    loop = asyncio.get_running_loop()
+    cancelled = threading.Event()
+
+    def fetch():
+        downloaded = 0
+        with _urlopen(url, timeout) as response, open(dest_path, "wb") as f:
+            total = int(response.headers.get("Content-Length") or 0)
+            while not cancelled.is_set():
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                f.write(chunk)
+                downloaded += len(chunk)
+                if progress is not None:
+                    loop.call_soon_threadsafe(progress, downloaded, total)
+        return downloaded
+
+    try:
+        return await loop.run_in_executor(None, fetch)
+    except asyncio.CancelledError:
+        cancelled.set()  # 让线程池中的下载尽快停止
+        raise
+
+
+async def run_process(*command, timeout=None):
+    """异步执行命令，返回 (returncode, stdout, stderr)."""
+    kwargs = {"creationflags": 0x08000000} if os.name == 'nt' else {}  # CREATE_NO_WINDOW
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **kwargs)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+async def read_file(path, mode="rb"):
+    """在线程池中读取文件，不阻塞事件循环."""
+    def read():
+        with open(path, mode) as f:
+            return f.read()
+    return await asyncio.get_running_loop().run_in_executor(None, read)
+
+
+async def write_file(path, data, mode="wb"):
+    """在线程池中写入文件，不阻塞事件循环."""
+    def write():
+        with open(path, mode) as f:
+            f.write(data)
+    await asyncio.get_running_loop().run_in_executor(None, write)
@@ -0,0 +1,291 @@
+"""
+无界面命令行入口，不导入 Tk、PIL 和 win32 模块.
+
+用法:
+    python -m cli validate [--json] [--timeout 秒]
+    python -m cli config get [键] / config set 键 值
+    python -m cli path list|add|remove [目录...] [--system] [--front]
+    python -m cli backup [create|list|show 编号|diff 旧 新|prune]
+    python -m cli plugins list [--json]
+
+每个子命令只导入自己需要的模块。
+"""
+import os
+import sys
+import json
+import argparse
+
+from config_store import CONFIG_DIR, DEFAULT_CONFIG
+
+
+class HeadlessApp:
+    """供 PluginAPI 使用的最小应用对象 (没有 Tk 窗口)."""
+
+    def __init__(self, config_dir):
+        from config_store import ConfigStore
+        self.master = None
+        self.config_dir = config_dir
+        self.config_file = os.path.join(config_dir, "config.json")
+        self.config_store = ConfigStore(self.config_file, DEFAULT_CONFIG)
+        self.config = self.config_store.load(copy=True)
+
+    def get_config(self, key=None):
+        config = self.config_store.load(copy=True)
+        return config if key is None else config.get(key)
+
+    def save_config(self):
+        self.config_store.save(self.config)
+
+    def close(self):
+        self.config_store.flush()
+
+
+class Dispatcher:
+    """代替 TaskScheduler 的回调队列，在主线程中执行回调."""
+
+    def __init__(self):
+        import queue
+        self._callbacks = queue.Queue()
+
+    def call_soon(self, fn, *args):
+        self._callbacks.put((fn, args))
+
+    def run_until(self, done):
+        while not done():
+            fn, args = self._callbacks.get()
+            fn(*args)
+
+
+def output(args, data, text):
+    """按 --json 输出 JSON 或文本."""
+    if getattr(args, "json", False):
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(text)
+
+
+def cmd_validate(args):
+    from probe_registry import ProbeRegistry
+    from version_probe import ProbeCache, register_toolchain_probes
+
+    app = HeadlessApp(args.config_dir)
+    dispatcher = Dispatcher()
+    registry = ProbeRegistry(dispatcher)
+    cache = ProbeCache(os.path.join(args.config_dir, "cache", "versions.json"))
+    register_toolchain_probes(registry, cache, args.timeout)
+
+    report = {}
+    probe_run = registry.run(app.config, args.names or None)
+    dispatcher.run_until(lambda: probe_run.done)
+    registry.shutdown()
+    for name, (result, error, duration, cached) in probe_run.results.items():
+        entry = {"ok": error is None, "duration": round(duration, 4)}
+        if error is None:
+            entry["version"], entry["source"], entry["executable"] = result
+        else:
+            entry["error"] = f"{type(error).__name__}: {error}"
+        report[name] = entry
+
+    lines = []
+    for name, entry in report.items():
+        if entry["ok"]:
+            lines.append(f"{name}: {entry['version']} ({entry['executable']}, {entry['source']}, {entry['duration']:.2f}s)")
+        else:
+            lines.append(f"{name}: 失败 - {entry['error']}")
+    output(args, report, "\n".join(lines))
+    return 0 if all(entry["ok"] for entry in report.values()) else 1
+
+
+def parse_value(value):
+    """配置值按 JSON 解析，无法解析时作为字符串."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def cmd_config(args):
+    app = HeadlessApp(args.config_dir)
+    if args.action == "get":
+        value = app.config if args.key is None else app.config.get(args.key)
+        print(json.dumps(value, ensure_ascii=False, indent=2))
+        return 0 if args.key is None or args.key in app.config else 1
+    app.config[args.key] = parse_value(args.value)
+    app.save_config()
+    app.close()
+    return 0
+
+
+def cmd_path(args):
+    app = HeadlessApp(args.config_dir)
+    if args.action == "list":
+        # 只读取 PATH，不创建 PluginAPI (Windows 上会创建广播器并导入 win32gui)
+        from env_store import create_env_store
+        from path_list import PathList
+
+        store = create_env_store(app.config.get("env_store"), args.config_dir)
+        try:
+            paths = PathList(store.get('PATH', args.system) or '', store.path_sep,
+                             lambda name: store.get(name, args.system) or os.environ.get(name))
+            output(args, list(paths), "\n".join(paths))
+        finally:
+            store.close()
+            app.close()
+        return 0
+    if not args.entries:
+        app.close()
+        print("请指定目录")
+        return 2
+
+    from plugin_api import PluginAPI
+
+    api = PluginAPI(app)
+    try:
+        if args.action == "add":
+            ok = api.insert_into_path(args.entries, args.system, front=args.front)
+        else:
+            ok = api.remove_from_path(args.entries, args.system)
+        return 0 if ok else 1
+    finally:
+        api.shutdown()
+        app.close()
+
+
+def format_time(timestamp):
+    import time
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def cmd_backup(args):
+    from env_store import backup_env_vars, create_env_store, snapshot_store
+
+    if args.action == "create":
+        app = HeadlessApp(args.config_dir)
+        store = create_env_store(app.config.get("env_store"), args.config_dir) if os.name == 'nt' else None
+        try:
+            result = backup_env_vars(args.config_dir, store, label=args.label)
+        finally:
+            if store is not None:
+                store.close()
+        text = (f"环境变量已备份为快照 #{result['id']} ({result['changes']} 项变化)" if result["created"]
+                else f"环境变量与快照 #{result['id']} 相同，无需备份")
+        output(args, result, text)
+        return 0
+
+    snapshots = snapshot_store(args.config_dir)
+    head = snapshots.head()
+    if head is None:
+        print("没有快照")
+        return 1
+    try:
+        ids = [int(value) for value in args.ids]
+        if args.action == "list":
+            items = snapshots.list()
+            output(args, items, "\n".join(
+                f"#{item['id']}\t{format_time(item['time'])}\t{item['changes']} 项变化\t{item['label']}".rstrip()
+                for item in items))
+        elif args.action == "show":
+            variables = snapshots.load(ids[0] if ids else head["id"])
+            output(args, variables, "\n".join(
+                f"[{scope}] {name}={value}" for scope, values in variables.items() for name, value in sorted(values.items())))
+        elif args.action == "diff":
+            # 默认比较最新快照和它的上一个快照
+            new_id = ids[1] if len(ids) > 1 else head["id"]
+            old_id = ids[0] if ids else snapshots.list()[-2]["id"] if len(snapshots) > 1 else new_id
+            diff = snapshots.diff(old_id, new_id, values=True)
+            lines = []
+            for scope, kinds in diff.items():
+                for kind, sign in (("added", "+"), ("removed", "-"), ("changed", "~")):
+                    for name, (before, after) in kinds[kind].items():
+                        lines.append(f"{sign} [{scope}] {name}: {before!r} -> {after!r}" if kind == "changed"
+                                     else f"{sign} [{scope}] {name}={after if kind == 'added' else before}")
+            output(args, diff, "\n".join(lines) or f"快照 #{old_id} 和 #{new_id} 相同")
+        else:
+            from env_snapshots import DEFAULT_RETENTION
+            result = snapshots.prune(**DEFAULT_RETENTION)
+            output(args, result, f"删除 {result['snapshots_removed']} 个快照，{result['blobs_removed']} 个不再使用的值")
+    except (KeyError, ValueError) as e:
+        print(f"快照不存在或编号无效: {e}")
+        return 1
+    return 0
+
+
+def cmd_plugins(args):
+    from plugin_index import PluginIndex
+    from plugin_registry import PluginRegistry
+
+    index = PluginIndex(os.path.join(args.config_dir, "plugins_index.json")).load()
+    registry = PluginRegistry(os.path.join(args.config_dir, "plugins.json"), index).load()
+    plugins_dir = os.path.join(args.config_dir, "plugins")
+    plugins = []
+    for filename in registry.filenames:
+        path = os.path.join(plugins_dir, filename)
+        if not os.path.exists(path):
+            continue
+        handle = index.lookup(path)
+        if handle is not None:
+            name, has_gui, requires = handle.name, handle.has_gui, handle.requires
+        else:
+            # 索引中没有或文件已变化，从源码读取 (不导入插件)
+            from plugin_deps import read_plugin_metadata
+            try:
+                metadata = read_plugin_metadata(path)
+            except Exception as e:
+                print(f"读取插件 {filename} 失败: {e}")
+                continue
+            name, has_gui, requires = metadata["name"] or filename[:-3], metadata["has_gui"], metadata["requires"]
+        plugins.append({"name": name, "file": path, "has_gui": has_gui, "requires": list(requires)})
+    output(args, plugins, "\n".join(f"{p['name']}\t{p['file']}" for p in plugins))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="环境配置工具命令行模式")
+    parser.add_argument("--config-dir", default=CONFIG_DIR, help="配置目录 (默认 ~/.systools)")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    validate = commands.add_parser("validate", help="并行验证工具链")
+    validate.add_argument("names", nargs="*", help="只验证指定项目")
+    validate.add_argument("--json", action="store_true")
+    validate.add_argument("--timeout", type=float, default=10)
+    validate.set_defaults(func=cmd_validate)
+
+    config = commands.add_parser("config", help="读取或修改配置")
+    config.add_argument("action", choices=["get", "set"])
+    config.add_argument("key", nargs="?")
+    config.add_argument("value", nargs="?")
+    config.set_defaults(func=cmd_config)
+
+    path = commands.add_parser("path", help="查看或修改 PATH")
+    path.add_argument("action", choices=["list", "add", "remove"])
+    path.add_argument("entries", nargs="*")
+    path.add_argument("--system", action="store_true", help="修改系统环境变量")
+    path.add_argument("--front", action="store_true", help="加到最前面")
+    path.add_argument("--json", action="store_true")
+    path.set_defaults(func=cmd_path)
+
+    backup = commands.add_parser("backup", help="备份环境变量或查看快照")
+    backup.add_argument("action", nargs="?", default="create", choices=["create", "list", "show", "diff", "prune"])
+    backup.add_argument("ids", nargs="*", help="快照编号 (show: 编号，diff: 旧 新)")
+    backup.add_argument("--label", default="", help="快照说明")
+    backup.add_argument("--json", action="store_true")
+    backup.set_defaults(func=cmd_backup)
+
+    plugins = commands.add_parser("plugins", help="列出已安装的插件 (不导入插件)")
+    plugins.add_argument("action", choices=["list"])
+    plugins.add_argument("--json", action="store_true")
+    plugins.set_defaults(func=cmd_plugins)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "config" and args.action == "set" and (args.key is None or args.value is None):
+        print("用法: config set 键 值")
+        return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import os
+import json
+import atexit
+import tempfile
+import threading
+
+# 配置文件目录和默认配置
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".systools")
+DEFAULT_CONFIG = {
+    "node_path": "",
+    "java_path": ""
+}
+
+
+_MISSING = object()
+
+
+def _copy_json(value):
+    """复制 JSON 数据，比 copy.deepcopy 快得多."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def write_json_atomic(path, data):
+    """先写临时文件再 os.replace，避免崩溃时留下被截断的文件."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigStore:
+    """config.json 的内存缓存和延迟写入层.
+
+    读取仅在文件变化时重新解析；写入先记录在内存中，
+    在防抖窗口 (delay 秒) 内合并为一次原子写入。
+    """
+
+    def __init__(self, config_file, default_config, delay=0.5):
+        self.config_file = config_file
+        self.default_config = default_config
+        self.delay = delay
+        self._data = None
+        self._signature = None
+        self._pending = None
+        self._timer = None
+        self._lock = threading.RLock()
+        # 由文件监视器负责发现外部修改时为 True，读取时不再检查文件状态
+        self.watched = False
+        self.load_error = None  # 最近一次解析配置文件的错误
+        self.conflicts = []  # 最近一次合并时两边都修改过的配置项
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.coalesced = 0
+        # 退出时写入尚未落盘的配置
+        atexit.register(self.flush)
+
+    def _stat_signature(self):
+        """返回文件的 (mtime, size, inode)，文件不存在时返回 None."""
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def load(self, copy=False):
+        """
+        读取配置，文件未变化 (或受监视且未收到变化通知) 时直接返回缓存.
+        返回的字典与缓存共享，调用方不能修改；需要修改时传入 copy=True 取得副本。
+        """
+        with self._lock:
+            if self._pending is not None:
+                self.hits += 1
+                return _copy_json(self._pending) if copy else self._pending
+            if self._data is not None and self.watched:
+                self.hits += 1
+                return _copy_json(self._data) if copy else self._data
+            signature = self._stat_signature()
+            if self._data is not None and signature is not None and signature == self._signature:
+                self.hits += 1
+                return _copy_json(self._data) if copy else self._data
+
+            self.misses += 1
+            config_dir = os.path.dirname(self.config_file)
+            if not os.path.exists(config_dir):
+                os.makedirs(config_dir)
+            if signature is None:
+                write_json_atomic(self.config_file, self.default_config)
+                self._remember(self.default_config)
+                return _copy_json(self._data) if copy else self._data
+            try:
+                with open(self.config_file, "r") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"加载配置文件失败: {e}, 使用默认配置")
+                self.invalidate()
+                self.load_error = e
+                return _copy_json(self.default_config)
+            self.load_error = None
+            self._data = data
+            self._signature = signature
+            return _copy_json(data) if copy else data
+
+    def reload(self):
+        """
+        文件监视器报告 config.json 变化后调用，重新读取文件.
+        有尚未落盘的修改时与外部修改合并，而不是在下次写入时覆盖外部修改。
+        Returns: 最新配置的副本，文件无法解析 (可能正在被写入) 时返回 None
+        """
+        with self._lock:
+            if self._pending is None:
+                self.invalidate()
+                config = self.load(copy=True)
+                return None if self.load_error is not None else config
+            signature = self._stat_signature()
+            if signature is not None and signature != self._signature and not self._merge_external(signature):
+                return None
+            return _copy_json(self._pending)
+
+    def _merge_external(self, signature):
+        """
+        文件在本进程上次读取或写入之后被外部修改，把外部修改合并到未落盘的配置中.
+        只有一方修改的配置项采用修改后的值；两边都改成不同值的项保留本进程的值，
+        记录在 conflicts 中并输出提示。文件无法解析时返回 False。
+        """
+        try:
+            with open(self.config_file, "r") as f:
+                external = json.load(f)
+        except Exception as e:
+            print(f"读取外部修改的配置文件失败: {e}")
+            self.load_error = e
+            return False
+        self.load_error = None
+        base = self._data or {}
+        merged, conflicts = {}, []
+        for key in list(self._pending) + [key for key in external if key not in self._pending]:
+            original, ours, theirs = base.get(key, _MISSING), self._pending.get(key, _MISSING), external.get(key, _MISSING)
+            if ours == original:
+                value = theirs
+            else:
+                value = ours
+                if theirs != original and theirs != ours:
+                    conflicts.append(key)
+            if value is not _MISSING:
+                merged[key] = value
+        if conflicts:
+            print(f"配置文件被外部修改，以下配置项与未保存的修改冲突，保留本程序的值: {', '.join(conflicts)}")
+        self.conflicts = conflicts
+        self._pending = merged
+        self._data = external
+        self._signature = signature
+        return True
+
+    def save(self, config):
+        """记录待写入的配置，防抖窗口结束后统一写盘."""
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = _copy_json(config)
+            if self.delay <= 0:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """立即写入尚未落盘的配置."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending is None:
+                return
+            signature = self._stat_signature()
+            if signature is not None and signature != self._signature:
+                self._merge_external(signature)  # 避免覆盖外部修改
+            config = self._pending
+            try:
+                write_json_atomic(self.config_file, config)
+            except Exception as e:
+                print(f"保存配置文件失败: {e}")
+                return
+            self._pending = None
+            self.writes += 1
+            self._data = config  # _pending 是 save() 时复制的，不与调用方共享
+            self._signature = self._stat_signature()
+            print("配置文件保存成功")
+
+    def _remember(self, config):
+        self._data = _copy_json(config)
+        self._signature = self._stat_signature()
+
+    def invalidate(self):
+        """丢弃缓存，下次读取时强制重新加载."""
+        with self._lock:
+            self._data = None
+            self._signature = None
+
+    def stats(self):
+        """返回缓存命中和写入统计."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+        }
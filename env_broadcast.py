@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+
+from lazy_import import lazy_module
+
+win32con = lazy_module("win32con")
+win32gui = lazy_module("win32gui")
+
+
+class Win32Broadcaster:
+    """通过 SendMessageTimeout 广播 WM_SETTINGCHANGE，挂起的窗口会被跳过."""
+
+    def __init__(self, timeout_ms=5000):
+        self._send = win32gui.SendMessageTimeout  # 未安装 pywin32 时在这里抛出 ImportError
+        self.timeout_ms = timeout_ms
+
+    def broadcast(self):
+        self._send(
+            win32con.HWND_BROADCAST,
+            win32con.WM_SETTINGCHANGE,
+            0,
+            'Environment',
+            win32con.SMTO_ABORTIFHUNG,
+            self.timeout_ms
+        )
+
+
+class RecordingBroadcaster:
+    """只记录广播次数的广播器，用于非 Windows 系统和测试，可模拟广播耗时."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def broadcast(self):
+        if self.delay:
+            time.sleep(self.delay)
+        self.calls += 1
+
+
+def default_broadcaster():
+    if os.name == 'nt':
+        try:
+            return Win32Broadcaster()
+        except ImportError:
+            pass
+    return RecordingBroadcaster()
+
+
+class BroadcastCoalescer:
+    """合并环境变量变更通知.
+
+    request() 立即返回；工作线程在 delay 秒的合并窗口结束后只广播一次，
+    因此一连串的 set_env_var/append_to_path 只会产生一次广播，
+    而且不会阻塞 Tk 线程。
+    """
+
+    def __init__(self, broadcaster=None, delay=0.2):
+        self.broadcaster = broadcaster or default_broadcaster()
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._pending_since = None  # 第一个尚未广播的请求时间
+        self._busy = False
+        self._thread = None
+        self.requests = 0
+        self.broadcasts = 0
+        self.last_latency = None  # 从请求到广播完成的耗时
+        self.max_latency = 0.0
+        self.last_duration = None  # 广播调用本身的耗时
+
+    def set_broadcaster(self, broadcaster):
+        """替换广播器，例如在测试中使用 RecordingBroadcaster."""
+        with self._condition:
+            self.broadcaster = broadcaster
+
+    def request(self):
+        """请求一次广播，立即返回."""
+        with self._condition:
+            self.requests += 1
+            if self._pending_since is None:
+                self._pending_since = time.perf_counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="env-broadcast", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending_since is None:
+                    self._condition.wait()
+                requested = self._pending_since
+            # 合并窗口内的其他请求
+            time.sleep(self.delay)
+            with self._condition:
+                self._pending_since = None
+                self._busy = True
+                broadcaster = self.broadcaster
+            start = time.perf_counter()
+            try:
+                broadcaster.broadcast()
+            except Exception as e:
+                print(f"广播环境变量更新消息失败: {str(e)}")
+            end = time.perf_counter()
+            with self._condition:
+                self._busy = False
+                self.broadcasts += 1
+                self.last_duration = end - start
+                self.last_latency = end - requested
+                self.max_latency = max(self.max_latency, self.last_latency)
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """等待尚未完成的广播，返回是否已全部完成."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._condition:
+            while self._pending_since is not None or self._busy:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stats(self):
+        """返回广播次数和延迟统计 (秒)."""
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "broadcasts": self.broadcasts,
+                "last_latency": self.last_latency,
+                "max_latency": self.max_latency,
+                "last_duration": self.last_duration,
+            }
@@ -32,6 +32,12 @@ class EnvConfigSection:
         java_create_button = ttk.Button(self.master, text="创建目录", command=lambda: self.create_directory(self.java_path.get()))
         java_create_button.grid(row=1, column=3, padx=5, pady=5)
 
+    def on_config_changed(self, changed):
+        """配置文件被外部修改后更新显示的目录."""
+        for key, variable in (("node_path", self.node_path), ("java_path", self.java_path)):
+            if key in changed:
+                variable.set(changed[key] or "")
+
     def browse_directory(self, variable):
         directory = filedialog.askdirectory()
         if directory:
@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+# 每隔多少个增量快照保存一次完整清单，限制读取快照时需要回放的增量数
+KEYFRAME_INTERVAL = 32
+# 默认保留策略: 最近 keep_last 个，最近 keep_daily 天每天最后一个，最近 keep_monthly 个月每月最后一个
+DEFAULT_RETENTION = {"keep_last": 20, "keep_daily": 30, "keep_monthly": 12}
+
+
+def value_hash(value):
+    return hashlib.sha256(value.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def manifest_digest(manifest):
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _delta(parent, manifest):
+    """返回 manifest 相对 parent 的 (set, removed)."""
+    changed, removed = {}, {}
+    for scope, entries in manifest.items():
+        base = parent.get(scope, {})
+        diff = {name: digest for name, digest in entries.items() if base.get(name) != digest}
+        if diff:
+            changed[scope] = diff
+    for scope, base in parent.items():
+        entries = manifest.get(scope, {})
+        gone = sorted(name for name in base if name not in entries)
+        if gone:
+            removed[scope] = gone
+    return changed, removed
+
+
+class EnvSnapshotStore:
+    """按内容寻址、去重的环境变量快照库.
+
+    每个快照是 {作用域: {变量名: 值的哈希}} 清单，值压缩后按哈希只保存一份 (blobs/)；
+    清单相对上一个快照只记录增量，追加到 snapshots.jsonl，每 KEYFRAME_INTERVAL 个保存一次完整清单。
+    列出快照只读日志，读取和比较快照只回放少量增量，不需要读取值。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.log_file = os.path.join(root, "snapshots.jsonl")
+        self.blob_dir = os.path.join(root, "blobs")
+        self._lock = threading.RLock()
+        self._records = None  # id -> 记录，按 id 递增
+        self._manifests = {}  # 最近解析的清单缓存
+        self._values = {}  # 最近读取的值缓存
+
+    # 日志
+
+    def _load(self):
+        if self._records is None:
+            records = {}
+            try:
+                with open(self.log_file, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # 写入中途崩溃留下的不完整行
+                        records[record["id"]] = record
+            except OSError:
+                pass
+            self._records = records
+        return self._records
+
+    def _append(self, record):
+        os.makedirs(self.root, exist_ok=True)
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self.log_file, "a+b") as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line  # 上次写入中途崩溃，最后一行没有换行，避免与新记录连在一起
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def head(self):
+        """最新的快照记录，没有快照时返回 None."""
+        with self._lock:
+            records = self._load()
+            return records[next(reversed(records))] if records else None
+
+    def list(self):
+        """返回全部快照的摘要 (从旧到新)，不读取值."""
+        with self._lock:
+            return [{"id": r["id"], "parent": r["parent"], "time": r["time"], "label": r["label"],
+                     "changes": r["changes"], "count": r["count"]} for r in self._load().values()]
+
+    # 值
+
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest[2:])
+
+    def put_value(self, value, known=()):
+        """保存值并返回哈希，已存在的值不重复写入."""
+        digest = value_hash(value)
+        if digest in known:
+            return digest
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(value.encode("utf-8", "surrogatepass")))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get_value(self, digest):
+        value = self._values.get(digest)
+        if value is None:
+            with open(self._blob_path(digest), "rb") as f:
+                value = zlib.decompress(f.read()).decode("utf-8", "surrogatepass")
+            if len(self._values) > 4096:
+                self._values.clear()
+            self._values[digest] = value
+        return value
+
+    # 快照
+
+    def manifest(self, snapshot_id):
+        """返回快照的清单 {作用域: {变量名: 哈希}}，不要修改返回值."""
+        with self._lock:
+            records = self._load()
+            chain = []
+            sid = snapshot_id
+            while True:
+                if sid in self._manifests:
+                    base = self._manifests[sid]
+                    break
+                record = records.get(sid)
+                if record is None:
+                    raise KeyError(f"快照不存在: {snapshot_id}")
+                chain.append(record)
+                if record["full"]:
+                    base = {}
+                    break
+                sid = record["parent"]
+            manifest = {scope: dict(entries) for scope, entries in base.items()}
+            for record in reversed(chain):
+                for scope, names in record["removed"].items():
+                    for name in names:
+                        manifest.get(scope, {}).pop(name, None)
+                for scope, entries in record["set"].items():
+                    manifest.setdefault(scope, {}).update(entries)
+            if len(self._manifests) >= 8:
+                self._manifests.pop(next(iter(self._manifests)))
+            self._manifests[snapshot_id] = manifest
+            return manifest
+
+    def create(self, variables, label="", timestamp=None):
+        """
+        创建快照.
+        Args:
+            variables: {作用域: {变量名: 值}}，例如 {"user": {...}, "system": {...}}
+        Returns: (记录, 是否新建)，与最新快照完全相同时不新建，返回最新快照
+        """
+        with self._lock:
+            head = self.head()
+            parent = self.manifest(head["id"]) if head is not None else {}
+            known = {digest for entries in parent.values() for digest in entries.values()}
+            manifest = {scope: {name: self.put_value(value, known) for name, value in values.items()}
+                        for scope, values in variables.items()}
+            digest = manifest_digest(manifest)
+            if head is not None and head["digest"] == digest:
+                return head, False
+            record = self._make_record(head["id"] + 1 if head else 1, head, parent, manifest, digest,
+                                       timestamp or time.time(), label)
+            self._append(record)
+            self._records[record["id"]] = record
+            self._manifests[record["id"]] = manifest
+            return record, True
+
+    @staticmethod
+    def _make_record(snapshot_id, head, parent, manifest, digest, timestamp, label):
+        full = head is None or head["depth"] + 1 >= KEYFRAME_INTERVAL
+        changed, removed = _delta(parent, manifest)
+        record = {
+            "id": snapshot_id,
+            "parent": head["id"] if head else None,
+            "time": timestamp,
+            "label": label,
+            "digest": digest,
+            "full": full,
+            "depth": 0 if full else head["depth"] + 1,
+            "changes": sum(map(len, changed.values())) + sum(map(len, removed.values())),
+            "count": {scope: len(entries) for scope, entries in manifest.items()},
+            "set": manifest if full else changed,
+            "removed": {} if full else removed,
+        }
+        return record
+
+    def load(self, snapshot_id):
+        """读取快照中的全部变量 {作用域: {变量名: 值}}."""
+        return {scope: {name: self.get_value(digest) for name, digest in entries.items()}
+                for scope, entries in self.manifest(snapshot_id).items()}
+
+    def diff(self, old_id, new_id, values=False):
+        """
+        比较两个快照，返回 {作用域: {"added": [...], "removed": [...], "changed": [...]}}.
+        values 为 True 时改为 {变量名: (旧值, 新值)}，只读取有变化的值。
+        """
+        old, new = self.manifest(old_id), self.manifest(new_id)
+        result = {}
+        for scope in sorted(set(old) | set(new)):
+            before, after = old.get(scope, {}), new.get(scope, {})
+            entry = {
+                "added": sorted(name for name in after if name not in before),
+                "removed": sorted(name for name in before if name not in after),
+                "changed": sorted(name for name in after if name in before and before[name] != after[name]),
+            }
+            if values:
+                entry = {kind: {name: (self.get_value(before[name]) if name in before else None,
+                                       self.get_value(after[name]) if name in after else None)
+                                for name in names}
+                         for kind, names in entry.items()}
+            if any(entry.values()):
+                result[scope] = entry
+        return result
+
+    # 保留策略和压缩
+
+    def select_retained(self, keep_last=20, keep_daily=30, keep_monthly=12):
+        """按保留策略返回要保留的快照 id 集合."""
+        records = list(self._load().values())
+        keep = {r["id"] for r in records[-keep_last:]} if keep_last else set()
+        for fmt, limit in (("%Y-%m-%d", keep_daily), ("%Y-%m", keep_monthly)):
+            periods = {}
+            for record in records:  # 从旧到新，每个时间段保留最后一个
+                periods[time.strftime(fmt, time.localtime(record["time"]))] = record["id"]
+            if limit:
+                keep.update(list(periods.values())[-limit:])
+        return keep
+
+    def prune(self, keep_last=20, keep_daily=30, keep_monthly=12):
+        """按保留策略删除旧快照并压缩，返回 compact() 的统计."""
+        with self._lock:
+            return self.compact(self.select_retained(keep_last, keep_daily, keep_monthly))
+
+    def compact(self, keep_ids=None):
+        """
+        重写日志，只保留 keep_ids (默认全部)，增量改为相对上一个保留的快照，并删除不再引用的值.
+        Returns: {"snapshots_removed": n, "blobs_removed": m}
+        """
+        with self._lock:
+            records = self._load()
+            kept = sorted(records if keep_ids is None else set(keep_ids) & set(records))
+            manifests = {sid: self.manifest(sid) for sid in kept}
+            lines, head, parent = [], None, {}
+            rewritten = {}
+            for sid in kept:
+                old = records[sid]
+                record = self._make_record(sid, head, parent, manifests[sid], old["digest"], old["time"], old["label"])
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                rewritten[sid] = record
+                head, parent = record, manifests[sid]
+
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = self.log_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.log_file)
+            removed = len(records) - len(kept)
+            self._records = rewritten
+            self._manifests = {}
+
+            referenced = {digest for manifest in manifests.values()
+                          for entries in manifest.values() for digest in entries.values()}
+            blobs_removed = 0
+            try:
+                prefixes = os.listdir(self.blob_dir)
+            except OSError:
+                prefixes = []
+            for prefix in prefixes:
+                directory = os.path.join(self.blob_dir, prefix)
+                for name in os.listdir(directory):
+                    if prefix + name not in referenced:
+                        os.remove(os.path.join(directory, name))
+                        blobs_removed += 1
+            self._values = {}
+            return {"snapshots_removed": removed, "blobs_removed": blobs_removed}
@@ -0,0 +1,230 @@
+import os
+import json
+import threading
+
+from config_store import write_json_atomic
+
+# 用户和系统环境变量所在的注册表项
+USER_ENV_KEY = 'Environment'
+SYSTEM_ENV_KEY = 'SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment'
+
+
+class EnvStore:
+    """环境变量存储后端接口.
+
+    system_wide 为 True 时操作系统环境变量，否则操作用户环境变量。
+    读取不存在的变量返回 None。path_sep 是 PATH 变量使用的分隔符。
+    """
+
+    path_sep = os.pathsep
+
+    def get(self, name, system_wide=False):
+        return self.get_many([name], system_wide)[name]
+
+    def set(self, name, value, system_wide=False):
+        self.set_many({name: value}, system_wide)
+
+    def get_many(self, names, system_wide=False):
+        """批量读取，返回 {名称: 值或 None}."""
+        raise NotImplementedError
+
+    def set_many(self, mapping, system_wide=False):
+        """批量写入，值为 None 的变量会被删除."""
+        raise NotImplementedError
+
+    def delete(self, name, system_wide=False):
+        self.set_many({name: None}, system_wide)
+
+    def items(self, system_wide=False):
+        """返回作用域内的全部变量."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class WinRegEnvStore(EnvStore):
+    """基于 winreg 的后端，按作用域和访问权限缓存已打开的注册表句柄."""
+
+    path_sep = ';'
+
+    def __init__(self):
+        import winreg
+        self._winreg = winreg
+        self._handles = {}
+        self._lock = threading.RLock()
+        self.opens = 0  # 实际打开注册表项的次数
+
+    def _key(self, system_wide, write):
+        access = self._winreg.KEY_ALL_ACCESS if write else self._winreg.KEY_READ
+        handle = self._handles.get((system_wide, access))
+        if handle is None:
+            if system_wide:
+                handle = self._winreg.OpenKey(self._winreg.HKEY_LOCAL_MACHINE, SYSTEM_ENV_KEY, 0, access)
+            else:
+                handle = self._winreg.OpenKey(self._winreg.HKEY_CURRENT_USER, USER_ENV_KEY, 0, access)
+            self._handles[(system_wide, access)] = handle
+            self.opens += 1
+        return handle
+
+    def get_many(self, names, system_wide=False):
+        with self._lock:
+            key = self._key(system_wide, write=False)
+            values = {}
+            for name in names:
+                try:
+                    values[name], _ = self._winreg.QueryValueEx(key, name)
+                except FileNotFoundError:
+                    values[name] = None
+            return values
+
+    def set_many(self, mapping, system_wide=False):
+        with self._lock:
+            key = self._key(system_wide, write=True)
+            for name, value in mapping.items():
+                if value is None:
+                    try:
+                        self._winreg.DeleteValue(key, name)
+                    except FileNotFoundError:
+                        pass
+                else:
+                    self._winreg.SetValueEx(key, name, 0, self._winreg.REG_EXPAND_SZ, value)
+
+    def items(self, system_wide=False):
+        with self._lock:
+            key = self._key(system_wide, write=False)
+            values = {}
+            i = 0
+            while True:
+                try:
+                    name, value, _ = self._winreg.EnumValue(key, i)
+                except OSError:
+                    break  # 枚举完成
+                values[name] = value
+                i += 1
+            return values
+
+    def close(self):
+        with self._lock:
+            for handle in self._handles.values():
+                self._winreg.CloseKey(handle)
+            self._handles.clear()
+
+
+class MemoryEnvStore(EnvStore):
+    """纯内存后端，用于测试和性能基准."""
+
+    def __init__(self, user=None, system=None):
+        self._scopes = {False: dict(user or {}), True: dict(system or {})}
+        self._lock = threading.RLock()
+
+    def get_many(self, names, system_wide=False):
+        with self._lock:
+            scope = self._scopes[system_wide]
+            return {name: scope.get(name) for name in names}
+
+    def set_many(self, mapping, system_wide=False):
+        with self._lock:
+            scope = self._scopes[system_wide]
+            for name, value in mapping.items():
+                if value is None:
+                    scope.pop(name, None)
+                else:
+                    scope[name] = value
+            self._changed()
+
+    def items(self, system_wide=False):
+        with self._lock:
+            return dict(self._scopes[system_wide])
+
+    def _changed(self):
+        pass
+
+
+class JsonFileEnvStore(MemoryEnvStore):
+    """JSON 文件后端 (非 Windows 系统)，每次写入后原子保存."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            self._scopes = {False: data.get("user", {}), True: data.get("system", {})}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"读取环境变量文件失败: {e}")
+
+    def _changed(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_json_atomic(self.path, {"user": self._scopes[False], "system": self._scopes[True]})
+
+
+def create_env_store(kind, config_dir):
+    """
+    创建环境变量后端.
+    Args:
+        kind: "registry"、"json"、"memory"，为空时 Windows 使用注册表，其他系统使用 JSON 文件
+    """
+    if not kind:
+        kind = "registry" if os.name == 'nt' else "json"
+    if kind == "registry":
+        return WinRegEnvStore()
+    if kind == "memory":
+        return MemoryEnvStore()
+    if kind == "json":
+        return JsonFileEnvStore(os.path.join(config_dir, "environment.json"))
+    raise ValueError(f"未知的环境变量后端: {kind}")
+
+
+def snapshot_store(config_dir):
+    """返回配置目录中的环境变量快照库."""
+    from env_snapshots import EnvSnapshotStore
+    return EnvSnapshotStore(os.path.join(config_dir, "env_snapshots"))
+
+
+def _import_legacy_backups(snapshots, config_dir):
+    """把旧版的 user/system_env_vars_backup.json 导入为第一个快照 (保留原文件)."""
+    variables, mtime = {}, None
+    for scope in ("user", "system"):
+        path = os.path.join(config_dir, f"{scope}_env_vars_backup.json")
+        try:
+            with open(path, "r") as f:
+                variables[scope] = json.load(f)
+            mtime = max(mtime or 0, os.path.getmtime(path))
+        except (OSError, ValueError):
+            continue
+    if variables:
+        snapshots.create(variables, label="旧版备份", timestamp=mtime)
+
+
+def backup_env_vars(config_dir, store=None, label="", retention=None):
+    """
+    为当前环境变量创建快照，区分用户和系统环境变量.
+    Windows 上从 store (应用配置的后端，未指定时临时打开注册表) 读取；
+    其他系统把当前进程的环境变量视为用户环境变量。
+    快照数超过保留策略容量的两倍时按策略清理。会读写磁盘，应在后台线程中调用。
+    Returns: {"id", "created", "changes", "count", "path"}，与上一个快照相同时 created 为 False
+    """
+    snapshots = snapshot_store(config_dir)
+    if not len(snapshots):
+        _import_legacy_backups(snapshots, config_dir)
+    if os.name != 'nt':
+        variables = {"user": dict(os.environ)}
+    elif store is not None:
+        variables = {"user": store.items(system_wide=False), "system": store.items(system_wide=True)}
+    else:
+        store = WinRegEnvStore()
+        try:
+            variables = {"user": store.items(system_wide=False), "system": store.items(system_wide=True)}
+        finally:
+            store.close()
+    record, created = snapshots.create(variables, label)
+
+    from env_snapshots import DEFAULT_RETENTION
+    retention = retention or DEFAULT_RETENTION
+    if len(snapshots) > 2 * sum(retention.values()):
+        snapshots.prune(**retention)
+    return {"id": record["id"], "created": created, "changes": record["changes"] if created else 0,
+            "count": record["count"], "path": snapshots.root}
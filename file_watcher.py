@@ -0,0 +1,391 @@
+import os
+import sys
+import time
+import struct
+import select
+import threading
+
+
+def _same_path(a, b):
+    return os.path.normcase(a) == os.path.normcase(b)
+
+
+class Subscription:
+    """一个文件或目录的订阅，cancel() 取消."""
+
+    def __init__(self, watcher, path, callback, is_dir):
+        self.watcher = watcher
+        self.path = path
+        self.directory = path if is_dir else os.path.dirname(path)
+        self.callback = callback
+        self.is_dir = is_dir
+
+    @property
+    def active(self):
+        """订阅所在目录是否确实正在被监视 (监视未启动或添加目录失败时为 False)."""
+        return self.watcher.is_watching(self.directory)
+
+    @property
+    def module(self):
+        """回调所在的模块名，插件重新加载时据此取消旧订阅."""
+        return getattr(self.callback, "__module__", None)
+
+    def matches(self, path):
+        # 事件队列溢出时后端只报告目录本身，目录中的所有订阅都需要重新检查
+        if _same_path(path, self.directory):
+            return True
+        if self.is_dir:
+            return _same_path(os.path.dirname(path), self.directory)
+        return _same_path(path, self.path)
+
+    def cancel(self):
+        self.watcher.unsubscribe(self)
+
+    def __repr__(self):
+        return f"<Subscription {self.path}>"
+
+
+class PollingBackend:
+    """定期比较目录中文件的 (mtime, size)，没有变化时逐步加长检查间隔."""
+
+    name = "poll"
+
+    def __init__(self, notify, min_interval=0.25, max_interval=4.0):
+        self.notify = notify
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _snapshot(directory):
+        entries = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries[entry.name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return entries
+
+    def add(self, directory):
+        snapshot = self._snapshot(directory)
+        with self._lock:
+            self._snapshots.setdefault(directory, snapshot)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="file-watcher-poll", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            changed = False
+            with self._lock:
+                directories = list(self._snapshots)
+            for directory in directories:
+                snapshot = self._snapshot(directory)
+                with self._lock:
+                    previous = self._snapshots.get(directory, {})
+                    self._snapshots[directory] = snapshot
+                for name in set(previous) | set(snapshot):
+                    if previous.get(name) != snapshot.get(name):
+                        changed = True
+                        self.notify(os.path.join(directory, name))
+            # 有变化时恢复最短间隔，否则逐步退避
+            self.interval = self.min_interval if changed else min(self.interval * 2, self.max_interval)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+
+class InotifyBackend:
+    """Linux inotify (通过 ctypes 调用 libc)."""
+
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, notify):
+        import ctypes
+        import ctypes.util
+        self.notify = notify
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._wake_r, self._wake_w = os.pipe()
+        self._watches = {}  # wd -> 目录
+        self._thread = None
+
+    def add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            errno = self._ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+        self._watches[wd] = directory
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="file-watcher-inotify", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                break
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset + 16 <= len(data):
+                wd, mask, _cookie, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+                offset += 16 + length
+                if mask & self.IN_Q_OVERFLOW:
+                    for directory in list(self._watches.values()):
+                        self.notify(directory)
+                    continue
+                directory = self._watches.get(wd)
+                if directory is not None and name:
+                    self.notify(os.path.join(directory, os.fsdecode(name)))
+
+    def stop(self):
+        os.write(self._wake_w, b"x")
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class WindowsBackend:
+    """Windows ReadDirectoryChangesW，每个目录一个阻塞读取的线程."""
+
+    name = "windows"
+
+    FILE_LIST_DIRECTORY = 0x0001
+    FILE_SHARE_ALL = 0x00000007
+    OPEN_EXISTING = 3
+    FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+    NOTIFY_FILTER = 0x00000001 | 0x00000002 | 0x00000008 | 0x00000010  # 文件名、目录名、大小、修改时间
+    INVALID_HANDLE_VALUE = -1
+
+    def __init__(self, notify):
+        import ctypes
+        from ctypes import wintypes
+        self.notify = notify
+        self._ctypes = ctypes
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._kernel32.CreateFileW.restype = wintypes.HANDLE
+        self._handles = {}
+        self._stopping = False
+
+    def add(self, directory):
+        handle = self._kernel32.CreateFileW(
+            directory, self.FILE_LIST_DIRECTORY, self.FILE_SHARE_ALL, None,
+            self.OPEN_EXISTING, self.FILE_FLAG_BACKUP_SEMANTICS, None)
+        if handle is None or handle == self.INVALID_HANDLE_VALUE:
+            raise self._ctypes.WinError(self._ctypes.get_last_error())
+        self._handles[directory] = handle
+        threading.Thread(target=self._run, args=(directory, handle),
+                         name="file-watcher-windows", daemon=True).start()
+
+    def start(self):
+        pass
+
+    def _run(self, directory, handle):
+        ctypes = self._ctypes
+        buffer = ctypes.create_string_buffer(64 * 1024)
+        returned = ctypes.c_ulong()
+        while not self._stopping:
+            ok = self._kernel32.ReadDirectoryChangesW(
+                handle, buffer, len(buffer), False, self.NOTIFY_FILTER,
+                ctypes.byref(returned), None, None)
+            if not ok or self._stopping:
+                break
+            if returned.value == 0:
+                # 缓冲区溢出，通知整个目录
+                self.notify(directory)
+                continue
+            data = buffer.raw[:returned.value]
+            offset = 0
+            while True:
+                next_offset, _action, length = struct.unpack_from("III", data, offset)
+                name = data[offset + 12:offset + 12 + length].decode("utf-16-le")
+                self.notify(os.path.join(directory, name))
+                if not next_offset:
+                    break
+                offset += next_offset
+        self._kernel32.CloseHandle(handle)
+
+    def stop(self):
+        # 取消阻塞中的 ReadDirectoryChangesW，线程退出时关闭句柄
+        self._stopping = True
+        for handle in self._handles.values():
+            self._kernel32.CancelIoEx(handle, None)
+
+
+BACKENDS = {"inotify": InotifyBackend, "windows": WindowsBackend, "poll": PollingBackend}
+
+
+class FileWatcher:
+    """文件监视服务.
+
+    Linux 使用 inotify，Windows 使用 ReadDirectoryChangesW，不可用时退回到带退避的轮询。
+    变化事件在防抖窗口 (debounce 秒) 内合并，按订阅分组后在 Tk 线程中回调 callback(paths)。
+    """
+
+    def __init__(self, scheduler, debounce=0.2, backend="auto"):
+        self.scheduler = scheduler
+        self.debounce = debounce
+        self.backend_kind = backend or "auto"
+        self.backend = None
+        self._subscriptions = []
+        self._directories = set()
+        self._watching = set()  # 后端已成功开始监视的目录
+        self._pending = set()
+        self._first_event = None
+        self._last_event = None
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        self.events = 0
+        self.batches = 0
+
+    def _create_backend(self):
+        kind = self.backend_kind
+        if kind == "auto":
+            kind = "inotify" if sys.platform.startswith("linux") else "windows" if os.name == 'nt' else "poll"
+        try:
+            return BACKENDS[kind](self._notify)
+        except Exception as e:
+            if kind == "poll":
+                raise
+            print(f"文件监视后端 {kind} 不可用，改用轮询: {e}")
+            return PollingBackend(self._notify)
+
+    def start(self):
+        """启动监视线程."""
+        if self.backend is not None:
+            return
+        self.backend = self._create_backend()
+        for directory in self._directories:
+            self._add_directory(directory)
+        self.backend.start()
+        self._thread = threading.Thread(target=self._flush_loop, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def _add_directory(self, directory):
+        try:
+            self.backend.add(directory)
+        except OSError as e:
+            print(f"无法监视目录 {directory}: {e}")
+            return
+        with self._cond:
+            self._watching.add(directory)
+
+    def is_watching(self, directory):
+        return os.path.abspath(directory) in self._watching
+
+    def subscribe(self, path, callback):
+        """
+        订阅文件或目录的变化 (目录只包含直接子项)，返回 Subscription.
+        callback(paths) 在 Tk 线程中调用，paths 为防抖窗口内变化的路径列表。
+        """
+        path = os.path.abspath(path)
+        subscription = Subscription(self, path, callback, os.path.isdir(path))
+        with self._cond:
+            self._subscriptions.append(subscription)
+            is_new = subscription.directory not in self._directories
+            self._directories.add(subscription.directory)
+        if is_new and self.backend is not None:
+            self._add_directory(subscription.directory)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def unsubscribe_module(self, module_name):
+        """取消回调定义在 module_name 模块中的全部订阅 (插件重新加载或删除时调用)."""
+        with self._cond:
+            self._subscriptions = [s for s in self._subscriptions if s.module != module_name]
+
+    def _notify(self, path):
+        """后端线程报告变化的路径."""
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_event = now
+            self._pending.add(path)
+            self._last_event = now
+            self.events += 1
+            self._cond.notify()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # 等到防抖窗口内没有新事件，持续变化时最多推迟 10 个窗口
+                while not self._stopped:
+                    now = time.monotonic()
+                    remaining = min(self._last_event + self.debounce, self._first_event + self.debounce * 10) - now
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                paths, self._pending = self._pending, set()
+                subscriptions = list(self._subscriptions)
+                self.batches += 1
+            for subscription in subscriptions:
+                matched = sorted(path for path in paths if subscription.matches(path))
+                if matched:
+                    self.scheduler.call_soon(self._deliver, subscription, matched)
+
+    def _deliver(self, subscription, paths):
+        if subscription not in self._subscriptions:
+            return  # 已取消
+        try:
+            subscription.callback(paths)
+        except Exception as e:
+            print(f"处理文件变化失败: {e}")
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._watching.clear()
+            self._cond.notify()
+        if self.backend is not None:
+            self.backend.stop()
+
+    def stats(self):
+        """返回后端名称、事件数和合并后的批次数."""
+        return {
+            "backend": self.backend.name if self.backend is not None else None,
+            "events": self.events,
+            "batches": self.batches,
+            "subscriptions": len(self._subscriptions),
+        }
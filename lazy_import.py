@@ -0,0 +1,65 @@
+import sys
+import importlib.util
+import threading
+
+
+class LazyModule:
+    """模块代理，第一次访问属性时才真正导入.
+
+    用于 PIL、requests、win32api、rich 等较重的可选模块：
+    未安装时创建代理不会报错，直到第一次使用才抛出 ImportError。
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self):
+        """模块是否已经导入 (包括被其他代码导入)."""
+        return self.__dict__["_module"] is not None or self.__dict__["_name"] in sys.modules
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self.__dict__['_name']} ({state})>"
+
+
+_lazy_modules = {}
+
+
+def lazy_module(name):
+    """返回 name 的延迟导入代理，同名模块共用一个代理."""
+    module = _lazy_modules.get(name)
+    if module is None:
+        module = _lazy_modules.setdefault(name, LazyModule(name))
+    return module
+
+
+def is_available(name):
+    """检查模块是否可以导入 (不执行导入)."""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -0,0 +1,162 @@
+import os
+import re
+
+_VAR_PATTERN = re.compile(r'%([^%]+)%')
+
+
+class PathList:
+    """有序的 PATH 条目列表，带规范化键索引.
+
+    条目保持原样和原有顺序，比较时使用规范化的键：展开 %VAR%、
+    统一斜杠、去掉末尾斜杠和引号，Windows 风格 (分隔符为 ;) 时忽略大小写。
+    因此 C:\\Foo\\bin、c:/foo/bin/ 和 %FOO_HOME%\\bin 会被视为同一个目录。
+    成员判断为 O(1)，批量插入和删除只重建一次列表。
+    """
+
+    def __init__(self, value="", sep=os.pathsep, lookup=None, ignore_case=None):
+        """
+        Args:
+            value: PATH 字符串或条目列表
+            sep: 分隔符，serialize() 时使用
+            lookup: 展开 %VAR% 时查询变量值的函数 lookup(name)，默认使用 os.environ
+            ignore_case: 比较时是否忽略大小写，默认在分隔符为 ; 时忽略
+        """
+        self.sep = sep
+        self.ignore_case = sep == ';' if ignore_case is None else ignore_case
+        self._lookup = lookup or os.environ.get
+        self._variables = {}  # 变量展开缓存
+        if isinstance(value, str):
+            value = value.split(sep)
+        self._entries = [entry for entry in value if entry.strip()]
+        self._keys = [self.key(entry) for entry in self._entries]
+        self._counts = {}  # 规范化键 -> 出现次数
+        for key in self._keys:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _expand(self, match):
+        name = match.group(1)
+        if name not in self._variables:
+            self._variables[name] = self._lookup(name)
+        value = self._variables[name]
+        return match.group(0) if value is None else value
+
+    def key(self, entry):
+        """返回条目的规范化键."""
+        path = entry.strip().strip('"')
+        if '%' in path:
+            path = _VAR_PATTERN.sub(self._expand, path)
+        path = path.replace('\\', '/')
+        while '//' in path[1:]:
+            path = path[0] + path[1:].replace('//', '/')  # 保留 UNC 路径开头的 //
+        if len(path) > 1 and not path.endswith(':/'):
+            path = path.rstrip('/')
+        return path.lower() if self.ignore_case else path
+
+    def __contains__(self, entry):
+        return self.key(entry) in self._counts
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        return self._entries[index]
+
+    def __str__(self):
+        return self.serialize()
+
+    def __repr__(self):
+        return f"PathList({self._entries!r})"
+
+    def serialize(self):
+        """按原分隔符拼接为 PATH 字符串."""
+        return self.sep.join(self._entries)
+
+    def find(self, entry):
+        """返回与 entry 指向同一目录的第一个已有条目，没有则返回 None."""
+        key = self.key(entry)
+        if key not in self._counts:
+            return None
+        return self._entries[self._keys.index(key)]
+
+    def _new_entries(self, entries):
+        """过滤掉已存在和重复的条目，返回 [(键, 条目)]."""
+        if isinstance(entries, str):
+            entries = [entries]
+        added = []
+        seen = set()
+        for entry in entries:
+            if not entry.strip():
+                continue
+            key = self.key(entry)
+            if key in self._counts or key in seen:
+                continue
+            seen.add(key)
+            added.append((key, entry))
+        return added
+
+    def insert(self, index, entries):
+        """在 index 处批量插入不存在的条目，返回实际插入的条目列表."""
+        added = self._new_entries(entries)
+        if added:
+            self._keys[index:index] = [key for key, _ in added]
+            self._entries[index:index] = [entry for _, entry in added]
+            for key, _ in added:
+                self._counts[key] = 1
+        return [entry for _, entry in added]
+
+    def append(self, entry):
+        """追加条目，已存在时返回 False."""
+        return bool(self.insert(len(self._entries), entry))
+
+    def extend(self, entries):
+        """批量追加，返回实际追加的条目列表."""
+        return self.insert(len(self._entries), entries)
+
+    def remove(self, entries):
+        """删除与 entries 指向同一目录的所有条目，返回删除的条目列表."""
+        if isinstance(entries, str):
+            entries = [entries]
+        keys = {self.key(entry) for entry in entries} & self._counts.keys()
+        if not keys:
+            return []
+        removed = [entry for key, entry in zip(self._keys, self._entries) if key in keys]
+        kept = [(key, entry) for key, entry in zip(self._keys, self._entries) if key not in keys]
+        self._keys = [key for key, _ in kept]
+        self._entries = [entry for _, entry in kept]
+        for key in keys:
+            del self._counts[key]
+        return removed
+
+    def move_to_front(self, entry):
+        """
+        把条目移到最前面 (不存在时插入)，同一目录的其他写法会被去掉.
+        返回 PATH 是否发生变化。
+        """
+        key = self.key(entry)
+        if self._keys[:1] == [key] and self._counts.get(key) == 1:
+            return False
+        existing = self.find(entry)
+        self.remove(entry)
+        self.insert(0, existing or entry)
+        return True
+
+    def dedupe(self):
+        """删除重复目录，只保留第一次出现的条目，返回删除的条目列表."""
+        if len(self._counts) == len(self._entries):
+            return []
+        seen = set()
+        kept = []
+        removed = []
+        for key, entry in zip(self._keys, self._entries):
+            if key in seen:
+                removed.append(entry)
+            else:
+                seen.add(key)
+                kept.append((key, entry))
+        self._keys = [key for key, _ in kept]
+        self._entries = [entry for _, entry in kept]
+        self._counts = dict.fromkeys(self._keys, 1)
+        return removed
@@ -1,11 +1,34 @@
 import os
-import win32api
-import win32con
-import win32gui
+import threading
+from contextlib import contextmanager
+
+from env_broadcast import BroadcastCoalescer
+from env_store import create_env_store
+from path_list import PathList
+from which_index import WhichIndex
+from version_probe import ProbeCache, detect_version
+from tracer import tracer, span
+import task_scheduler
 
 class PluginAPI:
     def __init__(self, app):
         self.app = app
+        self._transaction = None  # 当前进行中的事务
+        self._plugin_host = None  # 插件宿主进程池，首次使用时创建
+        self._async_bridge = None  # asyncio 事件循环，首次使用时创建
+        self.env_broadcast = BroadcastCoalescer()  # 合并环境变量变更广播
+        # 环境变量存储后端，配置项 env_store 可选 registry/json/memory
+        self.env_store = create_env_store(app.config.get("env_store"), app.config_dir)
+        self._which_index = None
+        self.probe_cache = ProbeCache(os.path.join(app.config_dir, "cache", "versions.json"))
+        self._config_listeners = []  # on_config_change 的订阅
+        self._registered_probes = None  # 插件 register() 期间注册的验证项
+
+    @property
+    def aio(self):
+        """异步 I/O 工具: await api.aio.http_get(url) / download / run_process / read_file / write_file"""
+        import async_bridge  # asyncio/ssl 只在使用时导入，命令行模式不需要
+        return async_bridge
 
     def get_config(self, key=None):
         """
@@ -26,6 +49,10 @@ class PluginAPI:
             silent: 是否静默保存（不触发重启提示）
         """
         self.app.programmatic_change = silent
+        if self._transaction is not None:
+            self._transaction.stage_config(key)
+            self.app.config[key] = value
+            return
         self.app.config[key] = value
         self.app.save_config()
 
@@ -36,8 +63,120 @@ class PluginAPI:
             silent: 是否静默保存（不触发重启提示）
         """
         self.app.programmatic_change = silent
+        if self._transaction is not None:
+            self._transaction._save_requested = True  # 提交事务时统一保存
+            return
         self.app.save_config()
 
+    def flush_config(self):
+        """立即将延迟写入的配置落盘."""
+        self.app.config_store.flush()
+
+    def get_config_cache_stats(self):
+        """获取配置缓存的命中统计."""
+        return self.app.config_store.stats()
+
+    def get_plugin_bytecode_stats(self):
+        """获取每个插件的编译耗时与字节码缓存加载耗时."""
+        return self.app.bytecode_cache.stats
+
+    def run_in_background(self, fn, *args, on_done=None, on_progress=None, on_error=None, **kwargs):
+        """
+        在共享线程池中执行阻塞任务，避免卡住界面.
+        Args:
+            fn: 要执行的函数，调用 fn(*args, **kwargs)
+            on_done: 成功时以返回值调用
+            on_progress: fn 中调用 api.current_task().report_progress(value) 时调用
+            on_error: 出错时以异常对象调用
+        Returns:
+            BackgroundTask，可调用 cancel() 取消
+        所有回调都在 Tk 线程中执行，可以直接更新控件。
+        """
+        return self.app.task_scheduler.submit(
+            fn, *args, on_done=on_done, on_progress=on_progress, on_error=on_error, **kwargs)
+
+    def current_task(self):
+        """返回当前线程正在执行的后台任务 (用于报告进度和检查取消)，否则返回 None."""
+        return task_scheduler.current_task()
+
+    def call_in_ui(self, fn, *args):
+        """从任意线程安排 fn(*args) 在 Tk 线程中执行."""
+        self.app.task_scheduler.call_soon(fn, *args)
+
+    def _ensure_async_loop(self):
+        """首次使用时启动 asyncio 事件循环，返回 AsyncBridge."""
+        if self._async_bridge is None:
+            self._async_bridge = self.aio.AsyncBridge(self.app.task_scheduler,
+                                                      self.app.config.get("async_io_workers", 32))
+        return self._async_bridge
+
+    @property
+    def async_loop(self):
+        """与 Tk 主循环并行运行的 asyncio 事件循环."""
+        return self._ensure_async_loop().loop
+
+    def run_async(self, coro, on_done=None, on_error=None):
+        """
+        在 asyncio 事件循环中执行协程，例如并发下载.
+        Args:
+            coro: 协程对象，可以 await api.aio 中的 HTTP、子进程和文件操作
+            on_done: 成功时以返回值调用 (Tk 线程)
+            on_error: 出错时以异常对象调用 (Tk 线程)
+        Returns:
+            concurrent.futures.Future，可调用 cancel() 取消
+        """
+        return self._ensure_async_loop().submit(coro, on_done=on_done, on_error=on_error)
+
+    async def ui(self, fn, *args):
+        """在协程中 await，在 Tk 线程中执行 fn(*args) 并返回结果，用于安全地更新控件."""
+        return await self._ensure_async_loop().ui(fn, *args)
+
+    def run_in_worker(self, func, *args, on_done=None, on_error=None, timeout=None, **kwargs):
+        """
+        在插件宿主进程中执行插件函数 (下载、扫描、校验等非 GUI 任务).
+        Args:
+            func: 插件模块中定义的函数，参数中的 PluginAPI 实例会替换为工作进程中的代理
+            on_done: 成功时以返回值调用 (Tk 线程)
+            on_error: 失败时以错误信息调用 (Tk 线程)
+            timeout: 超时秒数，超时后终止工作进程
+        Returns:
+            WorkerCall，可传给 kill_plugin_worker 终止；未启用宿主模式时返回 None
+        配置项 plugin_host_workers 大于 0 时启用宿主模式，否则在后台线程池中执行。
+        """
+        workers = self.app.config.get("plugin_host_workers", 0)
+        if not workers:
+            error_callback = None
+            if on_error is not None:
+                error_callback = lambda e: on_error(f"{type(e).__name__}: {e}")
+            self.run_in_background(func, *args, on_done=on_done, on_error=error_callback, **kwargs)
+            return None
+        if self._plugin_host is None:
+            from plugin_host import PluginHost
+            self._plugin_host = PluginHost(self, self.app.master, size=workers)
+        return self._plugin_host.submit(func, *args, on_done=on_done, on_error=on_error, timeout=timeout, **kwargs)
+
+    def kill_plugin_worker(self, call):
+        """终止执行指定调用的工作进程，无需重启应用."""
+        if self._plugin_host is not None and call is not None:
+            self._plugin_host.kill(call)
+
+    def get_plugin_worker_stats(self):
+        """获取每个插件在工作进程中的调用次数、CPU 时间和内存占用."""
+        if self._plugin_host is None:
+            return {}
+        return self._plugin_host.stats
+
+    def shutdown(self):
+        """完成尚未发出的环境变量广播，停止插件宿主的工作进程和 asyncio 事件循环."""
+        self.env_broadcast.flush(timeout=5)
+        if self._plugin_host is not None:
+            self._plugin_host.shutdown()
+            self._plugin_host = None
+        if self._async_bridge is not None:
+            self._async_bridge.shutdown()
+            self._async_bridge = None
+        self.env_store.close()
+
     def set_taskbar_progress(self, progress=0, state="normal"):
         """
         设置任务栏进度条.
@@ -50,6 +189,11 @@ class PluginAPI:
             
         if state not in ["normal", "error", "none"]:
             raise ValueError("State must be one of: normal, error, none")
+
+        # 后台线程中调用时转到 Tk 线程执行
+        if threading.current_thread() is not threading.main_thread():
+            self.call_in_ui(self.set_taskbar_progress, progress, state)
+            return
         
         try:
             # 尝试使用主窗口的进度条方法
@@ -65,49 +209,57 @@ class PluginAPI:
             print(f"设置进度条失败: {e}")
 
     def _broadcast_env_update(self):
-        """通知系统环境变量已更改"""
+        """通知系统环境变量已更改 (在后台线程中合并广播，不阻塞界面)"""
+        self.env_broadcast.request()
+
+    def set_env_broadcaster(self, broadcaster):
+        """替换环境变量变更广播器 (需实现 broadcast() 方法)，用于测试或自定义通知方式"""
+        self.env_broadcast.set_broadcaster(broadcaster)
+
+    def get_env_broadcast_stats(self):
+        """获取环境变量变更广播的次数和延迟统计"""
+        return self.env_broadcast.stats()
+
+    @staticmethod
+    def _path_entry(new_path, parent_var=None):
+        """计算要加入 PATH 的 bin 目录"""
+        if parent_var:
+            return f"%{parent_var}%\\bin"
+        return os.path.join(new_path, 'bin')
+
+    @contextmanager
+    def transaction(self):
+        """
+        批量修改配置和环境变量.
+        在 with 块内的 set_config/set_env_var 和 PATH 修改方法
+        只会暂存，退出时统一提交：一次配置写入、每个注册表项打开一次、一次广播。
+        块内抛出异常时回滚所有暂存的修改。嵌套调用会并入外层事务。
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+        txn = PluginTransaction(self)
+        self._transaction = txn
         try:
-            # 发送环境变量更改通知
-            win32gui.SendMessage(
-                win32con.HWND_BROADCAST,
-                win32con.WM_SETTINGCHANGE,
-                0,
-                'Environment'
-            )
-            # 等待消息处理完成
-            win32gui.SendMessageTimeout(
-                win32con.HWND_BROADCAST,
-                win32con.WM_SETTINGCHANGE,
-                0,
-                'Environment',
-                win32con.SMTO_ABORTIFHUNG,
-                5000
-            )
-        except Exception as e:
-            print(f"广播环境变量更新消息失败: {str(e)}")
+            yield txn
+        except BaseException:
+            self._transaction = None
+            txn.rollback()
+            raise
+        self._transaction = None
+        txn.commit()
+
+    def set_env_store(self, store):
+        """替换环境变量存储后端 (WinRegEnvStore、MemoryEnvStore、JsonFileEnvStore 等)"""
+        self.env_store = store
 
     def set_env_var(self, name, value, system_wide=False):
         """设置环境变量"""
+        if self._transaction is not None:
+            self._transaction.stage_env(system_wide, ("set", name, value))
+            return True
         try:
-            if system_wide:
-                # 系统环境变量
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_LOCAL_MACHINE,
-                    'SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment',
-                    0,
-                    win32con.KEY_ALL_ACCESS
-                )
-            else:
-                # 用户环境变量
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_CURRENT_USER,
-                    'Environment',
-                    0,
-                    win32con.KEY_ALL_ACCESS
-                )
-
-            win32api.RegSetValueEx(key, name, 0, win32con.REG_EXPAND_SZ, value)
-            win32api.RegCloseKey(key)
+            self.env_store.set(name, value, system_wide)
             
             # 立即更新当前进程的环境变量
             os.environ[name] = value
@@ -117,105 +269,221 @@ class PluginAPI:
             print(f"设置环境变量失败: {str(e)}")
             return False
 
-    def append_to_path(self, new_path, system_wide=False, parent_var=None):
-        """追加到PATH环境变量"""
+    def set_env_vars(self, mapping, system_wide=False):
+        """批量设置环境变量 (同一个注册表句柄，一次广播)"""
+        if self._transaction is not None:
+            for name, value in mapping.items():
+                self._transaction.stage_env(system_wide, ("set", name, value))
+            return True
         try:
-            if system_wide:
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_LOCAL_MACHINE,
-                    'SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment',
-                    0,
-                    win32con.KEY_ALL_ACCESS
-                )
-            else:
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_CURRENT_USER,
-                    'Environment',
-                    0,
-                    win32con.KEY_ALL_ACCESS
-                )
-
-            try:
-                current_path, _ = win32api.RegQueryValueEx(key, 'PATH')
-            except:
-                current_path = ''
-
-            if parent_var:
-                path_to_add = f"%{parent_var}%\\bin"
-            else:
-                path_to_add = os.path.join(new_path, 'bin')
+            self.env_store.set_many(mapping, system_wide)
+            os.environ.update(mapping)
+            self._broadcast_env_update()
+            return True
+        except Exception as e:
+            print(f"设置环境变量失败: {str(e)}")
+            return False
+
+    def path_list(self, value, system_wide=False):
+        """用当前后端的分隔符构造 PathList，%VAR% 按同一作用域的变量展开"""
+        def lookup(name):
+            return self.env_store.get(name, system_wide) or os.environ.get(name)
+        return PathList(value or '', self.env_store.path_sep, lookup)
 
-            paths = [p for p in current_path.split(';') if p]
-            if path_to_add not in paths:
-                new_path_value = ';'.join(paths + [path_to_add])
-                win32api.RegSetValueEx(key, 'PATH', 0, win32con.REG_EXPAND_SZ, new_path_value)
+    def _update_path(self, system_wide, op, error_message):
+        """读取 PATH，应用 PathList 操作 op(paths)，有变化时写回"""
+        try:
+            paths = self.path_list(self.env_store.get('PATH', system_wide), system_wide)
+            if op(paths):
+                new_path = paths.serialize()
+                self.env_store.set('PATH', new_path, system_wide)
                 
                 # 立即更新当前进程的环境变量
-                os.environ['PATH'] = new_path_value
-
-            win32api.RegCloseKey(key)
-            self._broadcast_env_update()
+                os.environ['PATH'] = new_path
+                self._broadcast_env_update()
             return True
         except Exception as e:
-            print(f"追加PATH失败: {str(e)}")
+            print(f"{error_message}: {str(e)}")
             return False
 
+    def append_to_path(self, new_path, system_wide=False, parent_var=None):
+        """追加到PATH环境变量 (已有同一目录的其他写法时不再追加)"""
+        path_to_add = self._path_entry(new_path, parent_var)
+        if self._transaction is not None:
+            self._transaction.stage_env(system_wide, ("append_path", path_to_add))
+            return True
+        return self._update_path(system_wide, lambda paths: paths.append(path_to_add), "追加PATH失败")
+
+    def insert_into_path(self, entries, system_wide=False, front=False):
+        """按原样批量加入目录 (不追加 bin)，已存在的目录不重复加入；front 为 True 时把这些目录移到最前面"""
+        if isinstance(entries, str):
+            entries = [entries]
+        if self._transaction is not None:
+            for entry in (reversed(entries) if front else entries):
+                self._transaction.stage_env(system_wide, ("front_path" if front else "append_path", entry))
+            return True
+        if front:
+            return self._update_path(
+                system_wide, lambda paths: any([paths.move_to_front(e) for e in reversed(entries)]), "修改PATH失败")
+        return self._update_path(system_wide, lambda paths: paths.extend(entries), "修改PATH失败")
+
+    def move_to_front_of_path(self, path, system_wide=False):
+        """把目录移到PATH最前面，不存在时插入"""
+        if self._transaction is not None:
+            self._transaction.stage_env(system_wide, ("front_path", path))
+            return True
+        return self._update_path(system_wide, lambda paths: paths.move_to_front(path), "调整PATH顺序失败")
+
+    def dedupe_path(self, system_wide=False):
+        """删除PATH中重复的目录 (忽略大小写、斜杠和 %VAR% 写法差异)"""
+        if self._transaction is not None:
+            self._transaction.stage_env(system_wide, ("dedupe_path",))
+            return True
+        return self._update_path(system_wide, lambda paths: paths.dedupe(), "PATH去重失败")
+
     def get_env_var(self, name, system_wide=False):
         """获取环境变量值"""
+        if self._transaction is not None:
+            staged = self._transaction.staged_env_value(system_wide, name)
+            if staged is not None:
+                return staged
         try:
-            if system_wide:
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_LOCAL_MACHINE,
-                    'SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment',
-                    0,
-                    win32con.KEY_READ
-                )
-            else:
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_CURRENT_USER,
-                    'Environment',
-                    0,
-                    win32con.KEY_READ
-                )
-            
-            value, _ = win32api.RegQueryValueEx(key, name)
-            win32api.RegCloseKey(key)
-            return value
+            return self.env_store.get(name, system_wide)
         except Exception as e:
             print(f"获取环境变量失败: {str(e)}")
             return None
-            
-    def remove_from_path(self, path_to_remove, system_wide=False):
-        """从PATH中移除指定路径"""
+
+    def get_env_vars(self, names, system_wide=False):
+        """批量获取环境变量值，返回 {名称: 值或 None}"""
         try:
-            if system_wide:
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_LOCAL_MACHINE,
-                    'SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment',
-                    0,
-                    win32con.KEY_ALL_ACCESS
-                )
-            else:
-                key = win32api.RegOpenKey(
-                    win32con.HKEY_CURRENT_USER,
-                    'Environment',
-                    0,
-                    win32con.KEY_ALL_ACCESS
-                )
-
-            current_path, _ = win32api.RegQueryValueEx(key, 'PATH')
-            paths = [p for p in current_path.split(';') if p and p != path_to_remove]
-            new_path = ';'.join(paths)
-            
-            win32api.RegSetValueEx(key, 'PATH', 0, win32con.REG_EXPAND_SZ, new_path)
-            win32api.RegCloseKey(key)
+            values = self.env_store.get_many(names, system_wide)
+        except Exception as e:
+            print(f"获取环境变量失败: {str(e)}")
+            values = {name: None for name in names}
+        if self._transaction is not None:
+            for name in names:
+                staged = self._transaction.staged_env_value(system_wide, name)
+                if staged is not None:
+                    values[name] = staged
+        return values
             
-            os.environ['PATH'] = new_path
-            self._broadcast_env_update()
+    def remove_from_path(self, path_to_remove, system_wide=False):
+        """从PATH中移除指定路径 (包括同一目录的其他写法)"""
+        if self._transaction is not None:
+            self._transaction.stage_env(system_wide, ("remove_path", path_to_remove))
             return True
-        except Exception as e:
-            print(f"从PATH移除失败: {str(e)}")
-            return False
+        return self._update_path(system_wide, lambda paths: paths.remove(path_to_remove), "从PATH移除失败")
+
+    @property
+    def which_index(self):
+        """当前进程 PATH 的可执行文件索引，PATH 变化时自动更新"""
+        if self._which_index is None:
+            self._which_index = WhichIndex()
+        else:
+            self._which_index.set_path(os.environ.get('PATH', ''))
+        return self._which_index
+
+    def which(self, name):
+        """返回命令 name 实际会使用的可执行文件路径 (不启动进程)，找不到时返回 None"""
+        return self.which_index.which(name)
+
+    def which_all(self, name):
+        """按 PATH 顺序返回命令 name 的所有候选路径"""
+        return self.which_index.candidates(name)
+
+    def get_path_shadowing(self, names=None):
+        """
+        返回被 PATH 中靠前的同名命令遮蔽的可执行文件.
+        Returns: {名称: [生效的路径, 被遮蔽的路径, ...]}
+        """
+        return self.which_index.shadowed(names)
+
+    def detect_version(self, tool, home=None, spawn=True, timeout=10, run=None):
+        """
+        获取工具链 (java/node/gradle) 版本，优先读取安装目录中的版本文件，结果按可执行文件缓存.
+        Returns: (version, source, executable)，source 为 "cache"、"metadata" 或 "spawn"
+        """
+        return detect_version(tool, home, cache=self.probe_cache, spawn=spawn, timeout=timeout, run=run)
+
+    def trace_span(self, name, **args):
+        """
+        记录代码块耗时，启用启动追踪 (SYSTOOLS_TRACE 或 --trace) 时写入 Chrome trace 文件，未启用时几乎没有开销.
+        用法: with api.trace_span("解析版本列表", count=len(versions)): ...
+        """
+        return span(name, "plugin", **args)
+
+    def trace_instant(self, name, **args):
+        """记录一个时间点事件"""
+        tracer.instant(name, "plugin", **args)
+
+    def register_probe(self, name, fn, label=None, config_keys=(), timeout=10, cost="spawn", executable=None):
+        """
+        注册环境验证项，显示在“环境功能验证”区域并参与“全部验证”.
+        Args:
+            fn: fn(context) 在线程池中执行并返回结果，可用 context.config、context.run(command)
+            config_keys: 结果依赖的配置项，这些配置或 PATH 变化时重新验证
+            cost: 开销等级 "metadata"、"spawn"、"jvm" 或 "network"
+            executable: executable(config) 返回要检查的可执行文件，相同的验证项只执行一次
+        """
+        probe = self.app.probe_registry.register(name, fn, label, config_keys, timeout, cost, executable)
+        if self._registered_probes is not None:
+            self._registered_probes.append({"name": probe.name, "label": probe.label,
+                                            "config_keys": list(probe.config_keys),
+                                            "timeout": probe.timeout, "cost": probe.cost})
+        return probe
+
+    @contextmanager
+    def recording_probes(self):
+        """记录代码块中注册的验证项声明 (写入插件索引，下次启动时不导入插件也能注册占位)."""
+        self._registered_probes = probes = []
+        try:
+            yield probes
+        finally:
+            self._registered_probes = None
+
+    def run_probes(self, names=None, on_result=None, on_complete=None):
+        """并行执行验证项，回调在 Tk 线程中执行"""
+        return self.app.probe_registry.run(self.app.config, names, on_result, on_complete)
+
+    def watch_path(self, path, callback):
+        """
+        监视文件或目录 (只包含直接子项)，变化时 (防抖后) 在 Tk 线程中调用 callback(paths).
+        插件重新加载或删除时自动取消订阅。返回订阅对象，可调用 cancel()。
+        """
+        watcher = getattr(self.app, "file_watcher", None)
+        if watcher is None:
+            raise RuntimeError("文件监视不可用")
+        return watcher.subscribe(path, callback)
+
+    def on_config_change(self, callback, keys=None):
+        """
+        config.json 被外部修改 (其他实例、脚本或手动编辑) 时在 Tk 线程中调用 callback(changed).
+        Args:
+            callback: changed 为 {配置键: 新值}，已删除的键值为 None
+            keys: 只关心的配置键，None 表示全部
+        Returns: 订阅对象，可调用 cancel()
+        """
+        listener = ConfigListener(self, callback, keys)
+        self._config_listeners.append(listener)
+        return listener
+
+    def notify_config_changed(self, changed):
+        """通知 on_config_change 的订阅者."""
+        for listener in list(self._config_listeners):
+            relevant = {key: value for key, value in changed.items() if listener.keys is None or key in listener.keys}
+            if relevant:
+                try:
+                    listener.callback(relevant)
+                except Exception as e:
+                    print(f"处理配置变化失败: {e}")
+
+    def drop_subscriptions(self, module_name):
+        """取消插件模块注册的文件和配置订阅 (插件重新加载或删除时调用)."""
+        self._config_listeners = [listener for listener in self._config_listeners
+                                  if getattr(listener.callback, "__module__", None) != module_name]
+        watcher = getattr(self.app, "file_watcher", None)
+        if watcher is not None:
+            watcher.unsubscribe_module(module_name)
 
     def validate_path(self, path):
         """
@@ -267,3 +535,117 @@ class PluginAPI:
         except Exception as e:
             print(f"创建目录失败: {e}")
             return False
+
+
+class ConfigListener:
+    """on_config_change 返回的订阅对象."""
+
+    def __init__(self, api, callback, keys):
+        self.api = api
+        self.callback = callback
+        self.keys = None if keys is None else set(keys)
+
+    def cancel(self):
+        if self in self.api._config_listeners:
+            self.api._config_listeners.remove(self)
+
+
+class PluginTransaction:
+    """PluginAPI.transaction() 暂存的一批修改."""
+
+    def __init__(self, api):
+        self.api = api
+        self._config_backup = {}  # 配置键 -> (是否存在, 旧值)
+        self._save_requested = False  # 事务中调用过 save_config (例如直接修改了 get_config() 返回的字典)
+        self._env_ops = {False: [], True: []}  # system_wide -> 按顺序暂存的操作
+
+    def stage_config(self, key):
+        """记录配置键修改前的值，用于回滚."""
+        if key not in self._config_backup:
+            config = self.api.app.config
+            self._config_backup[key] = (key in config, config.get(key))
+
+    def stage_env(self, system_wide, op):
+        self._env_ops[system_wide].append(op)
+
+    def staged_env_value(self, system_wide, name):
+        """返回事务内最后一次暂存的变量值，没有则返回 None."""
+        for op in reversed(self._env_ops[system_wide]):
+            if op[0] == "set" and op[1] == name:
+                return op[2]
+        return None
+
+    def rollback(self):
+        """撤销暂存的配置修改并丢弃环境变量操作."""
+        config = self.api.app.config
+        for key, (existed, value) in self._config_backup.items():
+            if existed:
+                config[key] = value
+            else:
+                config.pop(key, None)
+        self._config_backup.clear()
+        self._save_requested = False
+        self._env_ops = {False: [], True: []}
+
+    def commit(self):
+        """统一提交：每个作用域一次批量写入，一次配置写入，一次广播."""
+        store = self.api.env_store
+        applied = []  # (system_wide, 原始值) 用于失败时恢复
+        env_updates = {}
+        try:
+            for system_wide, ops in self._env_ops.items():
+                if not ops:
+                    continue
+                originals, changed = self._resolve_env_ops(store, system_wide, ops)
+                if not changed:
+                    continue
+                # 先记录原始值再写入，写到一半失败时这个作用域已写入的变量也能恢复
+                applied.append((system_wide, originals))
+                store.set_many(changed, system_wide)
+                env_updates.update(changed)
+        except Exception:
+            for system_wide, originals in applied:
+                try:
+                    store.set_many(originals, system_wide)
+                except Exception as e:
+                    print(f"回滚环境变量失败: {str(e)}")
+            self.rollback()
+            raise
+
+        os.environ.update(env_updates)
+        if self._config_backup or self._save_requested:
+            self.api.app.save_config()
+        if env_updates:
+            self.api._broadcast_env_update()
+
+    def _resolve_env_ops(self, store, system_wide, ops):
+        """一次读取涉及的变量并依次应用操作，返回 (原始值, 变化的新值)."""
+        names = {op[1] for op in ops if op[0] == "set"}
+        path_ops = [op for op in ops if op[0] != "set"]
+        if path_ops:
+            names.add('PATH')
+        originals = store.get_many(sorted(names), system_wide)
+        values = dict(originals)
+
+        paths = None
+        for op in ops:
+            if op[0] == "set":
+                if op[1] == 'PATH':
+                    paths = None
+                values[op[1]] = op[2]
+                continue
+            if paths is None:
+                paths = self.api.path_list(values['PATH'], system_wide)
+            if op[0] == "append_path":
+                paths.append(op[1])
+            elif op[0] == "remove_path":
+                paths.remove(op[1])
+            elif op[0] == "front_path":
+                paths.move_to_front(op[1])
+            elif op[0] == "dedupe_path":
+                paths.dedupe()
+            values['PATH'] = paths.serialize()
+
+        changed = {name: value for name, value in values.items()
+                   if value is not None and value != originals[name]}
+        return {name: originals[name] for name in changed}, changed
@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import glob
+import marshal
+import hashlib
+import tempfile
+import importlib.util
+import importlib.machinery
+
+
+class BytecodeCache:
+    """插件字节码缓存 (~/.systools/cache/bytecode).
+
+    以源码内容哈希和 Python 版本为键保存 marshal 数据，
+    插件目录的 __pycache__ 不可写或文件刚被复制时也无需重新编译。
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.stats = {}  # 插件文件名 -> 编译/加载耗时统计
+
+    def _cache_path(self, source_path, source):
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        digest = hashlib.sha256(source).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{stem}-{digest}.{sys.implementation.cache_tag}.pyc")
+
+    def _record(self, source_path, kind, seconds):
+        entry = self.stats.setdefault(os.path.basename(source_path), {
+            "compiles": 0,
+            "compile_time": 0.0,
+            "cache_loads": 0,
+            "cache_load_time": 0.0,
+        })
+        if kind == "compile":
+            entry["compiles"] += 1
+            entry["compile_time"] += seconds
+        else:
+            entry["cache_loads"] += 1
+            entry["cache_load_time"] += seconds
+
+    def get_code(self, source_path):
+        """返回插件的代码对象，优先从缓存加载."""
+        with open(source_path, "rb") as f:
+            source = f.read()
+        cache_path = self._cache_path(source_path, source)
+
+        start = time.perf_counter()
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+            if data[:4] == importlib.util.MAGIC_NUMBER:
+                code = marshal.loads(data[4:])
+                self._record(source_path, "load", time.perf_counter() - start)
+                return code
+        except (OSError, ValueError, EOFError, TypeError):
+            pass
+
+        start = time.perf_counter()
+        code = compile(source, source_path, "exec", dont_inherit=True)
+        self._record(source_path, "compile", time.perf_counter() - start)
+        self._store(cache_path, code)
+        return code
+
+    def _store(self, cache_path, code):
+        """原子写入缓存，并清理同一插件的旧缓存."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            stem = os.path.basename(cache_path).rsplit("-", 1)[0]
+            pattern = os.path.join(self.cache_dir, f"{glob.escape(stem)}-*.{sys.implementation.cache_tag}.pyc")
+            for old_path in glob.glob(pattern):
+                if old_path != cache_path and os.path.basename(old_path).rsplit("-", 1)[0] == stem:
+                    os.remove(old_path)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(importlib.util.MAGIC_NUMBER)
+                f.write(marshal.dumps(code))
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"写入插件字节码缓存失败: {e}")
+
+    def spec_from_file_location(self, module_name, source_path):
+        """创建使用本缓存加载代码的模块 spec."""
+        loader = CachedSourceLoader(module_name, source_path, self)
+        return importlib.util.spec_from_file_location(module_name, source_path, loader=loader)
+
+
+class CachedSourceLoader(importlib.machinery.SourceFileLoader):
+    """从 BytecodeCache 获取代码对象的源码加载器."""
+
+    def __init__(self, fullname, path, cache):
+        super().__init__(fullname, path)
+        self.cache = cache
+
+    def get_code(self, fullname):
+        return self.cache.get_code(self.path)
@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import ast
+import json
+import queue
+import hashlib
+import importlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from config_store import write_json_atomic
+from lazy_import import lazy_module
+
+# importlib.metadata 导入较慢 (约 30 ms)，只在检查依赖时才导入
+importlib_metadata = lazy_module("importlib.metadata")
+
+
+def read_plugin_metadata(plugin_path):
+    """不执行插件，从源码中读取模块级的 name、requires 以及是否定义了 gui."""
+    with open(plugin_path, "rb") as f:
+        tree = ast.parse(f.read(), filename=plugin_path)
+    metadata = {"name": None, "requires": [], "has_gui": False}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "gui":
+            metadata["has_gui"] = True
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if isinstance(target, ast.Name) and target.id in ("name", "requires"):
+                    try:
+                        value = ast.literal_eval(node.value)
+                    except ValueError:
+                        continue
+                    if target.id == "requires":
+                        value = [str(r) for r in value]
+                    metadata[target.id] = value
+    return metadata
+
+
+def requirement_name(requirement):
+    """从 "requests>=2.0" 这样的需求中取出分发包名称."""
+    return re.split(r"[\s<>=!~;\[(@]", requirement.strip(), maxsplit=1)[0]
+
+
+def _requirement_installed(requirement):
+    try:
+        installed = importlib_metadata.version(requirement_name(requirement))
+    except importlib_metadata.PackageNotFoundError:
+        return False
+    try:
+        from packaging.requirements import Requirement
+    except ImportError:
+        return True  # 没有 packaging 时只检查是否已安装
+    try:
+        return Requirement(requirement).specifier.contains(installed, prereleases=True)
+    except Exception:
+        return True
+
+
+class DependencyResolver:
+    """在后台从本地 wheel 目录 (~/.systools/wheels) 安装插件依赖.
+
+    安装使用 pip --no-index，完全离线。"已满足" 的结果按 Python 环境缓存在
+    cache_file 中，之后的启动无需再检查已安装的分发包。
+    on_done(ok, error) 通过 master.after 在 Tk 线程中调用。
+    """
+
+    def __init__(self, master, wheel_dir, cache_file, poll_interval=100):
+        self.master = master
+        self.wheel_dir = wheel_dir
+        self.cache_file = cache_file
+        self.poll_interval = poll_interval
+        self.env_key = hashlib.sha256(
+            f"{sys.executable}|{sys.prefix}|{sys.version}".encode("utf-8")).hexdigest()[:16]
+        self._satisfied = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plugin-deps")
+        self._results = queue.Queue()
+        self._callbacks = {}  # 需求元组 -> 回调列表
+        self._polling = False
+
+    def _load_cache(self):
+        if self._satisfied is None:
+            try:
+                with open(self.cache_file, "r") as f:
+                    self._satisfied = set(json.load(f).get(self.env_key, []))
+            except Exception:
+                self._satisfied = set()
+        return self._satisfied
+
+    def _save_cache(self):
+        try:
+            try:
+                with open(self.cache_file, "r") as f:
+                    data = json.load(f)
+            except Exception:
+                data = {}
+            data[self.env_key] = sorted(self._satisfied)
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            write_json_atomic(self.cache_file, data)
+        except Exception as e:
+            print(f"保存依赖缓存失败: {e}")
+
+    def is_satisfied(self, requires):
+        """检查依赖是否已满足，结果按环境缓存."""
+        satisfied = self._load_cache()
+        missing = [r for r in requires if r not in satisfied]
+        if not missing:
+            return True
+        if all(_requirement_installed(r) for r in missing):
+            satisfied.update(missing)
+            self._save_cache()
+            return True
+        return False
+
+    def forget(self, requires):
+        """依赖实际不可用时 (例如被卸载) 清除缓存."""
+        satisfied = self._load_cache()
+        if satisfied.intersection(requires):
+            satisfied.difference_update(requires)
+            self._save_cache()
+
+    def resolve(self, requires, on_done):
+        """在后台安装缺失的依赖."""
+        key = tuple(sorted(requires))
+        if key in self._callbacks:
+            self._callbacks[key].append(on_done)
+            return
+        self._callbacks[key] = [on_done]
+        self._executor.submit(self._install, key)
+        if not self._polling:
+            self._polling = True
+            self.master.after(self.poll_interval, self._poll)
+
+    def _install(self, requires):
+        missing = [r for r in requires if not _requirement_installed(r)]
+        if not missing:
+            self._results.put((requires, None))
+            return
+        if getattr(sys, "frozen", False):
+            # 打包后的 sys.executable 是程序本身，没有 pip，无法安装到内置的运行环境中
+            self._results.put((requires, f"缺少依赖 {', '.join(missing)}，打包版本不支持从 wheel 目录安装依赖"))
+            return
+        if not os.path.isdir(self.wheel_dir) or not os.listdir(self.wheel_dir):
+            self._results.put((requires, f"缺少依赖 {', '.join(missing)}，本地 wheel 目录为空: {self.wheel_dir}"))
+            return
+        command = [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--disable-pip-version-check",
+            "--no-index",
+            "--find-links", self.wheel_dir,
+        ] + missing
+        kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == 'nt' else {}
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, **kwargs)
+        except Exception as e:
+            self._results.put((requires, f"安装依赖失败: {e}"))
+            return
+        if result.returncode != 0:
+            self._results.put((requires, f"安装依赖失败: {result.stderr.strip() or result.stdout.strip()}"))
+            return
+        importlib.invalidate_caches()
+        self._results.put((requires, None))
+
+    def _poll(self):
+        while True:
+            try:
+                requires, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                self._load_cache().update(requires)
+                self._save_cache()
+            for callback in self._callbacks.pop(requires, []):
+                callback(error is None, error)
+        if self._callbacks:
+            self.master.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
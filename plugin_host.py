@@ -0,0 +1,363 @@
+import os
+import time
+import queue
+import itertools
+import threading
+import importlib.util
+import multiprocessing
+
+
+class _ApiMarker:
+    """参数中代表 PluginAPI 的占位符，在工作进程中替换为代理."""
+
+    def __reduce__(self):
+        return (_api_marker, ())
+
+
+API_MARKER = _ApiMarker()
+
+
+def _api_marker():
+    return API_MARKER
+
+
+# 允许从工作进程代理调用的 PluginAPI 方法: 参数和返回值都是可序列化的普通数据，
+# 不涉及回调、Tk 控件或主程序内部对象。其他方法 (包括新增的方法) 默认不可用。
+PROXY_ALLOWLIST = {
+    "get_config", "set_config", "save_config", "flush_config",
+    "get_config_cache_stats", "get_plugin_bytecode_stats", "get_env_broadcast_stats",
+    "get_env_var", "get_env_vars", "set_env_var", "set_env_vars",
+    "append_to_path", "insert_into_path", "move_to_front_of_path", "dedupe_path", "remove_from_path",
+    "which", "which_all", "get_path_shadowing", "detect_version",
+    "set_taskbar_progress", "trace_instant", "validate_path", "ensure_dir_exists",
+}
+
+
+def _memory_usage():
+    """返回当前进程的常驻内存 (字节)，无法获取时返回 None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    if os.name == 'nt':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            ctypes.windll.psapi.GetProcessMemoryInfo(
+                ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+            return counters.WorkingSetSize
+        except Exception:
+            return None
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return None
+
+
+class WorkerAPIProxy:
+    """工作进程中的 PluginAPI 代理，方法调用通过管道转发给主程序执行."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._request_ids = itertools.count(1)
+
+    def __getattr__(self, name):
+        if name not in PROXY_ALLOWLIST:
+            raise AttributeError(f"工作进程中不可用: {name}")
+
+        def call(*args, **kwargs):
+            request_id = next(self._request_ids)
+            self._conn.send(("api", request_id, name, args, kwargs))
+            while True:
+                message = self._conn.recv()
+                if message[0] == "api_result" and message[1] == request_id:
+                    break
+            _, _, ok, value = message
+            if not ok:
+                raise RuntimeError(value)
+            return value
+
+        return call
+
+
+def _worker_main(conn):
+    """工作进程入口：循环执行主程序发来的插件函数调用."""
+    modules = {}
+    api = WorkerAPIProxy(conn)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message[0] == "stop":
+            break
+        if message[0] != "call":
+            continue
+
+        _, call_id, plugin_path, func_name, args, kwargs = message
+        cpu_start = time.process_time()
+        try:
+            module = modules.get(plugin_path)
+            if module is None:
+                module_name = os.path.splitext(os.path.basename(plugin_path))[0]
+                spec = importlib.util.spec_from_file_location(module_name, plugin_path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                modules[plugin_path] = module
+            args = [api if arg is API_MARKER else arg for arg in args]
+            kwargs = {k: api if v is API_MARKER else v for k, v in kwargs.items()}
+            ok, value = True, getattr(module, func_name)(*args, **kwargs)
+        except BaseException as e:
+            ok, value = False, f"{type(e).__name__}: {e}"
+        stats = {"cpu_time": time.process_time() - cpu_start, "memory": _memory_usage()}
+        try:
+            conn.send(("result", call_id, ok, value, stats))
+        except Exception as e:
+            conn.send(("result", call_id, False, f"返回值无法序列化: {e}", stats))
+
+
+class WorkerCall:
+    """提交到插件宿主进程的一次调用."""
+
+    def __init__(self, call_id, plugin_path, func_name, args, kwargs, on_done, on_error, timeout):
+        self.call_id = call_id
+        self.plugin_path = plugin_path
+        self.plugin = os.path.basename(plugin_path)
+        self.func_name = func_name
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.timeout = timeout
+        self.started = None
+        self.worker = None
+        self.finished = False
+
+    def __repr__(self):
+        return f"<WorkerCall {self.plugin}:{self.func_name} #{self.call_id}>"
+
+
+class PluginWorker:
+    """一个插件工作进程及其管道读取线程."""
+
+    def __init__(self, context, incoming):
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.call = None
+        self._incoming = incoming
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                self._incoming.put((self, ("exit",)))
+                break
+            self._incoming.put((self, message))
+
+    def send(self, message):
+        self.conn.send(message)
+
+    def kill(self):
+        try:
+            self.process.kill()
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class PluginHost:
+    """插件宿主：在工作进程池中执行插件的非 GUI 任务.
+
+    插件函数在独立进程中运行，通过管道 RPC 调用主程序的 PluginAPI，
+    调用和回调 (on_done/on_error) 都在 Tk 线程中处理。
+    挂起的工作进程可以单独终止，不影响主程序。
+    """
+
+    def __init__(self, api, master, size=2, poll_interval=20):
+        self.api = api
+        self.master = master
+        self.size = size
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context("spawn")
+        self._incoming = queue.Queue()
+        self._queue = []
+        self._workers = []
+        self._calls = {}
+        self._call_ids = itertools.count(1)
+        self._polling = False
+        self.stats = {}  # 插件文件名 -> {"calls", "cpu_time", "memory"}
+
+    def submit(self, func, *args, on_done=None, on_error=None, timeout=None, **kwargs):
+        """在工作进程中执行插件模块的函数 func."""
+        plugin_path = func.__globals__.get("__file__")
+        if not plugin_path:
+            raise ValueError("只能提交插件模块中定义的函数")
+        args = tuple(API_MARKER if arg is self.api else arg for arg in args)
+        kwargs = {k: API_MARKER if v is self.api else v for k, v in kwargs.items()}
+        call = WorkerCall(next(self._call_ids), plugin_path, func.__name__, args, kwargs,
+                          on_done, on_error, timeout)
+        self._calls[call.call_id] = call
+        self._queue.append(call)
+        self._dispatch()
+        self._ensure_polling()
+        return call
+
+    def _dispatch(self):
+        while self._queue:
+            worker = next((w for w in self._workers if w.call is None), None)
+            if worker is None:
+                if len(self._workers) >= self.size:
+                    return
+                worker = PluginWorker(self._context, self._incoming)
+                self._workers.append(worker)
+            call = self._queue.pop(0)
+            call.worker = worker
+            call.started = time.perf_counter()
+            worker.call = call
+            try:
+                worker.send(("call", call.call_id, call.plugin_path, call.func_name, call.args, call.kwargs))
+            except Exception as e:
+                worker.call = None
+                self._finish(call, False, f"无法发送调用: {e}")
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.master.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                worker, message = self._incoming.get_nowait()
+            except queue.Empty:
+                break
+            self._handle(worker, message)
+
+        now = time.perf_counter()
+        for worker in list(self._workers):
+            call = worker.call
+            if call and call.timeout and now - call.started > call.timeout:
+                self.kill_worker(worker, f"执行超过 {call.timeout:g} 秒，工作进程已终止")
+
+        self._dispatch()
+        if self._queue or any(w.call for w in self._workers):
+            self.master.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _handle(self, worker, message):
+        kind = message[0]
+        if kind == "api":
+            _, request_id, method, args, kwargs = message
+            try:
+                if method not in PROXY_ALLOWLIST:
+                    raise AttributeError(f"不允许代理调用: {method}")
+                ok, value = True, getattr(self.api, method)(*args, **kwargs)
+            except Exception as e:
+                ok, value = False, f"{type(e).__name__}: {e}"
+            try:
+                worker.send(("api_result", request_id, ok, value))
+            except Exception as e:
+                # 返回值无法序列化时也要回复，否则工作进程会一直等待结果
+                try:
+                    worker.send(("api_result", request_id, False, f"{method} 的返回值无法序列化: {e}"))
+                except Exception as e:
+                    print(f"返回插件 API 调用结果失败: {e}")
+        elif kind == "result":
+            _, call_id, ok, value, stats = message
+            call = self._calls.get(call_id)
+            worker.call = None
+            if call is not None:
+                self._record(call, stats)
+                self._finish(call, ok, value)
+        elif kind == "exit":
+            if worker in self._workers:
+                self._workers.remove(worker)
+                if worker.call is not None:
+                    code = worker.process.exitcode
+                    self._finish(worker.call, False, f"工作进程异常退出 (exit code {code})")
+                    worker.call = None
+
+    def _record(self, call, stats):
+        entry = self.stats.setdefault(call.plugin, {"calls": 0, "cpu_time": 0.0, "memory": None})
+        entry["calls"] += 1
+        entry["cpu_time"] += stats.get("cpu_time") or 0.0
+        if stats.get("memory") is not None:
+            entry["memory"] = stats["memory"]
+
+    def _finish(self, call, ok, value):
+        if call.finished:
+            return
+        call.finished = True
+        self._calls.pop(call.call_id, None)
+        callback = call.on_done if ok else call.on_error
+        if callback is not None:
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"插件回调执行失败: {e}")
+        elif not ok:
+            print(f"插件任务 {call} 失败: {value}")
+
+    def kill(self, call, reason="任务已被终止"):
+        """终止执行 call 的工作进程 (或从队列中移除尚未开始的调用)."""
+        if call in self._queue:
+            self._queue.remove(call)
+            self._finish(call, False, reason)
+        elif call.worker is not None and call.worker.call is call:
+            self.kill_worker(call.worker, reason)
+
+    def kill_worker(self, worker, reason="工作进程已被终止"):
+        """强制结束工作进程，进程池会按需重新创建."""
+        if worker in self._workers:
+            self._workers.remove(worker)
+        worker.kill()
+        if worker.call is not None:
+            self._finish(worker.call, False, reason)
+            worker.call = None
+        self._dispatch()
+
+    def running_calls(self):
+        return [w.call for w in self._workers if w.call is not None]
+
+    def shutdown(self):
+        """停止所有工作进程."""
+        for call in list(self._queue):
+            self._finish(call, False, "插件宿主已关闭")
+        self._queue.clear()
+        for worker in list(self._workers):
+            try:
+                worker.send(("stop",))
+            except Exception:
+                pass
+            worker.process.join(timeout=0.5)
+            worker.kill()
+        self._workers.clear()
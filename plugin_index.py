@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+
+from config_store import write_json_atomic
+
+
+def file_hash(path):
+    """计算文件内容的 sha256."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class PluginHandle:
+    """已安装插件的句柄，模块在首次使用时才导入."""
+
+    def __init__(self, name, path, file_hash, has_gui, module=None, requires=(), probes=()):
+        self.name = name
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.file_hash = file_hash
+        self.has_gui = has_gui
+        self.module = module
+        self.requires = list(requires)  # 插件声明的依赖
+        self.probes = list(probes)  # 插件在 register() 中注册的验证项声明 {"name", "label", "config_keys", "timeout", "cost"}
+        self.pending = False  # 依赖尚未就绪
+
+    @property
+    def loaded(self):
+        return self.module is not None
+
+    def __repr__(self):
+        state = "pending" if self.pending else "loaded" if self.loaded else "lazy"
+        return f"<PluginHandle {self.name!r} {self.filename} {state}>"
+
+
+class PluginIndex:
+    """plugins.json 旁的插件清单索引 (plugins_index.json).
+
+    记录每个插件文件的名称、内容哈希、依赖、注册的验证项声明以及是否提供 gui，
+    启动时据此创建按钮和验证项占位，无需执行插件模块。
+    """
+
+    def __init__(self, index_file):
+        self.index_file = index_file
+        self.entries = {}
+        self._dirty = False
+
+    def load(self):
+        try:
+            with open(self.index_file, "r") as f:
+                self.entries = json.load(f)
+        except Exception:
+            self.entries = {}
+        self._dirty = False
+        return self
+
+    def current_hash(self, plugin_path):
+        """返回插件文件的内容哈希，文件的 mtime 和大小未变时复用索引中的值."""
+        st = os.stat(plugin_path)
+        entry = self.entries.get(os.path.basename(plugin_path))
+        if entry and entry.get("mtime") == st.st_mtime_ns and entry.get("size") == st.st_size:
+            return entry["hash"]
+        return file_hash(plugin_path)
+
+    def lookup(self, plugin_path):
+        """索引与文件内容一致时返回插件句柄，否则返回 None."""
+        entry = self.entries.get(os.path.basename(plugin_path))
+        if not entry or not all(isinstance(probe, dict) for probe in entry.get("probes", [None])):
+            return None  # 没有记录验证项声明的旧索引条目也需要重新导入
+        try:
+            if self.current_hash(plugin_path) != entry["hash"]:
+                return None
+        except OSError:
+            return None
+        return PluginHandle(entry["name"], plugin_path, entry["hash"], entry["has_gui"],
+                            requires=entry.get("requires", []), probes=entry["probes"])
+
+    def update(self, handle):
+        """用已导入的插件句柄更新索引."""
+        st = os.stat(handle.path)
+        entry = {
+            "name": handle.name,
+            "hash": handle.file_hash,
+            "has_gui": handle.has_gui,
+            "requires": handle.requires,
+            "probes": handle.probes,
+            "mtime": st.st_mtime_ns,
+            "size": st.st_size,
+        }
+        if self.entries.get(handle.filename) != entry:
+            self.entries[handle.filename] = entry
+            self._dirty = True
+
+    def remove(self, filename):
+        if self.entries.pop(filename, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """索引有变化时原子写入."""
+        if not self._dirty:
+            return
+        try:
+            write_json_atomic(self.index_file, self.entries)
+            self._dirty = False
+        except Exception as e:
+            print(f"更新插件索引失败: {e}")
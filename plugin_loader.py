@@ -0,0 +1,82 @@
+import os
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PluginImportTimeout(Exception):
+    """插件导入超时."""
+
+
+class ParallelPluginLoader:
+    """在线程池中并行导入插件模块，结果回到 Tk 线程处理.
+
+    import_func 在工作线程中执行，on_result(path, module, error, duration)
+    和 on_complete() 通过 master.after 在 Tk 线程中调用，
+    因此可以在其中调用 register() 和创建按钮。
+    """
+
+    def __init__(self, master, import_func, max_workers=4, timeout=15.0, poll_interval=20):
+        self.master = master
+        self.import_func = import_func
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def load(self, plugin_paths, on_result, on_complete):
+        """开始导入 plugin_paths 中的插件."""
+        plugin_paths = list(plugin_paths)
+        if not plugin_paths:
+            on_complete()
+            return
+
+        results = queue.Queue()
+        started = {}
+        pending = set(plugin_paths)
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(plugin_paths)),
+                                      thread_name_prefix="plugin-import")
+
+        def run(path):
+            start = time.perf_counter()
+            started[path] = start
+            try:
+                module = self.import_func(path)
+                results.put((path, module, None, time.perf_counter() - start))
+            except BaseException as e:
+                results.put((path, None, e, time.perf_counter() - start))
+
+        for path in plugin_paths:
+            executor.submit(run, path)
+        # 不等待超时的线程，它们结束后结果会被丢弃
+        executor.shutdown(wait=False)
+
+        def poll():
+            while True:
+                try:
+                    path, module, error, duration = results.get_nowait()
+                except queue.Empty:
+                    break
+                if path in pending:
+                    pending.discard(path)
+                    on_result(path, module, error, duration)
+
+            now = time.perf_counter()
+            for path in list(pending):
+                start = started.get(path)
+                if start is not None and now - start > self.timeout:
+                    pending.discard(path)
+                    error = PluginImportTimeout(f"导入超过 {self.timeout:g} 秒")
+                    on_result(path, None, error, now - start)
+
+            if pending:
+                self.master.after(self.poll_interval, poll)
+            else:
+                on_complete()
+
+        poll()
+
+
+def format_slowest(import_times, limit=3):
+    """格式化导入最慢的几个插件，例如 "gradle_plugin 120ms"."""
+    slowest = sorted(import_times.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return ", ".join(f"{os.path.splitext(name)[0]} {seconds * 1000:.0f}ms" for name, seconds in slowest)
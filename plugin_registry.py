@@ -0,0 +1,110 @@
+import json
+from contextlib import contextmanager
+
+from config_store import write_json_atomic
+
+
+class PluginRegistry:
+    """内存中的插件注册表.
+
+    plugins.json 只在启动时读取一次，之后的增删都在内存中完成，
+    并在一批操作 (启动、安装、移除) 结束时原子写入一次。
+    已加载的插件句柄按名称和文件名建立索引。
+    """
+
+    def __init__(self, plugins_json, plugin_index):
+        self.plugins_json = plugins_json
+        self.plugin_index = plugin_index
+        self.filenames = []  # plugins.json 中的插件文件名，保持顺序
+        self._by_name = {}
+        self._by_filename = {}
+        self._batch_depth = 0
+        self._dirty = False
+
+    def load(self):
+        """从 plugins.json 读取插件文件列表."""
+        try:
+            with open(self.plugins_json, "r") as f:
+                filenames = json.load(f)
+        except Exception:
+            filenames = []
+        # 去重并保持顺序
+        self.filenames = list(dict.fromkeys(filenames))
+        self._dirty = False
+        self.clear_handles()
+        return self
+
+    def __iter__(self):
+        return iter(list(self._by_filename.values()))
+
+    def __len__(self):
+        return len(self._by_filename)
+
+    def clear_handles(self):
+        """清空已加载的插件句柄 (不修改 plugins.json)."""
+        self._by_name.clear()
+        self._by_filename.clear()
+
+    def find_by_name(self, name):
+        return self._by_name.get(name)
+
+    def find_by_filename(self, filename):
+        return self._by_filename.get(filename)
+
+    def add(self, handle):
+        """登记插件句柄，并在需要时加入 plugins.json."""
+        self._by_name[handle.name] = handle
+        self._by_filename[handle.filename] = handle
+        if handle.filename not in self.filenames:
+            self.filenames.append(handle.filename)
+            self._mark_dirty()
+
+    def remove(self, handle):
+        """移除插件句柄及其 plugins.json 条目."""
+        if self._by_name.get(handle.name) is handle:
+            del self._by_name[handle.name]
+        if self._by_filename.get(handle.filename) is handle:
+            del self._by_filename[handle.filename]
+        if handle.filename in self.filenames:
+            self.filenames.remove(handle.filename)
+            self._mark_dirty()
+        self.plugin_index.remove(handle.filename)
+
+    def rename(self, handle, old_name):
+        """插件名称变化后更新名称索引."""
+        if self._by_name.get(old_name) is handle:
+            del self._by_name[old_name]
+        self._by_name[handle.name] = handle
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if self._batch_depth == 0:
+            self.save()
+
+    def begin_batch(self):
+        self._batch_depth += 1
+
+    def end_batch(self):
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.save()
+
+    @contextmanager
+    def batch(self):
+        """批量修改，结束时统一持久化."""
+        self.begin_batch()
+        try:
+            yield self
+        finally:
+            self.end_batch()
+
+    def save(self):
+        """原子写入 plugins.json 和插件索引."""
+        if self._dirty:
+            try:
+                write_json_atomic(self.plugins_json, self.filenames)
+                self._dirty = False
+                print("plugins.json 更新成功")
+            except Exception as e:
+                print(f"更新 plugins.json 失败: {e}")
+        self.plugin_index.save()
@@ -1,45 +1,20 @@
 import os
-import sys
-import subprocess
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import importlib
-import importlib.util
 
 name = "Gradle 配置"
 
-def is_module_installed(module_name):
-    """检查模块是否已安装"""
-    return importlib.util.find_spec(module_name) is not None
+# 插件依赖，由主程序在后台从本地 wheel 目录安装后再导入本插件
+requires = ["requests"]
 
-def install_module(module_name):
-    """安装指定的模块"""
-    try:
-        subprocess.check_call([
-            sys.executable, 
-            "-m", 
-            "pip", 
-            "install", 
-            "--disable-pip-version-check",
-            module_name
-        ])
-        return True
-    except subprocess.CalledProcessError:
-        return False
-
-# 检查并安装 requests
-if not is_module_installed('requests'):
-    print("Installing requests module...")
-    if not install_module('requests'):
-        raise ImportError("Failed to install requests module")
-    # 重新加载 sys.modules 缓存
-    importlib.invalidate_caches()
-
-# 现在安全地导入 requests
-import requests
 import zipfile
 import json
 
+from lazy_import import lazy_module
+
+# 只在下载时才导入 requests
+requests = lazy_module("requests")
+
 GRADLE_VERSIONS_URL = "https://services.gradle.org/versions/all"
 DEFAULT_GRADLE_HOME = os.path.expanduser("~/.gradle")
 GRADLE_BIN_NAME = "bin" if os.name == 'nt' else "bin/gradle"
@@ -62,10 +37,13 @@ def download_gradle(version, target_path, plugin_api):
     total_size = int(response.headers.get('content-length', 0))
     block_size = 8192
     downloaded = 0
+    task = plugin_api.current_task()  # 在后台任务中运行时用于检查取消
     
     try:
         with open(zip_path, 'wb') as f:
             for chunk in response.iter_content(chunk_size=block_size):
+                if task is not None:
+                    task.raise_if_cancelled()
                 if chunk:
                     f.write(chunk)
                     downloaded += len(chunk)
@@ -73,6 +51,8 @@ def download_gradle(version, target_path, plugin_api):
                     if total_size:
                         progress = int((downloaded / total_size) * 100)
                         plugin_api.set_taskbar_progress(progress, "normal")
+                        if task is not None:
+                            task.report_progress(progress)
         
         plugin_api.set_taskbar_progress(100, "normal")
         
@@ -87,17 +67,11 @@ def download_gradle(version, target_path, plugin_api):
         plugin_api.set_taskbar_progress(100, "error")  # 显示错误状态
         raise e
 
-def get_remote_versions():
-    """获取远程可用的 Gradle 版本."""
-    try:
-        response = requests.get(GRADLE_VERSIONS_URL)
-        versions = response.json()
-        return [v['version'] for v in versions if not v.get('snapshot')]
-    except Exception as e:
-        print(f"获取远程版本失败: {e}")
-        return []
-
-
+async def fetch_remote_versions(api):
+    """异步获取远程可用的 Gradle 版本 (在 api 的 asyncio 事件循环中运行)."""
+    response = await api.aio.http_get(GRADLE_VERSIONS_URL)
+    response.raise_for_status()
+    return [v['version'] for v in response.json() if not v.get('snapshot')]
 
 def remove_gradle_version(version_path, api):
     """删除指定的Gradle版本"""
@@ -105,8 +79,9 @@ def remove_gradle_version(version_path, api):
         # 如果是当前激活的版本，先清除环境变量
         current_gradle_home = api.get_env_var("GRADLE_HOME")
         if (current_gradle_home == version_path):
-            api.set_env_var("GRADLE_HOME", "")
-            api.remove_from_path(f"%GRADLE_HOME%\\bin")
+            with api.transaction():
+                api.set_env_var("GRADLE_HOME", "")
+                api.remove_from_path(f"%GRADLE_HOME%\\bin")
             
         # 删除文件夹
         if os.path.exists(version_path):
@@ -124,14 +99,13 @@ def get_local_versions(config):
 def set_active_version(version_path, api):
     """设置活动版本到系统环境变量."""
     try:
-        # 设置 GRADLE_HOME 环境变量
-        if not api.set_env_var("GRADLE_HOME", version_path):
-            return False
-            
-        # 将bin目录添加到PATH，使用GRADLE_HOME作为父变量
-        if not api.append_to_path(version_path, parent_var="GRADLE_HOME"):
-            return False
-            
+        # 在一个事务中提交：一次注册表写入、一次配置保存、一次广播
+        with api.transaction():
+            # 设置 GRADLE_HOME 环境变量
+            api.set_env_var("GRADLE_HOME", version_path)
+            # 将bin目录添加到PATH，使用GRADLE_HOME作为父变量
+            api.append_to_path(version_path, parent_var="GRADLE_HOME")
+            api.set_config("gradle_active_version", version_path, silent=True)
         return True
     except Exception as e:
         print(f"设置环境变量失败: {str(e)}")
@@ -145,28 +119,20 @@ def register(api):
     if "gradle_home" not in config:
         config["gradle_home"] = DEFAULT_GRADLE_HOME
 
-def verify_gradle_version():
-    """验证当前系统的 Gradle 版本."""
-    try:
-        # 使用 plugin_api 获取 GRADLE_HOME
-        gradle_home = plugin_api.get_env_var("GRADLE_HOME")
-        if not gradle_home:
-            return "未找到GRADLE_HOME环境变量"
-            
-        gradle_exec = os.path.join(gradle_home, "bin", "gradle.bat" if os.name == 'nt' else "gradle")
-        if not os.path.exists(gradle_exec):
-            return f"Gradle可执行文件不存在: {gradle_exec}"
-            
-        env = os.environ.copy()  # 创建环境变量副本
-        result = subprocess.run([gradle_exec, '--version'], 
-                            capture_output=True,
-                            text=True,
-                            env=env)
-        if result.returncode != 0:
-            return f"验证失败: {result.stderr}"
-        return result.stdout
-    except Exception as e:
-        return f"验证失败: {str(e)}\n请确保已正确设置Gradle环境变量"
+    # 在“环境功能验证”区域中验证当前 Gradle 版本
+    def active_gradle_home(config):
+        return config.get("gradle_active_version") or api.get_env_var("GRADLE_HOME")
+
+    def gradle_executable(config):
+        gradle_home = active_gradle_home(config)
+        return gradle_home and os.path.join(gradle_home, "bin", "gradle.bat" if os.name == 'nt' else "gradle")
+
+    api.register_probe(
+        "gradle",
+        lambda context: api.detect_version("gradle", active_gradle_home(context.config),
+                                           timeout=context.timeout, run=context.run),
+        label="Gradle", config_keys=("gradle_active_version",), timeout=60, cost="jvm",
+        executable=gradle_executable)
 
 def gui(master, context):
     """插件 GUI 界面."""
@@ -200,8 +166,6 @@ def gui(master, context):
         if selection:
             version_path = local_versions[selection[0]]
             if set_active_version(version_path, plugin_api):
-                # 静默更新配置
-                plugin_api.set_config("gradle_active_version", version_path, silent=True)
                 messagebox.showinfo("成功", "Gradle 环境变量已设置")
             else:
                 messagebox.showerror("错误", "设置环境变量失败")
@@ -260,25 +224,31 @@ def gui(master, context):
     remote_list.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     def refresh_remote_versions():
-        """刷新远程版本列表"""
+        """刷新远程版本列表 (后台获取)"""
         remote_list.delete(0, tk.END)
-        versions = get_remote_versions()
-        for version in versions:
-            remote_list.insert(tk.END, version)
+        remote_list.insert(tk.END, "正在获取版本列表...")
+
+        def on_done(versions):
+            remote_list.delete(0, tk.END)
+            for version in versions:
+                remote_list.insert(tk.END, version)
+
+        def on_error(e):
+            remote_list.delete(0, tk.END)
+            print(f"获取远程版本失败: {e}")
+
+        plugin_api.run_async(fetch_remote_versions(plugin_api), on_done=on_done, on_error=on_error)
 
     def download_selected():
-        """下载选中的版本"""
+        """下载选中的版本 (后台下载)"""
         selection = remote_list.curselection()
         if selection:
             version = remote_list.get(selection)
             install_path = gradle_path_var.get()
             
             print(f"准备下载 Gradle {version} 到 {install_path}")
-            
-            try:
-                # ...existing download code...
-                gradle_path = download_gradle(version, install_path, plugin_api)
-                
+
+            def on_done(gradle_path):
                 print(f"Gradle {version} 下载完成，保存到: {gradle_path}")
                 local_versions = get_local_versions(plugin_api.get_config())
                 local_versions.append(gradle_path)
@@ -287,12 +257,15 @@ def gui(master, context):
                 version_list.insert(tk.END, gradle_path)
                 
                 messagebox.showinfo("成功", f"Gradle {version} 已成功下载到 {gradle_path}")
-                
-            except Exception as e:
+
+            def on_error(e):
                 error_msg = f"下载失败: {str(e)}"
                 print(f"错误: {error_msg}")
                 messagebox.showerror("错误", error_msg)
 
+            plugin_api.run_in_background(download_gradle, version, install_path, plugin_api,
+                                         on_done=on_done, on_error=on_error)
+
     # 远程版本管理按钮
     button_frame = ttk.Frame(remote_frame)
     button_frame.pack(pady=5)
@@ -308,12 +281,19 @@ def gui(master, context):
 
     def verify_version():
         verify_text.delete(1.0, tk.END)
-        # 将 plugin_api 传递给验证函数
-        result = verify_gradle_version()
-        verify_text.insert(tk.END, result)
-        # 如果验证失败，显示提示
-        if "验证失败" in result or "不存在" in result:
-            messagebox.showwarning("警告", "Gradle验证失败，请确保已正确设置环境变量并重启终端")
+        verify_text.insert(tk.END, "正在验证...")
+
+        # 与“环境功能验证”区域共用 gradle 验证项及其缓存
+        def on_result(probe_name, result, error, duration, cached):
+            verify_text.delete(1.0, tk.END)
+            if error is None:
+                version, source, executable = result
+                verify_text.insert(tk.END, f"Gradle {version}\n可执行文件: {executable}\n来源: {source}\n")
+            else:
+                verify_text.insert(tk.END, f"验证失败: {error}\n请确保已正确设置Gradle环境变量")
+                messagebox.showwarning("警告", "Gradle验证失败，请确保已正确设置环境变量并重启终端")
+
+        plugin_api.run_probes(["gradle"], on_result=on_result)
 
     ttk.Button(verify_frame, text="验证当前版本", 
                command=verify_version).pack(pady=5)
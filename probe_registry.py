@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from task_scheduler import CancellationToken, TaskCancelled
+
+# 开销等级，数值越小越慢，越先启动
+COST_CLASSES = {"network": 0, "jvm": 1, "spawn": 2, "metadata": 3}
+
+
+def kill_process(process):
+    """终止进程并关闭管道 (子进程可能仍持有管道，不等待读完输出)."""
+    process.kill()
+    try:
+        process.wait(timeout=1)
+    except subprocess.TimeoutExpired:
+        pass
+    for pipe in (process.stdout, process.stderr):
+        try:
+            pipe.close()
+        except Exception:
+            pass
+
+
+def run_command(command, timeout=None, token=None):
+    """
+    执行命令并返回 CompletedProcess.
+    超过 timeout 秒时终止进程并抛出 subprocess.TimeoutExpired；
+    token 被取消时终止进程并抛出 TaskCancelled。
+    """
+    kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == 'nt' else {}  # Windows 系统隐藏控制台窗口
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **kwargs)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            if token is not None and token.cancelled:
+                kill_process(process)
+                raise TaskCancelled()
+            if deadline is not None and time.monotonic() > deadline:
+                kill_process(process)
+                raise subprocess.TimeoutExpired(command, timeout)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
+
+class Probe:
+    """一个已注册的验证项."""
+
+    def __init__(self, name, fn, label=None, config_keys=(), timeout=10, cost="spawn", executable=None):
+        if cost not in COST_CLASSES:
+            raise ValueError(f"未知的开销等级: {cost}")
+        self.name = name
+        self.fn = fn
+        self.label = label or name
+        self.config_keys = tuple(config_keys)
+        self.timeout = timeout
+        self.cost = cost
+        self.executable = executable
+
+    def __repr__(self):
+        return f"<Probe {self.name}>"
+
+
+class ProbeContext:
+    """传给验证函数的参数: 配置、超时和取消标记."""
+
+    def __init__(self, config, timeout, token):
+        self.config = config
+        self.timeout = timeout
+        self.token = token
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+    def raise_if_cancelled(self):
+        self.token.raise_if_cancelled()
+
+    def run(self, command, timeout=None):
+        """执行命令，遵守验证项的超时并响应取消."""
+        return run_command(command, timeout or self.timeout, self.token)
+
+
+class ProbeRun:
+    """一次验证的执行状态."""
+
+    def __init__(self, names):
+        self.names = names
+        self.results = {}  # 名称 -> (结果, 异常, 耗时, 是否来自缓存)
+        self.token = CancellationToken()
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self._futures = []
+
+    @property
+    def done(self):
+        return len(self.results) == len(self.names)
+
+    def cancel(self):
+        """取消尚未完成的验证项，正在执行的命令会被终止."""
+        self.token.cancel()
+        for future, cancelled in self._futures:
+            if future.cancel():
+                cancelled()
+
+
+class ProbeRegistry:
+    """验证项注册表和并行执行引擎.
+
+    内置模块和插件用 register() 注册验证项，run() 在有界线程池中并行执行：
+    慢的验证项先启动，使用同一可执行文件的验证项只执行一次，
+    成功的结果缓存到相关配置项或 PATH 变化为止。回调在 Tk 线程中执行。
+    """
+
+    def __init__(self, scheduler, max_workers=8):
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self._probes = {}
+        self._cache = {}  # 名称 -> (指纹, 结果, 耗时)
+        self._listeners = []
+        self._executor = None
+
+    def register(self, name, fn, label=None, config_keys=(), timeout=10, cost="spawn", executable=None):
+        """
+        注册验证项.
+        Args:
+            fn: fn(context) 在线程池中执行，返回结果或抛出异常；执行命令应使用 context.run()
+            config_keys: 结果依赖的配置项，这些配置或 PATH 变化时缓存失效
+            timeout: 超时时间 (秒)
+            cost: 开销等级 "metadata"、"spawn"、"jvm" 或 "network"
+            executable: executable(config) 返回要检查的可执行文件，相同时只执行一次
+        """
+        probe = Probe(name, fn, label, config_keys, timeout, cost, executable)
+        self._probes[name] = probe
+        self._cache.pop(name, None)
+        for listener, _ in list(self._listeners):
+            listener(probe)
+        return probe
+
+    def unregister(self, name):
+        probe = self._probes.pop(name, None)
+        self._cache.pop(name, None)
+        if probe is not None:
+            for _, on_unregister in list(self._listeners):
+                if on_unregister is not None:
+                    on_unregister(probe)
+
+    def get(self, name):
+        return self._probes.get(name)
+
+    def probes(self):
+        return list(self._probes.values())
+
+    def add_listener(self, listener, on_unregister=None):
+        """注册新验证项时调用 listener(probe)，注销时调用 on_unregister(probe)."""
+        self._listeners.append((listener, on_unregister))
+
+    def remove_listener(self, listener):
+        self._listeners = [entry for entry in self._listeners if entry[0] != listener]
+
+    def invalidate(self, name=None):
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+    @staticmethod
+    def resolve_executable(probe, config):
+        """返回验证项要检查的可执行文件 (绝对路径)，没有或无法确定时返回 None."""
+        if probe.executable is None:
+            return None
+        try:
+            executable = probe.executable(config)
+        except Exception:
+            return None
+        return os.path.normcase(os.path.realpath(executable)) if executable else None
+
+    @staticmethod
+    def fingerprint(probe, config, executable=None):
+        """
+        缓存键: 相关配置项、PATH 和解析出的可执行文件.
+        可执行文件还取决于配置之外的状态 (例如 GRADLE_HOME 环境变量)，变化时缓存同样失效。
+        """
+        values = [config.get(key) for key in probe.config_keys]
+        return json.dumps(values, sort_keys=True, default=str), os.environ.get('PATH', ''), executable
+
+    def run(self, config, names=None, on_result=None, on_complete=None, use_cache=True):
+        """
+        并行执行验证项 (默认全部).
+        on_result(name, result, error, duration, cached) 在每个结果到达时调用，
+        on_complete(run) 在全部完成后调用。返回 ProbeRun，可调用 cancel()。
+        """
+        probes = [self._probes[name] for name in (names or self._probes) if name in self._probes]
+        probe_run = ProbeRun([probe.name for probe in probes])
+        groups = {}
+        for probe in probes:
+            executable = self.resolve_executable(probe, config)
+            fingerprint = self.fingerprint(probe, config, executable)
+            cached = self._cache.get(probe.name) if use_cache else None
+            if cached is not None and cached[0] == fingerprint:
+                self.scheduler.call_soon(self._finish, probe_run, [(probe, fingerprint)], cached[1], None,
+                                         cached[2], True, on_result, on_complete)
+                continue
+            key = ("executable", executable) if executable else ("probe", probe.name)
+            groups.setdefault(key, []).append((probe, fingerprint))
+
+        if groups and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="probe")
+        # 慢的先启动，总耗时取决于最慢的验证项
+        ordered = sorted(groups.values(), key=lambda group: min(COST_CLASSES[p.cost] for p, _ in group))
+        for group in ordered:
+            leader = group[0][0]
+            context = ProbeContext(config, max(p.timeout for p, _ in group), probe_run.token)
+
+            def job(leader=leader, context=context, group=group):
+                start = time.perf_counter()
+                timers = self._start_timeouts(probe_run, group, on_result, on_complete)
+                try:
+                    context.raise_if_cancelled()
+                    result, error = leader.fn(context), None
+                except BaseException as e:
+                    result, error = None, e
+                for timer in timers:
+                    timer.cancel()
+                self.scheduler.call_soon(self._finish, probe_run, group, result, error,
+                                         time.perf_counter() - start, False, on_result, on_complete)
+
+            def cancelled(group=group):
+                self.scheduler.call_soon(self._finish, probe_run, group, None, TaskCancelled(), 0.0,
+                                         False, on_result, on_complete)
+
+            probe_run._futures.append((self._executor.submit(job), cancelled))
+
+        if not probes and on_complete is not None:
+            probe_run.elapsed = 0.0
+            self.scheduler.call_soon(on_complete, probe_run)
+        return probe_run
+
+    def _start_timeouts(self, probe_run, group, on_result, on_complete):
+        """
+        验证项开始执行时启动超时计时器.
+        验证函数不使用 context.run() 或卡在其他调用中时，到时间仍报告 subprocess.TimeoutExpired，
+        之后到达的结果被忽略 (线程无法强制终止，只能等它自己结束)。
+        """
+        timers = []
+        for timeout in sorted({probe.timeout for probe, _ in group if probe.timeout}):
+            members = [(probe, fingerprint) for probe, fingerprint in group if probe.timeout == timeout]
+
+            def expire(members=members, timeout=timeout):
+                error = subprocess.TimeoutExpired(members[0][0].name, timeout)
+                self.scheduler.call_soon(self._finish, probe_run, members, None, error, timeout,
+                                         False, on_result, on_complete)
+
+            timer = threading.Timer(timeout, expire)
+            timer.daemon = True
+            timer.start()
+            timers.append(timer)
+        return timers
+
+    def _finish(self, probe_run, group, result, error, duration, cached, on_result, on_complete):
+        for probe, fingerprint in group:
+            if probe.name in probe_run.results:
+                continue
+            if error is None and not cached:
+                self._cache[probe.name] = (fingerprint, result, duration)
+            probe_run.results[probe.name] = (result, error, duration, cached)
+            if on_result is not None:
+                try:
+                    on_result(probe.name, result, error, duration, cached)
+                except Exception as e:
+                    print(f"处理验证结果失败: {e}")
+        if probe_run.done and probe_run.elapsed is None:
+            probe_run.elapsed = time.perf_counter() - probe_run.started
+            if on_complete is not None:
+                on_complete(probe_run)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,177 @@
+"""
+单实例保护.
+
+第一个启动的进程持有锁文件并在本地套接字上等待请求；
+之后启动的进程把命令行请求 (打开插件、验证、安装插件) 转交给它后立即退出。
+此模块在导入 Tk 之前使用，只依赖标准库中的轻量模块。
+"""
+import os
+import json
+import time
+import socket
+import threading
+
+from config_store import CONFIG_DIR, write_json_atomic
+
+
+def parse_request(argv):
+    """
+    解析命令行中的请求.
+    Returns: {"action": "show"} / {"action": "open_plugin", "name": 名称} /
+             {"action": "validate"} / {"action": "install_plugin", "path": 绝对路径}
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="MainApplication.py", add_help=False)
+    parser.add_argument("--open-plugin", metavar="名称")
+    parser.add_argument("--validate", action="store_true")
+    parser.add_argument("--install-plugin", metavar="文件")
+    args, _ = parser.parse_known_args(argv)  # 其他参数 (如 --trace) 由启动代码处理
+    if args.install_plugin:
+        return {"action": "install_plugin", "path": os.path.abspath(args.install_plugin)}
+    if args.open_plugin:
+        return {"action": "open_plugin", "name": args.open_plugin}
+    if args.validate:
+        return {"action": "validate"}
+    return {"action": "show"}
+
+
+class SingleInstance:
+    """锁文件 + 本地套接字 (没有 AF_UNIX 的系统使用带令牌的 127.0.0.1 TCP 端口)."""
+
+    def __init__(self, config_dir=CONFIG_DIR):
+        self.config_dir = config_dir
+        self.lock_file = os.path.join(config_dir, "instance.lock")
+        self.endpoint_file = os.path.join(config_dir, "instance.json")  # 套接字地址和令牌
+        self.socket_file = os.path.join(config_dir, "instance.sock")
+        self._lock = None
+        self._server = None
+        self._thread = None
+
+    def acquire(self):
+        """尝试成为主实例，已有实例在运行时返回 False."""
+        os.makedirs(self.config_dir, exist_ok=True)
+        lock = open(self.lock_file, "a+")
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        self._lock = lock
+        return True
+
+    def forward(self, request, timeout=3.0):
+        """
+        把请求发送给主实例，返回是否成功.
+        主实例可能刚启动还没有开始监听，在 timeout 秒内重试。
+        """
+        deadline = time.monotonic() + timeout
+        error = None
+        while True:
+            try:
+                with open(self.endpoint_file, "r") as f:
+                    endpoint = json.load(f)
+                with self._connect(endpoint, max(deadline - time.monotonic(), 0.1)) as conn:
+                    message = dict(request, token=endpoint["token"])
+                    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+                    reply = json.loads(conn.makefile("rb").readline() or b"{}")
+                if reply.get("ok"):
+                    return True
+                error = reply.get("error", "没有响应")
+                break
+            except (OSError, ValueError, KeyError) as e:
+                error = e
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(0.02)
+        print(f"无法连接正在运行的实例: {error}")
+        return False
+
+    @staticmethod
+    def _connect(endpoint, timeout):
+        if endpoint["family"] == "unix":
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = endpoint["address"]
+        else:
+            conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = tuple(endpoint["address"])
+        conn.settimeout(timeout)
+        try:
+            conn.connect(address)
+        except OSError:
+            conn.close()
+            raise
+        return conn
+
+    def serve(self, handler):
+        """
+        开始接收其他实例转交的请求 (必须先 acquire 成功).
+        handler(request) 在监听线程中调用，应尽快把请求交给 Tk 线程。
+        """
+        import secrets
+        token = secrets.token_hex(16)
+        if hasattr(socket, "AF_UNIX"):
+            try:
+                os.remove(self.socket_file)  # 上次异常退出留下的套接字文件
+            except OSError:
+                pass
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(self.socket_file)
+            os.chmod(self.socket_file, 0o600)
+            endpoint = {"family": "unix", "address": self.socket_file}
+        else:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.bind(("127.0.0.1", 0))
+            endpoint = {"family": "tcp", "address": list(server.getsockname())}
+        server.listen(8)
+        self._server = server
+        write_json_atomic(self.endpoint_file, dict(endpoint, token=token, pid=os.getpid()))
+        self._thread = threading.Thread(target=self._accept_loop, args=(server, token, handler),
+                                        name="single-instance", daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self, server, token, handler):
+        import hmac
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return  # 已关闭
+            with conn:
+                try:
+                    conn.settimeout(2)
+                    request = json.loads(conn.makefile("rb").readline() or b"{}")
+                    if not hmac.compare_digest(str(request.pop("token", "")), token):
+                        reply = {"ok": False, "error": "令牌无效"}
+                    else:
+                        handler(request)
+                        reply = {"ok": True}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                try:
+                    conn.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+                except OSError:
+                    pass
+
+    def close(self):
+        """停止监听并释放锁 (完全重启前调用，新进程才能成为主实例)."""
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)  # 唤醒阻塞中的 accept
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+            for path in (self.endpoint_file, self.socket_file):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if self._lock is not None:
+            self._lock.close()  # 关闭文件即释放锁
+            self._lock = None
@@ -0,0 +1,135 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """任务已被取消."""
+
+
+class CancellationToken:
+    """任务取消标记，由后台函数定期检查."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TaskCancelled()
+
+
+_local = threading.local()
+
+
+def current_task():
+    """返回当前线程正在执行的后台任务，不在后台任务中时返回 None."""
+    return getattr(_local, "task", None)
+
+
+class BackgroundTask:
+    """提交到 TaskScheduler 的后台任务."""
+
+    def __init__(self, scheduler, on_progress, on_error=None):
+        self.scheduler = scheduler
+        self.token = CancellationToken()
+        self.future = None
+        self._on_progress = on_progress
+        self._on_error = on_error
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+    def cancel(self):
+        """请求取消任务，尚未开始的任务不会再执行，on_error 仍会收到 TaskCancelled."""
+        self.token.cancel()
+        if self.future is not None and self.future.cancel() and self._on_error is not None:
+            self.scheduler.call_soon(self._on_error, TaskCancelled())
+
+    def raise_if_cancelled(self):
+        self.token.raise_if_cancelled()
+
+    def report_progress(self, value):
+        """报告进度，on_progress 会在 Tk 线程中调用."""
+        if self._on_progress is not None:
+            self.scheduler.call_soon(self._on_progress, value)
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+
+class TaskScheduler:
+    """共享的后台线程池.
+
+    任务在线程池中执行 (并发数受 max_workers 限制)，
+    完成、出错和进度回调放入队列，由 master.after 定期在 Tk 线程中取出执行，
+    因此回调中可以安全地更新控件。
+    """
+
+    def __init__(self, master, max_workers=4, poll_interval=30):
+        self.master = master
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background")
+        self._callbacks = queue.Queue()
+        self._closed = False
+        self.master.after(self.poll_interval, self._drain)
+
+    def submit(self, fn, *args, on_done=None, on_progress=None, on_error=None, **kwargs):
+        """
+        在后台执行 fn(*args, **kwargs).
+        Args:
+            on_done: 成功时以返回值调用
+            on_progress: 任务中调用 current_task().report_progress(value) 时调用
+            on_error: 出错时以异常对象调用，取消的任务会收到 TaskCancelled
+        回调都在 Tk 线程中执行。
+        """
+        task = BackgroundTask(self, on_progress, on_error)
+
+        def run():
+            _local.task = task
+            try:
+                task.raise_if_cancelled()
+                result = fn(*args, **kwargs)
+                task.raise_if_cancelled()
+            except BaseException as e:
+                if on_error is not None:
+                    self.call_soon(on_error, e)
+                elif not isinstance(e, TaskCancelled):
+                    print(f"后台任务 {getattr(fn, '__name__', fn)} 失败: {e}")
+            else:
+                if on_done is not None:
+                    self.call_soon(on_done, result)
+            finally:
+                _local.task = None
+
+        task.future = self._executor.submit(run)
+        return task
+
+    def call_soon(self, fn, *args):
+        """在 Tk 线程中执行 fn(*args)，可从任意线程调用."""
+        self._callbacks.put((fn, args))
+
+    def _drain(self):
+        while True:
+            try:
+                fn, args = self._callbacks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"执行回调失败: {e}")
+        if not self._closed:
+            self.master.after(self.poll_interval, self._drain)
+
+    def shutdown(self):
+        """停止接收任务，不等待正在执行的任务."""
+        self._closed = True
+        self._executor.shutdown(wait=False)
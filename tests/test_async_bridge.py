@@ -0,0 +1,218 @@
+import json
+import time
+import heapq
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from async_bridge import AsyncBridge, http_get, download
+from task_scheduler import TaskScheduler
+
+PAYLOAD = bytes(range(256)) * 1024
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        if self.path.endswith("/redirect"):
+            self.send_response(302)
+            self.send_header("Location", "/versions")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path.endswith("/versions"):
+            body = json.dumps([{"version": "8.5"}]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.endswith("/chunked"):
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(PAYLOAD), 10000):
+                chunk = PAYLOAD[i:i + 10000]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        elif self.path.endswith("/file"):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "https_proxy", "HTTPS_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.paths = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_http_get_follows_redirects(server):
+    response = asyncio.run(http_get(url(server, "/redirect")))
+    assert response.status == 200
+    assert response.url.endswith("/versions")
+    assert response.json() == [{"version": "8.5"}]
+
+
+def test_http_get_returns_error_status(server):
+    response = asyncio.run(http_get(url(server, "/missing")))
+    assert response.status == 404
+    with pytest.raises(IOError):
+        response.raise_for_status()
+
+
+def test_http_get_reads_chunked_body(server):
+    assert asyncio.run(http_get(url(server, "/chunked"))).body == PAYLOAD
+
+
+def test_http_get_uses_proxy_from_environment(server, monkeypatch):
+    monkeypatch.setenv("http_proxy", url(server, ""))
+    response = asyncio.run(http_get("http://gradle.invalid/versions"))
+    assert response.status == 200
+    assert server.paths == ["http://gradle.invalid/versions"]
+
+
+def test_download_writes_file_and_reports_progress(server, tmp_path):
+    dest = tmp_path / "gradle.zip"
+    progress = []
+
+    async def run():
+        loop_thread = threading.get_ident()
+
+        def on_progress(downloaded, total):
+            assert threading.get_ident() == loop_thread  # 进度回调在事件循环线程中
+            progress.append((downloaded, total))
+
+        return await download(url(server, "/file"), str(dest), on_progress, chunk_size=65536)
+
+    assert asyncio.run(run()) == len(PAYLOAD)
+    assert dest.read_bytes() == PAYLOAD
+    assert progress[-1] == (len(PAYLOAD), len(PAYLOAD))
+
+
+def test_download_raises_on_http_error(server, tmp_path):
+    with pytest.raises(IOError):
+        asyncio.run(download(url(server, "/missing"), str(tmp_path / "x")))
+
+
+DOWNLOADS = 20
+TICK_INTERVAL = 0.01
+MAX_UI_STALL = 0.1
+
+
+class ConcurrentHandler(BaseHTTPRequestHandler):
+    """所有请求同时到达 (或等待超时) 后才开始响应，记录最大并发数."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            if server.active >= DOWNLOADS:
+                server.all_arrived.set()
+        server.all_arrived.wait(2)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        for i in range(0, len(PAYLOAD), 65536):
+            self.wfile.write(PAYLOAD[i:i + 65536])
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTk:
+    """只实现 after/quit/mainloop 的 Tk 替身，在无显示环境中驱动 TaskScheduler."""
+
+    def __init__(self):
+        self._timers = []
+        self._seq = 0
+        self._running = True
+
+    def after(self, ms, fn, *args):
+        self._seq += 1
+        heapq.heappush(self._timers, (time.perf_counter() + ms / 1000, self._seq, fn, args))
+
+    def quit(self):
+        self._running = False
+
+    def mainloop(self, timeout=30):
+        deadline = time.perf_counter() + timeout
+        while self._running and self._timers and time.perf_counter() < deadline:
+            due, _, fn, args = heapq.heappop(self._timers)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            fn(*args)
+
+
+def test_concurrent_downloads_keep_ui_responsive(tmp_path, monkeypatch):
+    for name in ("http_proxy", "HTTP_PROXY", "all_proxy", "ALL_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ConcurrentHandler)
+    httpd.lock = threading.Lock()
+    httpd.active = httpd.max_active = 0
+    httpd.all_arrived = threading.Event()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    root = FakeTk()
+    scheduler = TaskScheduler(root, poll_interval=5)
+    bridge = AsyncBridge(scheduler, io_workers=DOWNLOADS)
+    ticks, sizes, outcome = [], {}, {}
+
+    def tick():
+        ticks.append(time.perf_counter())
+        root.after(int(TICK_INTERVAL * 1000), tick)
+
+    async def download_all():
+        async def one(i):
+            size = await download(f"{base}/file{i}", str(tmp_path / f"file{i}.zip"))
+            await bridge.ui(sizes.__setitem__, i, size)  # 在 Tk 线程中更新 "界面"
+        await asyncio.gather(*(one(i) for i in range(DOWNLOADS)))
+
+    def finish(key):
+        def callback(value):
+            outcome[key] = value
+            root.quit()
+        return callback
+
+    try:
+        bridge.submit(download_all(), on_done=finish("done"), on_error=finish("error"))
+        tick()
+        root.mainloop()
+    finally:
+        bridge.shutdown()
+        scheduler.shutdown()
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert "error" not in outcome and "done" in outcome
+    assert sizes == {i: len(PAYLOAD) for i in range(DOWNLOADS)}
+    assert httpd.max_active == DOWNLOADS  # 全部下载同时进行，不受默认线程池大小限制
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    assert max(gaps) - TICK_INTERVAL < MAX_UI_STALL
@@ -0,0 +1,68 @@
+import json
+
+import cli
+from plugin_index import PluginHandle, PluginIndex, file_hash
+
+PLUGIN_SOURCE = "name = 'demo'\nrequires = ['requests']\n\ndef register(api):\n    pass\n\ndef gui(window, context):\n    pass\n"
+
+
+def install_plugin(config_dir, filename="demo_plugin.py", source=PLUGIN_SOURCE):
+    plugins_dir = config_dir / "plugins"
+    plugins_dir.mkdir(parents=True, exist_ok=True)
+    path = plugins_dir / filename
+    path.write_text(source)
+    (config_dir / "plugins.json").write_text(json.dumps([filename]))
+    return path
+
+
+def list_plugins(config_dir, capsys):
+    assert cli.main(["--config-dir", str(config_dir), "plugins", "list", "--json"]) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def test_plugins_list_uses_index(tmp_path, capsys):
+    path = install_plugin(tmp_path)
+    index = PluginIndex(str(tmp_path / "plugins_index.json"))
+    index.update(PluginHandle("indexed-demo", str(path), file_hash(str(path)), True, requires=["requests"]))
+    index.save()
+
+    assert list_plugins(tmp_path, capsys) == [
+        {"name": "indexed-demo", "file": str(path), "has_gui": True, "requires": ["requests"]}]
+
+
+def test_plugins_list_reads_source_without_index(tmp_path, capsys):
+    path = install_plugin(tmp_path)
+
+    assert list_plugins(tmp_path, capsys) == [
+        {"name": "demo", "file": str(path), "has_gui": True, "requires": ["requests"]}]
+
+
+def test_plugins_list_skips_missing_files(tmp_path, capsys):
+    install_plugin(tmp_path)
+    (tmp_path / "plugins" / "demo_plugin.py").unlink()
+
+    assert list_plugins(tmp_path, capsys) == []
+
+
+def test_path_list_does_not_load_plugin_api(tmp_path, capsys, monkeypatch):
+    import sys
+    config_dir = tmp_path
+    (config_dir / "config.json").write_text(json.dumps({"env_store": "json"}))
+    (config_dir / "environment.json").write_text(json.dumps({"user": {"PATH": "/opt/a:/opt/b"}, "system": {}}))
+    monkeypatch.delitem(sys.modules, "plugin_api", raising=False)
+    monkeypatch.delitem(sys.modules, "env_broadcast", raising=False)
+
+    assert cli.main(["--config-dir", str(config_dir), "path", "list", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out) == ["/opt/a", "/opt/b"]
+    assert "plugin_api" not in sys.modules and "env_broadcast" not in sys.modules
+
+
+def test_path_add_and_remove(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("PATH", "/usr/bin:/bin")  # 修改 PATH 会同时更新当前进程的环境变量
+    (tmp_path / "config.json").write_text(json.dumps({"env_store": "json"}))
+    main = lambda *argv: cli.main(["--config-dir", str(tmp_path), "path"] + list(argv))
+    assert main("add", "/opt/a", "/opt/b") == 0
+    assert main("remove", "/opt/a") == 0
+    capsys.readouterr()
+    assert main("list", "--json") == 0
+    assert json.loads(capsys.readouterr().out) == ["/opt/b"]
@@ -0,0 +1,84 @@
+import json
+import os
+
+from config_store import ConfigStore
+
+DEFAULTS = {"node_path": "", "java_path": ""}
+
+
+def make_store(tmp_path, data=None, delay=0):
+    config_file = tmp_path / "config.json"
+    if data is not None:
+        config_file.write_text(json.dumps(data))
+    return ConfigStore(str(config_file), DEFAULTS, delay=delay)
+
+
+def test_cache_hit_returns_shared_dict_and_copy_on_request(tmp_path):
+    store = make_store(tmp_path, {"versions": ["8.5"]})
+    first = store.load()
+    assert store.load() is first
+    copy = store.load(copy=True)
+    copy["versions"].append("8.6")
+    assert store.load()["versions"] == ["8.5"]
+    assert store.stats()["misses"] == 1
+
+
+def test_external_change_is_reloaded(tmp_path):
+    store = make_store(tmp_path, {"java_path": "/a"})
+    assert store.load()["java_path"] == "/a"
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"java_path": "/bb"}))
+    os.utime(str(config_file), ns=(1, 1))
+    assert store.load()["java_path"] == "/bb"
+
+
+def test_save_copies_caller_dict(tmp_path):
+    store = make_store(tmp_path, {"versions": []})
+    config = store.load(copy=True)
+    config["versions"].append("8.5")
+    store.save(config)
+    config["versions"].append("mutated")
+    assert json.loads((tmp_path / "config.json").read_text())["versions"] == ["8.5"]
+    assert store.load()["versions"] == ["8.5"]
+
+
+def write_external(tmp_path, data):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(data))
+    os.utime(str(config_file), ns=(1, 1))  # 确保与本进程写入后的 mtime 不同
+
+
+def test_reload_merges_external_edit_into_pending_save(tmp_path):
+    store = make_store(tmp_path, {"java_path": "/jdk", "node_path": "/node"}, delay=60)
+    config = store.load(copy=True)
+    config["java_path"] = "/jdk-17"
+    store.save(config)
+    write_external(tmp_path, {"java_path": "/jdk", "node_path": "/node-20", "theme": "dark"})
+
+    assert store.reload() == {"java_path": "/jdk-17", "node_path": "/node-20", "theme": "dark"}
+    assert store.conflicts == []
+    store.flush()
+    assert json.loads((tmp_path / "config.json").read_text()) == {
+        "java_path": "/jdk-17", "node_path": "/node-20", "theme": "dark"}
+
+
+def test_flush_does_not_overwrite_external_edit(tmp_path, capsys):
+    store = make_store(tmp_path, {"java_path": "/jdk", "node_path": "/node"}, delay=60)
+    config = store.load(copy=True)
+    config["java_path"] = "/jdk-17"
+    store.save(config)
+    write_external(tmp_path, {"java_path": "/jdk-21", "node_path": "/node-20"})
+
+    store.flush()
+    assert json.loads((tmp_path / "config.json").read_text()) == {"java_path": "/jdk-17", "node_path": "/node-20"}
+    assert store.conflicts == ["java_path"]
+    assert "java_path" in capsys.readouterr().out
+
+
+def test_reload_without_pending_reads_file(tmp_path):
+    store = make_store(tmp_path, {"java_path": "/jdk"})
+    store.watched = True
+    store.load()
+    write_external(tmp_path, {"java_path": "/jdk-21"})
+    assert store.load()["java_path"] == "/jdk"  # 受监视时不检查文件
+    assert store.reload() == {"java_path": "/jdk-21"}
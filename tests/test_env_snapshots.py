@@ -0,0 +1,23 @@
+from env_snapshots import EnvSnapshotStore
+
+
+def test_append_after_truncated_line_keeps_new_record(tmp_path):
+    store = EnvSnapshotStore(str(tmp_path))
+    first, _ = store.create({"user": {"A": "1"}})
+    with open(store.log_file, "a", encoding="utf-8") as f:
+        f.write('{"id": 99, "par')  # 写入中途崩溃留下的不完整行
+
+    store = EnvSnapshotStore(str(tmp_path))
+    second, created = store.create({"user": {"A": "2"}})
+    assert created
+
+    reopened = EnvSnapshotStore(str(tmp_path))
+    assert [record["id"] for record in reopened.list()] == [first["id"], second["id"]]
+    assert reopened.load(second["id"]) == {"user": {"A": "2"}}
+
+
+def test_append_to_empty_log(tmp_path):
+    store = EnvSnapshotStore(str(tmp_path))
+    open(store.log_file, "w").close()
+    record, _ = store.create({"user": {"A": "1"}})
+    assert EnvSnapshotStore(str(tmp_path)).head()["id"] == record["id"]
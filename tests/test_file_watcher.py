@@ -0,0 +1,20 @@
+import sys
+
+import pytest
+
+from cli import Dispatcher
+from file_watcher import FileWatcher
+
+
+@pytest.mark.parametrize("backend", ["poll"] + (["inotify"] if sys.platform.startswith("linux") else []))
+def test_subscription_reports_whether_directory_is_watched(tmp_path, backend):
+    watcher = FileWatcher(Dispatcher(), backend=backend)
+    watcher.start()
+    try:
+        watched = watcher.subscribe(str(tmp_path / "config.json"), lambda paths: None)
+        assert watched.active
+        missing = watcher.subscribe(str(tmp_path / "missing" / "config.json"), lambda paths: None)
+        assert missing.active is (backend == "poll")  # 轮询可以监视尚不存在的目录
+    finally:
+        watcher.stop()
+    assert not watched.active
@@ -0,0 +1,100 @@
+import pytest
+
+from env_broadcast import RecordingBroadcaster
+from env_store import MemoryEnvStore
+from plugin_api import PluginAPI
+
+
+class FakeApp:
+    def __init__(self, config_dir):
+        self.config_dir = str(config_dir)
+        self.config = {"env_store": "memory"}
+        self.saves = 0
+        self.programmatic_change = False
+
+    def save_config(self):
+        self.saves += 1
+
+
+class FailingStore(MemoryEnvStore):
+    """写入 fail_after 个变量后的下一次写入抛出异常，之后 (回滚) 的写入正常进行."""
+
+    def __init__(self, fail_after, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_after = fail_after
+        self.writes = 0
+
+    def set_many(self, mapping, system_wide=False):
+        for name, value in mapping.items():
+            if self.writes == self.fail_after:
+                self.fail_after = None
+                raise OSError("写入失败")
+            self.writes += 1
+            super().set_many({name: value}, system_wide)
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = PluginAPI(FakeApp(tmp_path))
+    api.set_env_broadcaster(RecordingBroadcaster())
+    yield api
+    api.shutdown()
+
+
+def test_commit_restores_partially_written_scope(api):
+    store = FailingStore(2, user={"A": "a0", "B": "b0"})
+    api.set_env_store(store)
+    with pytest.raises(OSError):
+        with api.transaction():
+            api.set_env_var("A", "a1")
+            api.set_env_var("B", "b1")
+            api.set_env_var("C", "c1")
+    assert store.items() == {"A": "a0", "B": "b0"}
+
+
+def test_commit_restores_earlier_scope_when_later_scope_fails(api):
+    store = FailingStore(1, user={"A": "a0"}, system={"S": "s0"})
+    api.set_env_store(store)
+    with pytest.raises(OSError):
+        with api.transaction():
+            api.set_env_var("A", "a1")
+            api.set_env_var("S", "s1", system_wide=True)
+    assert store.items() == {"A": "a0"}
+    assert store.items(system_wide=True) == {"S": "s0"}
+
+
+def test_save_config_in_transaction_saves_on_commit(api):
+    with api.transaction():
+        api.get_config()["java_path"] = "/opt/jdk"
+        api.save_config()
+        assert api.app.saves == 0
+    assert api.app.saves == 1
+
+
+def test_transaction_without_config_changes_does_not_save(api):
+    api.set_env_store(MemoryEnvStore())
+    with api.transaction():
+        api.set_env_var("A", "1")
+    assert api.app.saves == 0
+
+
+def test_rapid_set_env_var_calls_share_one_broadcast(api, monkeypatch):
+    broadcaster = RecordingBroadcaster()
+    api.set_env_broadcaster(broadcaster)
+    api.env_broadcast.delay = 0.05
+    api.set_env_store(MemoryEnvStore())
+
+    for i in range(20):
+        monkeypatch.setenv(f"SYSTOOLS_TEST_{i}", "")  # 测试结束后从 os.environ 中删除
+    for i in range(20):
+        assert api.set_env_var(f"SYSTOOLS_TEST_{i}", str(i))
+    assert broadcaster.calls == 0  # set_env_var 不等待广播
+    assert api.env_broadcast.flush(timeout=5)
+    assert broadcaster.calls == 1
+
+    # 合并窗口结束后的修改会触发新的广播
+    api.set_env_var("SYSTOOLS_TEST_0", "again")
+    assert api.env_broadcast.flush(timeout=5)
+    assert broadcaster.calls == 2
+    stats = api.get_env_broadcast_stats()
+    assert stats["requests"] == 21 and stats["broadcasts"] == 2
@@ -0,0 +1,26 @@
+import sys
+import subprocess
+
+import pytest
+
+from plugin_deps import DependencyResolver
+
+
+class Master:
+    def after(self, ms, fn):
+        pass
+
+
+def test_frozen_build_reports_wheel_install_unsupported(tmp_path, monkeypatch):
+    wheel_dir = tmp_path / "wheels"
+    wheel_dir.mkdir()
+    (wheel_dir / "demo-1.0-py3-none-any.whl").write_bytes(b"")
+    monkeypatch.setattr(sys, "frozen", True, raising=False)
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: pytest.fail("不应调用 pip"))
+
+    resolver = DependencyResolver(Master(), str(wheel_dir), str(tmp_path / "deps.json"))
+    resolver._install(("systools-missing-demo",))
+    requires, error = resolver._results.get_nowait()
+    assert requires == ("systools-missing-demo",)
+    assert "打包版本不支持" in error
+
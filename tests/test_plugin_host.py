@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from plugin_host import PluginHost
+
+PLUGIN_SOURCE = """
+def read_config(api, key):
+    return api.get_config(key)
+
+def call_blocked(api):
+    return api.run_in_background(print)
+
+def call_unpicklable(api):
+    try:
+        api.get_env_var("PATH")
+    except RuntimeError as e:
+        return "error: " + str(e)
+    return "no error"
+"""
+
+
+class Master:
+    def after(self, ms, fn):
+        pass
+
+
+class FakeAPI:
+    def get_config(self, key=None):
+        return {"java_path": "/opt/jdk"}.get(key)
+
+    def get_env_var(self, name, system_wide=False):
+        return lambda: name  # 无法序列化
+
+    def run_in_background(self, fn, *args, **kwargs):
+        raise AssertionError("不应被代理调用")
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    path = tmp_path / "host_demo_plugin.py"
+    path.write_text(PLUGIN_SOURCE)
+    namespace = {"__file__": str(path)}
+    exec(compile(PLUGIN_SOURCE, str(path), "exec"), namespace)
+    return namespace
+
+
+def run(host, func, *args):
+    results = []
+    call = host.submit(func, *args, on_done=lambda v: results.append((True, v)),
+                       on_error=lambda v: results.append((False, v)), timeout=30)
+    deadline = time.monotonic() + 60
+    while not results and time.monotonic() < deadline:
+        host._poll()
+        time.sleep(0.01)
+    assert call.finished
+    return results[0]
+
+
+def test_worker_api_round_trip(plugin):
+    api = FakeAPI()
+    host = PluginHost(api, Master(), size=1)
+    try:
+        assert run(host, plugin["read_config"], api, "java_path") == (True, "/opt/jdk")
+
+        ok, error = run(host, plugin["call_blocked"], api)
+        assert not ok and "run_in_background" in error
+
+        # 返回值无法序列化时工作进程收到错误，而不是一直等待
+        ok, value = run(host, plugin["call_unpicklable"], api)
+        assert ok and value.startswith("error: get_env_var 的返回值无法序列化")
+
+        assert run(host, plugin["read_config"], api, "missing") == (True, None)
+        assert host.stats["host_demo_plugin.py"]["calls"] == 4
+    finally:
+        host.shutdown()
@@ -0,0 +1,84 @@
+import types
+
+from cli import Dispatcher
+from MainApplication import EnvConfigurator
+from plugin_index import PluginHandle, PluginIndex, file_hash
+from probe_registry import ProbeRegistry
+
+GRADLE_PROBE = {"name": "gradle", "label": "Gradle", "config_keys": ["gradle_active_version"],
+                "timeout": 60, "cost": "jvm"}
+
+
+def make_index(tmp_path):
+    path = tmp_path / "gradle_plugin.py"
+    path.write_text("name = 'gradle'\n")
+    index = PluginIndex(str(tmp_path / "plugins_index.json"))
+    return index, str(path)
+
+
+def test_lookup_returns_recorded_probes(tmp_path):
+    index, path = make_index(tmp_path)
+    index.update(PluginHandle("gradle", path, file_hash(path), True, probes=[GRADLE_PROBE]))
+    index.save()
+
+    handle = PluginIndex(index.index_file).load().lookup(path)
+    assert handle.name == "gradle"
+    assert handle.probes == [GRADLE_PROBE]
+
+
+def test_entry_without_probes_needs_reimport(tmp_path):
+    index, path = make_index(tmp_path)
+    index.update(PluginHandle("gradle", path, file_hash(path), True))
+    del index.entries["gradle_plugin.py"]["probes"]  # 旧版本写入的索引条目
+
+    assert index.lookup(path) is None
+
+
+def test_entry_with_probe_names_only_needs_reimport(tmp_path):
+    index, path = make_index(tmp_path)
+    index.update(PluginHandle("gradle", path, file_hash(path), True, probes=["gradle"]))  # 旧版本只记录名称
+
+    assert index.lookup(path) is None
+
+
+def test_changed_file_is_stale(tmp_path):
+    index, path = make_index(tmp_path)
+    index.update(PluginHandle("gradle", path, file_hash(path), True))
+    with open(path, "a") as f:
+        f.write("version = 2\n")
+
+    assert index.lookup(path) is None
+
+
+def test_probe_stub_imports_plugin_on_first_run(tmp_path):
+    index, path = make_index(tmp_path)
+    handle = PluginHandle("gradle", path, file_hash(path), True, probes=[GRADLE_PROBE])
+    dispatcher = Dispatcher()
+    imports = []
+
+    def ensure_plugin_loaded(self, handle):
+        if handle.module is None:
+            imports.append(handle.name)
+            handle.module = object()
+            self.probe_registry.register("gradle", lambda context: "8.5", "Gradle",
+                                         ("gradle_active_version",), 60, "jvm")
+        return handle.module
+
+    app = types.SimpleNamespace(
+        task_scheduler=dispatcher, probe_registry=ProbeRegistry(dispatcher),
+        plugin_registry=types.SimpleNamespace(find_by_filename=lambda filename: handle))
+    for method in ("register_probe_stubs", "run_probe_stub"):
+        setattr(app, method, types.MethodType(getattr(EnvConfigurator, method), app))
+    app.ensure_plugin_loaded = types.MethodType(ensure_plugin_loaded, app)
+
+    app.register_probe_stubs(handle)
+    stub = app.probe_registry.get("gradle")
+    assert imports == []  # 启动时不导入插件
+    assert (stub.label, stub.timeout, stub.cost) == ("Gradle", 60, "jvm")
+
+    probe_run = app.probe_registry.run({})
+    dispatcher.run_until(lambda: probe_run.done)
+    assert probe_run.results["gradle"][:2] == ("8.5", None)
+    assert imports == ["gradle"]
+    assert app.probe_registry.get("gradle") is not stub
+    app.probe_registry.shutdown()
@@ -0,0 +1,65 @@
+import os
+import time
+import subprocess
+import threading
+from unittest.mock import ANY
+
+from cli import Dispatcher
+from probe_registry import ProbeRegistry
+
+
+def test_probe_that_ignores_context_times_out():
+    dispatcher = Dispatcher()
+    registry = ProbeRegistry(dispatcher)
+    release = threading.Event()
+    registry.register("stuck", lambda context: release.wait(5) and "late", timeout=0.2)
+    registry.register("quick", lambda context: "ok", timeout=0.2)
+    results = []
+
+    started = time.monotonic()
+    probe_run = registry.run({}, on_result=lambda name, *rest: results.append((name,) + rest))
+    dispatcher.run_until(lambda: probe_run.done)
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert elapsed < 2
+    result, error, duration, cached = probe_run.results["stuck"]
+    assert result is None and isinstance(error, subprocess.TimeoutExpired)
+    assert probe_run.results["quick"][:2] == ("ok", None)
+
+    # 超时后到达的结果被忽略，也不会缓存
+    time.sleep(0.1)
+    while not dispatcher._callbacks.empty():
+        fn, args = dispatcher._callbacks.get()
+        fn(*args)
+    assert isinstance(probe_run.results["stuck"][1], subprocess.TimeoutExpired)
+    assert [name for name, *_ in results].count("stuck") == 1
+    assert "stuck" not in registry._cache
+    registry.shutdown()
+
+
+def run_all(registry, dispatcher, config):
+    probe_run = registry.run(config)
+    dispatcher.run_until(lambda: probe_run.done)
+    return probe_run.results
+
+
+def test_cache_follows_executable_resolved_outside_config(tmp_path):
+    homes = {}
+    for version in ("7.6", "8.5"):
+        home = tmp_path / f"gradle-{version}"
+        (home / "bin").mkdir(parents=True)
+        (home / "bin" / "gradle").write_text("")
+        homes[version] = str(home)
+    environment = {"GRADLE_HOME": homes["7.6"]}  # 不在配置中的状态
+    dispatcher = Dispatcher()
+    registry = ProbeRegistry(dispatcher)
+    registry.register("gradle", lambda context: os.path.basename(environment["GRADLE_HOME"]),
+                      config_keys=("gradle_active_version",),
+                      executable=lambda config: os.path.join(environment["GRADLE_HOME"], "bin", "gradle"))
+
+    assert run_all(registry, dispatcher, {})["gradle"] == ("gradle-7.6", None, ANY, False)
+    assert run_all(registry, dispatcher, {})["gradle"][3] is True  # 缓存命中
+    environment["GRADLE_HOME"] = homes["8.5"]
+    assert run_all(registry, dispatcher, {})["gradle"] == ("gradle-8.5", None, ANY, False)
+    registry.shutdown()
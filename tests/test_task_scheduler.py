@@ -0,0 +1,51 @@
+import threading
+
+from task_scheduler import TaskScheduler, TaskCancelled
+
+
+class Master:
+    def after(self, ms, fn):
+        pass
+
+
+def test_cancel_before_start_reports_task_cancelled():
+    scheduler = TaskScheduler(Master(), max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    errors, done = [], []
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    running = scheduler.submit(block)
+    started.wait(5)
+    queued = scheduler.submit(lambda: "不应执行", on_done=done.append, on_error=errors.append)
+    queued.cancel()
+    release.set()
+    running.future.result(5)
+    scheduler._drain()
+    scheduler.shutdown()
+
+    assert queued.future.cancelled()
+    assert done == []
+    assert len(errors) == 1 and isinstance(errors[0], TaskCancelled)
+
+
+def test_cancel_running_task_reports_task_cancelled_once():
+    scheduler = TaskScheduler(Master(), max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    task = scheduler.submit(work, on_error=errors.append)
+    started.wait(5)
+    task.cancel()
+    release.set()
+    task.future.result(5)
+    scheduler._drain()
+    scheduler.shutdown()
+
+    assert len(errors) == 1 and isinstance(errors[0], TaskCancelled)
@@ -0,0 +1,36 @@
+import os
+import stat
+
+import pytest
+
+from version_probe import EXECUTABLES, MissingExecutableError, detect_version
+
+
+def make_java_home(root):
+    executable = os.path.join(str(root), EXECUTABLES["java"][0])
+    os.makedirs(os.path.dirname(executable))
+    with open(executable, "w") as f:
+        f.write("#!/bin/sh\n")
+    os.chmod(executable, os.stat(executable).st_mode | stat.S_IEXEC)
+    with open(os.path.join(str(root), "release"), "w") as f:
+        f.write('JAVA_VERSION="17.0.2"\n')
+    return executable
+
+
+def test_configured_home_without_executable_does_not_fall_back_to_path(tmp_path, monkeypatch):
+    path_home = tmp_path / "path-jdk"
+    make_java_home(path_home)
+    monkeypatch.setenv("PATH", str(path_home / "bin"))
+    configured = tmp_path / "configured-jdk"
+    configured.mkdir()
+
+    with pytest.raises(MissingExecutableError) as info:
+        detect_version("java", str(configured), spawn=False)
+    assert info.value.home == str(configured)
+    assert isinstance(info.value, FileNotFoundError)
+
+
+def test_path_is_used_when_no_home_is_configured(tmp_path, monkeypatch):
+    executable = make_java_home(tmp_path / "path-jdk")
+    monkeypatch.setenv("PATH", os.path.dirname(executable))
+    assert detect_version("java", None, spawn=False) == ("17.0.2", "metadata", executable)
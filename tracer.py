@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import atexit
+import threading
+
+# 设置此环境变量 (或启动参数 --trace 文件) 后记录启动过程，退出时写入 Chrome trace 文件
+TRACE_ENV = "SYSTOOLS_TRACE"
+
+
+class _NullSpan:
+    """未启用时返回的空上下文管理器."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args):
+        """给 span 附加参数，显示在 chrome://tracing 的详情中."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.add_event({
+            "name": self.name, "cat": self.category, "ph": "X",
+            "ts": self.start / 1000, "dur": (end - self.start) / 1000,
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": self.args,
+        })
+        return False
+
+
+class Tracer:
+    """基于 span 的轻量级追踪器，导出 Chrome trace-event JSON (chrome://tracing 或 Perfetto 打开).
+
+    未启用时 span() 直接返回共享的空上下文管理器，几乎没有开销。
+    """
+
+    def __init__(self, path=None):
+        self.path = None
+        self.enabled = False
+        self._events = []
+        self._threads = {}
+        if path:
+            self.enable(path)
+
+    def enable(self, path):
+        """开始记录，进程退出时写入 path."""
+        if not self.enabled:
+            atexit.register(self.export)
+        self.path = path
+        self.enabled = True
+
+    def span(self, name, category="app", **args):
+        """with tracer.span("name"): ... 记录代码块耗时."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def traced(self, name=None, category="app"):
+        """装饰器形式的 span，默认使用函数名."""
+        def decorator(fn):
+            span_name = name or fn.__qualname__
+
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with Span(self, span_name, category, {}):
+                    return fn(*args, **kwargs)
+            wrapper.__name__ = fn.__name__
+            wrapper.__qualname__ = fn.__qualname__
+            wrapper.__doc__ = fn.__doc__
+            return wrapper
+        return decorator
+
+    def instant(self, name, category="app", **args):
+        """记录一个时间点事件."""
+        if self.enabled:
+            self.add_event({
+                "name": name, "cat": category, "ph": "i", "s": "p",
+                "ts": time.perf_counter_ns() / 1000,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+            })
+
+    def add_event(self, event):
+        tid = event["tid"]
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._events.append(event)  # list.append 是线程安全的
+
+    def events(self):
+        """返回已记录的事件 (包含线程名元数据)."""
+        pid = os.getpid()
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in list(self._threads.items())]
+        return metadata + list(self._events)
+
+    def export(self, path=None):
+        """写入 Chrome trace JSON，返回文件路径."""
+        path = path or self.path
+        if not path or not self._events:
+            return None
+        try:
+            with open(path, "w") as f:
+                json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f)
+            print(f"启动追踪已写入 {path}")
+        except OSError as e:
+            print(f"写入追踪文件失败: {e}")
+            return None
+        return path
+
+
+# 全局追踪器
+tracer = Tracer(os.environ.get(TRACE_ENV))
+span = tracer.span
+traced = tracer.traced
@@ -3,64 +3,155 @@ from tkinter import ttk
 import subprocess
 import os
 
+from task_scheduler import TaskCancelled
+from version_probe import MissingExecutableError, register_toolchain_probes
+
+
+class ProbeRow:
+    """一个验证项的按钮、状态标签和日志按钮."""
+
+    def __init__(self, section, probe, row):
+        self.name = probe.name
+        self.status = tk.StringVar()
+        self.log = ""
+        self.validate_button = ttk.Button(section.master, text=f"验证 {probe.label}",
+                                          command=lambda: section.validate(probe.name))
+        self.validate_button.grid(row=row, column=0, padx=5, pady=5)
+        self.label = ttk.Label(section.master, textvariable=self.status)
+        self.label.grid(row=row, column=1, padx=5, pady=5)
+        self.log_button = ttk.Button(section.master, text=f"{probe.label} 日志", command=lambda: section.show_log(self.log))
+        self.log_button.grid(row=row, column=2, padx=5, pady=5)
+        self.log_button.grid_remove()  # Initially hide the button
+
+
 class ValidationSection:
-    def __init__(self, master):
+    def __init__(self, master, registry, config=None, probe_cache=None, timeout=10):
         self.master = master
-        # Node.js 验证
-        self.node_validate_button = ttk.Button(self.master, text="验证 Node.js", command=self.validate_node)
-        self.node_validate_button.grid(row=0, column=0, padx=5, pady=5)
-
-        # Java 验证
-        self.java_validate_button = ttk.Button(self.master, text="验证 Java", command=self.validate_java)
-        self.java_validate_button.grid(row=1, column=0, padx=5, pady=5)
-
-        self.java_status = tk.StringVar()
-        self.java_label = ttk.Label(self.master, textvariable=self.java_status)
-        self.java_label.grid(row=1, column=1, padx=5, pady=5)
-
-        self.node_status = tk.StringVar()
-        self.node_label = ttk.Label(self.master, textvariable=self.node_status)
-        self.node_label.grid(row=0, column=1, padx=5, pady=5)
-
-        self.node_log_button = ttk.Button(self.master, text="Node.js 日志", command=lambda: self.show_log(self.node_log))
-        self.node_log_button.grid(row=0, column=2, padx=5, pady=5)
-        self.node_log_button.grid_remove()  # Initially hide the button
-        self.node_log = ""
-
-        self.java_log_button = ttk.Button(self.master, text="Java 日志", command=lambda: self.show_log(self.java_log))
-        self.java_log_button.grid(row=1, column=2, padx=5, pady=5)
-        self.java_log_button.grid_remove()  # Initially hide the button
-        self.java_log = ""
-
-    def validate_node(self):
-        try:
-            if os.name == 'nt':  # Windows 系统
-                result = subprocess.run(["node", "-v"], check=True, capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            else:  # 其他系统
-                result = subprocess.run(["node", "-v"], check=True, capture_output=True, text=True)
-            self.node_status.set("Node.js 可用")
-            self.node_log = result.stdout
-            self.node_log_button.grid()  # Show the button after validation
-        except FileNotFoundError:
-            self.node_status.set("未安装Node.js")
-            tk.messagebox.showerror("错误", "Node.js 未找到. 请确保已安装并配置了环境变量.")
-        except subprocess.CalledProcessError as e:
-            self.node_status.set("Node.js 配置错误")
-            tk.messagebox.showerror("错误", f"Node.js 验证失败: {e}")
-
-    def validate_java(self):
-        try:
-            if os.name == 'nt':  # Windows 系统
-                result = subprocess.run(["java", "-version"], check=True, capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            else:  # 其他系统
-                result = subprocess.run(["java", "-version"], check=True, capture_output=True, text=True)
-            self.java_status.set("Java可用")
-            self.java_log = result.stderr
-            self.java_log_button.grid()  # Show the button after validation
-        except FileNotFoundError:
-            self.java_status.set("未安装Java")
-        except subprocess.CalledProcessError:
-            self.java_status.set("Java配置错误")
+        self.registry = registry  # 验证项注册表，插件也可以注册验证项
+        self.config = config if config is not None else {}  # 读取 node_path/java_path
+        self.probe_cache = probe_cache  # 版本探测结果的磁盘缓存
+        self.timeout = timeout  # 内置验证项的超时时间 (秒)
+        self.rows = {}  # 验证项名称 -> ProbeRow
+        self.runs = []  # 正在执行的 ProbeRun
+        self.durations = {}  # 最近一次验证的耗时: 名称 -> 秒
+
+        # 并行验证全部工具链
+        self.validate_all_button = ttk.Button(self.master, text="全部验证", command=self.validate_all)
+        self.validate_all_button.grid(row=0, column=0, padx=5, pady=5)
+        self.summary = tk.StringVar()
+        ttk.Label(self.master, textvariable=self.summary).grid(row=0, column=1, padx=5, pady=5)
+        self.cancel_button = ttk.Button(self.master, text="取消验证", command=self.cancel_validation)
+        self.cancel_button.grid(row=0, column=2, padx=5, pady=5)
+        self.cancel_button.grid_remove()
+
+        self.register_builtin_probes()
+        for probe in self.registry.probes():
+            self.add_row(probe)
+        self.registry.add_listener(self.add_row, self.remove_row)
+
+        # 兼容原有属性
+        self.node_status = self.rows["node"].status
+        self.java_status = self.rows["java"].status
+
+    def close(self):
+        """取消正在执行的验证并停止接收新验证项 (软重启销毁界面前调用)."""
+        self.cancel_validation()
+        self.registry.remove_listener(self.add_row)
+        # 取消后仍会收到结果回调，此时控件已销毁
+        self.runs = []
+        self.rows = {}
+
+    def register_builtin_probes(self):
+        """注册 Node.js 和 Java 验证项."""
+        register_toolchain_probes(self.registry, self.probe_cache, self.timeout)
+
+    def add_row(self, probe):
+        if probe.name not in self.rows:
+            self.rows[probe.name] = ProbeRow(self, probe, len(self.rows) + 1)
+
+    def remove_row(self, probe):
+        row = self.rows.pop(probe.name, None)
+        if row is not None:
+            for widget in (row.validate_button, row.label, row.log_button):
+                widget.destroy()
+
+    def validate(self, name):
+        """验证单个项目，失败时弹出提示."""
+        self.start([name], quiet=False)
+
+    def validate_all(self):
+        """并行验证所有已注册的项目，结果到达时分别更新状态."""
+        self.start(None, quiet=True)
+
+    def start(self, names, quiet):
+        for name in names or self.rows:
+            probe = self.registry.get(name)
+            if name in self.rows and probe is not None:
+                self.rows[name].status.set(f"正在验证 {probe.label}...")
+        self.summary.set("")
+        probe_run = self.registry.run(
+            self.config, names,
+            on_result=lambda *args: self.on_probe_result(*args, quiet=quiet),
+            on_complete=self.on_probes_complete)
+        self.runs.append(probe_run)
+        self.cancel_button.grid()
+
+    def cancel_validation(self):
+        """取消所有正在执行的验证."""
+        for probe_run in list(self.runs):
+            probe_run.cancel()
+
+    def on_probes_complete(self, probe_run):
+        if probe_run not in self.runs:
+            return
+        self.runs.remove(probe_run)
+        if not self.runs:
+            self.cancel_button.grid_remove()
+        if len(probe_run.names) > 1:
+            self.summary.set(f"{len(probe_run.names)} 项验证完成，用时 {probe_run.elapsed:.2f}s")
+
+    @staticmethod
+    def format_result(result):
+        """验证结果的状态文本和日志文本."""
+        if isinstance(result, tuple) and len(result) == 3:
+            version, source, executable = result
+            sources = {"cache": "缓存", "metadata": "安装目录中的版本文件", "spawn": "版本命令"}
+            return version, f"版本: {version}\n可执行文件: {executable}\n来源: {sources.get(source, source)}\n"
+        if isinstance(result, subprocess.CompletedProcess):
+            return "", result.stdout + result.stderr
+        return ("" if result is None else str(result)), ("" if result is None else str(result))
+
+    def on_probe_result(self, name, result, error, duration, cached, quiet=True):
+        row = self.rows.get(name)
+        probe = self.registry.get(name)
+        if row is None or probe is None:
+            return
+        self.durations[name] = duration
+        label = probe.label
+        timing = " (缓存)" if cached else f" ({duration:.2f}s)"
+        if error is None:
+            status, row.log = self.format_result(result)
+            row.status.set(f"{label} 可用 {status}".rstrip() + timing)
+            row.log_button.grid()  # Show the button after validation
+        elif isinstance(error, MissingExecutableError):
+            row.status.set(f"{label} 路径配置错误")
+            if not quiet:
+                tk.messagebox.showerror("错误", f"{label} 验证失败: {error}")
+        elif isinstance(error, FileNotFoundError):
+            row.status.set(f"未安装{label}")
+            if not quiet:
+                tk.messagebox.showerror("错误", f"{label} 未找到. 请确保已安装并配置了环境变量.")
+        elif isinstance(error, subprocess.CalledProcessError):
+            row.status.set(f"{label} 配置错误" + timing)
+            if not quiet:
+                tk.messagebox.showerror("错误", f"{label} 验证失败: {error}")
+        elif isinstance(error, subprocess.TimeoutExpired):
+            row.status.set(f"{label} 验证超时" + timing)
+        elif isinstance(error, TaskCancelled):
+            row.status.set(f"{label} 验证已取消")
+        else:
+            row.status.set(f"{label} 验证出错")
+            print(f"验证 {label} 出错: {error}")
 
     def show_log(self, log_message):
         log_window = tk.Toplevel(self.master)
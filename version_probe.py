@@ -0,0 +1,250 @@
+import os
+import re
+import glob
+import json
+import shutil
+import threading
+import subprocess
+
+from config_store import write_json_atomic
+
+EXE_SUFFIX = ".exe" if os.name == 'nt' else ""
+
+# 各工具链可执行文件相对安装目录的位置
+EXECUTABLES = {
+    "java": [os.path.join("bin", "java" + EXE_SUFFIX)],
+    "node": [os.path.join("bin", "node" + EXE_SUFFIX), "node" + EXE_SUFFIX],
+    "gradle": [os.path.join("bin", "gradle.bat" if os.name == 'nt' else "gradle")],
+}
+
+class MissingExecutableError(FileNotFoundError):
+    """配置的安装目录中没有可执行文件 (不回退到 PATH，避免掩盖错误的配置)."""
+
+    def __init__(self, tool, home):
+        super().__init__(f"配置的路径中没有 {tool} 可执行文件: {home}")
+        self.tool = tool
+        self.home = home
+
+
+_GRADLE_JAR = re.compile(r'^gradle-[a-z-]+?-(\d+\.\d+(?:\.\d+)?(?:-[\w.-]+)?)\.jar$')
+
+
+def read_java_release(home):
+    """读取 JDK 的 release 文件，返回 JAVA_VERSION，不存在时返回 None."""
+    try:
+        with open(os.path.join(home, "release"), "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip() == "JAVA_VERSION":
+                    return value.strip().strip('"') or None
+    except OSError:
+        pass
+    return None
+
+
+def read_gradle_version(home):
+    """根据 lib/gradle-*.jar 的文件名或 build-receipt.properties 获取 Gradle 版本."""
+    jars = glob.glob(os.path.join(home, "lib", "gradle-*.jar"))
+    for jar in jars:
+        match = _GRADLE_JAR.match(os.path.basename(jar))
+        if match:
+            return match.group(1)
+    import zipfile  # 只有 jar 文件名中没有版本号时才需要
+    for jar in jars:
+        try:
+            with zipfile.ZipFile(jar) as archive:
+                receipt = archive.read("org/gradle/build-receipt.properties").decode("utf-8", "replace")
+        except (KeyError, OSError, zipfile.BadZipFile):
+            continue
+        for line in receipt.splitlines():
+            key, _, value = line.partition("=")
+            if key.strip() == "versionNumber":
+                return value.strip()
+    return None
+
+
+def read_node_version(home):
+    """从 include/node/node_version.h 读取 Node.js 版本."""
+    try:
+        with open(os.path.join(home, "include", "node", "node_version.h"), "r", encoding="utf-8", errors="replace") as f:
+            header = f.read()
+    except OSError:
+        return None
+    parts = []
+    for name in ("NODE_MAJOR_VERSION", "NODE_MINOR_VERSION", "NODE_PATCH_VERSION"):
+        match = re.search(rf'#define\s+{name}\s+(\d+)', header)
+        if not match:
+            return None
+        parts.append(match.group(1))
+    return "v" + ".".join(parts)
+
+
+METADATA_READERS = {
+    "java": read_java_release,
+    "gradle": read_gradle_version,
+    "node": read_node_version,
+}
+
+
+# 版本命令参数
+VERSION_ARGS = {
+    "java": ["-version"],
+    "node": ["-v"],
+    "gradle": ["--version"],
+}
+
+
+def parse_version(tool, stdout, stderr):
+    """从版本命令的输出中提取版本号."""
+    output = (stdout or "") + (stderr or "")
+    if tool == "java":
+        match = re.search(r'version "([^"]+)"', output)
+    elif tool == "gradle":
+        match = re.search(r'^Gradle (\S+)', output, re.MULTILINE)
+    else:
+        match = re.search(r'v?\d+\.\d+\.\d+', output)
+    if match:
+        return match.group(match.lastindex or 0)
+    lines = output.strip().splitlines()
+    return lines[0] if lines else ""
+
+
+def _run(command, timeout):
+    kwargs = {"creationflags": subprocess.CREATE_NO_WINDOW} if os.name == 'nt' else {}
+    return subprocess.run(command, check=True, capture_output=True, text=True, timeout=timeout, **kwargs)
+
+
+def find_executable(tool, home=None):
+    """返回安装目录 home 中 (未指定时在 PATH 中) 的可执行文件路径，找不到时返回 None."""
+    if home:
+        for relative in EXECUTABLES[tool]:
+            path = os.path.join(home, relative)
+            if os.path.isfile(path):
+                return path
+        return None
+    return shutil.which(tool)
+
+
+def tool_home(tool, executable):
+    """根据可执行文件推断安装目录 (解析符号链接)."""
+    directory = os.path.dirname(os.path.realpath(executable))
+    if os.path.basename(directory).lower() == "bin":
+        return os.path.dirname(directory)
+    return directory
+
+
+class ProbeCache:
+    """版本探测结果的磁盘缓存，按可执行文件路径、大小和 mtime 失效."""
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._entries = None
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.cache_file, "r") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    @staticmethod
+    def _signature(executable):
+        stat = os.stat(executable)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def get(self, tool, executable):
+        """返回缓存的 {"version", "source"}，缓存失效时返回 None."""
+        try:
+            signature = self._signature(executable)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load().get(f"{tool}:{executable}")
+            if entry is not None and entry["signature"] == signature:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, tool, executable, version, source):
+        try:
+            signature = self._signature(executable)
+        except OSError:
+            return
+        with self._lock:
+            entries = self._load()
+            entries[f"{tool}:{executable}"] = {"signature": signature, "version": version, "source": source}
+            try:
+                os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+                write_json_atomic(self.cache_file, entries)
+            except OSError as e:
+                print(f"保存版本缓存失败: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            try:
+                os.remove(self.cache_file)
+            except OSError:
+                pass
+
+
+def detect_version(tool, home=None, executable=None, cache=None, spawn=True, timeout=10, run=None):
+    """
+    获取工具链版本，尽量不启动进程.
+    依次使用: 磁盘缓存、安装目录中的元数据文件、(spawn 为 True 时) 执行版本命令。
+    Args:
+        tool: "java"、"node" 或 "gradle"
+        home: 安装目录，为空时根据 executable 或 PATH 推断
+        run: 执行版本命令的函数 run(command, timeout)，返回 CompletedProcess
+    Returns: (version, source, executable)，source 为 "cache"、"metadata" 或 "spawn"
+    Raises: FileNotFoundError 找不到可执行文件 (home 中没有时为 MissingExecutableError)；
+            执行版本命令失败时抛出 subprocess 的异常
+    """
+    if executable is None:
+        executable = find_executable(tool, home)
+        if executable is None:
+            if home:
+                raise MissingExecutableError(tool, home)
+            raise FileNotFoundError(f"未找到 {tool}")
+    if cache is not None:
+        entry = cache.get(tool, executable)
+        if entry is not None:
+            return entry["version"], "cache", executable
+
+    version = METADATA_READERS[tool](home or tool_home(tool, executable))
+    source = "metadata"
+    if version is None:
+        if not spawn:
+            return None, None, executable
+        result = (run or _run)([executable] + VERSION_ARGS[tool], timeout)
+        version = parse_version(tool, result.stdout, result.stderr)
+        source = "spawn"
+    if cache is not None:
+        cache.put(tool, executable, version, source)
+    return version, source, executable
+
+
+# 内置验证项: (名称, 显示名称, 开销等级)
+TOOLCHAIN_PROBES = [("node", "Node.js", "spawn"), ("java", "Java", "jvm")]
+
+
+def register_toolchain_probes(registry, cache=None, timeout=10):
+    """向 ProbeRegistry 注册 Node.js 和 Java 验证项，安装目录取自配置项 node_path/java_path."""
+    def probe(name, context):
+        return detect_version(name, context.config.get(f"{name}_path") or None, cache=cache,
+                              timeout=context.timeout, run=context.run)
+
+    def executable(name, config):
+        return find_executable(name, config.get(f"{name}_path") or None)
+
+    for name, label, cost in TOOLCHAIN_PROBES:
+        registry.register(
+            name, lambda context, name=name: probe(name, context), label,
+            config_keys=(f"{name}_path",), timeout=timeout, cost=cost,
+            executable=lambda config, name=name: executable(name, config))
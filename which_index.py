@@ -0,0 +1,152 @@
+import os
+import time
+import threading
+
+
+class WhichIndex:
+    """PATH 中可执行文件的索引，用于在不启动进程的情况下查找命令.
+
+    每个 PATH 目录用 os.scandir 扫描一次，记录目录的 mtime；
+    目录内容变化 (mtime 改变) 时只重新扫描该目录。
+    Windows 上按 PATHEXT 的顺序匹配扩展名，名称不区分大小写。
+    """
+
+    def __init__(self, path=None, pathext=None, check_interval=2.0):
+        """
+        Args:
+            path: PATH 字符串，默认使用 os.environ['PATH']
+            pathext: Windows 可执行扩展名列表，默认读取 PATHEXT
+            check_interval: 两次检查目录 mtime 之间的最短间隔 (秒)
+        """
+        self.windows = os.name == 'nt'
+        if pathext is None and self.windows:
+            pathext = os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD').split(';')
+        self.pathext = [ext.lower() for ext in pathext or [] if ext]
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._path = None
+        self._dirs = []  # 按 PATH 顺序排列的目录
+        self._scans = {}  # 目录 -> (mtime_ns, {名称: [文件名, ...]})
+        self._names = None  # 名称 -> [完整路径, ...]，None 表示需要重建
+        self._checked = 0.0
+        self.scans = 0
+        self.set_path(os.environ.get('PATH', '') if path is None else path)
+
+    def _key(self, name):
+        return name.lower() if self.windows else name
+
+    def set_path(self, path):
+        """更新 PATH，已扫描过的目录会被复用."""
+        with self._lock:
+            if path == self._path:
+                return
+            self._path = path
+            dirs = []
+            seen = set()
+            for entry in path.split(os.pathsep):
+                directory = os.path.expanduser(os.path.expandvars(entry.strip().strip('"')))
+                if directory and directory not in seen:
+                    seen.add(directory)
+                    dirs.append(directory)
+            self._dirs = dirs
+            self._names = None
+            self._checked = 0.0
+
+    def invalidate(self, directory=None):
+        """强制重新扫描指定目录，不指定时重新扫描全部目录."""
+        with self._lock:
+            if directory is None:
+                self._scans.clear()
+            else:
+                self._scans.pop(directory, None)
+            self._names = None
+            self._checked = 0.0
+
+    def _scan(self, directory):
+        """扫描目录，返回 {名称: [文件名, ...]}，同一名称按 PATHEXT 顺序排列."""
+        names = {}
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return names
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                if self.windows:
+                    base, ext = os.path.splitext(entry.name)
+                    ext = ext.lower()
+                    if ext not in self.pathext:
+                        continue
+                    names.setdefault(self._key(entry.name), []).append((-1, entry.name))
+                    names.setdefault(self._key(base), []).append((self.pathext.index(ext), entry.name))
+                elif entry.stat().st_mode & 0o111:
+                    names.setdefault(entry.name, []).append((0, entry.name))
+            except OSError:
+                continue
+        return {name: [filename for _, filename in sorted(files)] for name, files in names.items()}
+
+    def _refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._names is not None and now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        for directory in self._dirs:
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            cached = self._scans.get(directory)
+            if cached is None or cached[0] != mtime:
+                self._scans[directory] = (mtime, self._scan(directory) if mtime is not None else {})
+                self.scans += 1
+                self._names = None
+        if self._names is None:
+            names = {}
+            for directory in self._dirs:
+                for name, files in self._scans[directory][1].items():
+                    names.setdefault(name, []).extend(os.path.join(directory, f) for f in files)
+            self._names = names
+
+    def refresh(self):
+        """立即检查所有目录的 mtime 并重新扫描变化的目录."""
+        with self._lock:
+            self._refresh(force=True)
+
+    def candidates(self, name):
+        """按解析顺序返回 name 在 PATH 中的所有候选路径."""
+        with self._lock:
+            self._refresh()
+            return list(self._names.get(self._key(name), ()))
+
+    def which(self, name):
+        """返回运行 name 时实际使用的可执行文件，找不到时返回 None."""
+        with self._lock:
+            self._refresh()
+            found = self._names.get(self._key(name))
+            return found[0] if found else None
+
+    def shadowed(self, names=None):
+        """
+        返回被遮蔽的命令: {名称: [生效的路径, 被遮蔽的路径, ...]}.
+        names 为空时报告 PATH 中所有出现在多个目录里的命令。
+        """
+        with self._lock:
+            self._refresh()
+            keys = self._names if names is None else [self._key(name) for name in names]
+            report = {}
+            for key in keys:
+                if names is None and os.path.splitext(key)[1] in self.pathext:
+                    continue  # Windows 上 java.exe 和 java 是同一命令，只报告一次
+                paths = self._names.get(key, ())
+                if len({os.path.dirname(p) for p in paths}) > 1:
+                    report[key] = list(paths)
+            return report
+
+    def stats(self):
+        with self._lock:
+            return {
+                "directories": len(self._dirs),
+                "scans": self.scans,
+                "names": len(self._names) if self._names is not None else 0,
+            }